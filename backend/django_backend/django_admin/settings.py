@@ -163,3 +163,73 @@ STATIC_URL = "static/"
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Shared HTTP client for external price and exchange APIs (kryptotracker/utils/http_client.py)
+HTTP_CLIENT = {
+    'TIMEOUT': (3.05, 10),  # (connect, read) in seconds
+    'POOL_MAXSIZE': 10,
+    'MAX_RETRIES': 3,
+    'BACKOFF_FACTOR': 0.5,
+    # 'record' writes all responses to RECORDINGS_DIR, 'replay' serves them offline with REPLAY_LATENCY seconds delay
+    'BACKEND': os.environ.get('HTTP_CLIENT_BACKEND', 'live'),
+    'RECORDINGS_DIR': os.environ.get('HTTP_RECORDINGS_DIR', BASE_DIR / 'http_recordings'),
+    'REPLAY_LATENCY': float(os.environ.get('HTTP_REPLAY_LATENCY', 0)),
+}
+
+# Price provider classes by name (kryptotracker/utils/providers.py), e.g. to plug in another CoinGecko implementation
+# PRICE_PROVIDERS = {'coingecko': 'kryptotracker.utils.providers.CoinGeckoProvider'}
+
+# Token buckets for external APIs shared by all workers (kryptotracker/utils/rate_limiter.py)
+# rate: tokens refilled per second, capacity: maximum burst
+RATE_LIMITS = {
+    'coingecko': {'rate': 10 / 60, 'capacity': 10},
+    'cryptocompare': {'rate': 1.0, 'capacity': 20},
+    'kraken': {'rate': 0.33, 'capacity': 15},
+}
+# seconds request threads wait for budget, 0 fails fast and serves the cached price (background jobs wait up to 30s)
+RATE_LIMIT_REQUEST_TIMEOUT = 0
+
+# Circuit breakers of external APIs per worker (kryptotracker/utils/circuit_breaker.py)
+CIRCUIT_BREAKER = {
+    'FAILURE_THRESHOLD': 5,  # failures within FAILURE_WINDOW seconds open the circuit
+    'FAILURE_WINDOW': 60,
+    'RESET_TIMEOUT': 120,  # seconds until a trial request is sent to an open provider
+}
+
+# Price refresh of AssetInfo (kryptotracker/utils/price_refresh.py)
+# 'inline': stale prices are refreshed in the request, 'stale-while-revalidate': cached prices are returned
+# immediately and stale ones are refreshed in background, 'daemon': cached prices are returned and only the
+# price_daemon management command refreshes them
+PRICE_REFRESH_MODE = 'stale-while-revalidate'
+# minutes until a price is stale, AssetInfo.stale_after overrides it per asset
+PRICE_STALE_AFTER = 30
+
+# seconds a cross-asset rate derived from cached EUR prices is reused (kryptotracker/utils/conversion.py)
+CONVERSION_RATE_TTL = 60
+
+# Caches, the 'prices' cache is shared by all workers of a host (kryptotracker/utils/price_cache.py)
+# for several hosts use the database backend (python manage.py createcachetable)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'prices': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PRICE_CACHE_LOCATION', BASE_DIR / '.cache' / 'prices'),
+        'TIMEOUT': 60 * 60 * 6,
+        'VERSION': 1,  # increase to invalidate all cached prices
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,  # evict a quarter of the entries (CULL_FREQUENCY) when reached
+            'CULL_FREQUENCY': 4,
+        },
+    },
+    # per-user dashboard snapshots, shared by all workers for invalidation (see utils/dashboard_snapshot.py)
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DASHBOARD_CACHE_LOCATION', BASE_DIR / '.cache' / 'dashboard'),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
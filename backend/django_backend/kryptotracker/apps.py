@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class KryptotrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "kryptotracker"
+
+    def ready(self):
+        from kryptotracker import signals  # noqa: F401
@@ -0,0 +1,68 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+
+import time
+import tracemalloc
+from pathlib import Path
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+from kryptotracker.utils import coinmarketcap
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'coinmarketcap_pages'
+
+
+def parse_with_beautifulsoup(html: str):
+    """Former coinmarketcap scraping: full DOM build and CSS selectors on hashed class names"""
+    soup = BeautifulSoup(html, 'html.parser')
+    price_element = soup.select_one('.sc-f70bb44c-0.jxpCgO.base-text')
+    image_element = soup.select_one('[data-role="coin-logo"] img')
+    name_element = soup.select_one('[data-role="coin-name"]')
+    symbol_element = soup.select_one('[data-role="coin-symbol"]')
+    if not all([price_element, image_element, name_element, symbol_element]):
+        return None
+    return {
+        'price': float(price_element.text.strip().replace('€', '').replace(',', '')),
+        'image': image_element['src'],
+        'name': name_element.get_text(strip=True),
+        'symbol': symbol_element.text.strip(),
+    }
+
+
+def measure(parser, html: str, iterations: int) -> dict:
+    """Return average runtime in ms and peak memory in KiB of a parser for one page"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        result = parser(html)
+    runtime = (time.perf_counter() - started) / iterations * 1000
+
+    tracemalloc.start()
+    parser(html)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return {'ms': runtime, 'peak_kib': peak, 'ok': result is not None}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark coinmarketcap page parsing (BeautifulSoup vs. embedded JSON) on saved HTML pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Parse runs per page and parser')
+        parser.add_argument('--pages', type=str, default=str(FIXTURES_DIR), help='Directory with saved HTML pages')
+
+    def handle(self, *args, **options):
+        pages = sorted(Path(options['pages']).glob('*.html'))
+        if not pages:
+            self.stdout.write(f"No HTML pages found in {options['pages']}")
+            return
+
+        for page in pages:
+            html = page.read_text(encoding='utf-8')
+            soup_stats = measure(parser=parse_with_beautifulsoup, html=html, iterations=options['iterations'])
+            json_stats = measure(parser=coinmarketcap.parse_coin_page, html=html, iterations=options['iterations'])
+            self.stdout.write(
+                f"{page.name} ({len(html) / 1024:.0f} KiB): "
+                f"beautifulsoup {soup_stats['ms']:.2f} ms / {soup_stats['peak_kib']:.0f} KiB peak "
+                f"(parsed: {soup_stats['ok']}), "
+                f"next_data {json_stats['ms']:.2f} ms / {json_stats['peak_kib']:.0f} KiB peak "
+                f"(parsed: {json_stats['ok']}), "
+                f"speedup x{soup_stats['ms'] / json_stats['ms']:.1f}")
@@ -0,0 +1,148 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+
+import time
+from datetime import datetime, timedelta
+import pytz
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from kryptotracker.models import AssetInfo, AssetOwned, Comment, Portfolio, PortfolioType, Transaction, TransactionType
+from kryptotracker.serializers import TransactionListSerializer, TransactionSerializer
+
+
+class Rollback(Exception):
+    """Raised to roll back the benchmark data"""
+
+
+def serialize_original(user: User) -> list:
+    """Original transaction list: TransactionSerializer, the asset, type and comment of each row are queried one by
+    one and each date is parsed again"""
+    transactions = Transaction.objects.filter(Q(user=user) | Q(asset__portfolio__user=user)).order_by('-tx_date', '-id')
+    txs = []
+    for tx in TransactionSerializer(transactions, many=True).data:
+        asset_owned = AssetOwned.objects.get(id=tx['asset'])
+        tx_type = TransactionType.objects.get(id=tx['tx_type'])
+        tx_date = datetime.fromisoformat(tx['tx_date']).astimezone(pytz.UTC).strftime('%d.%m.%Y %H:%M')
+        txs.append({
+            'tx_id': tx['id'],
+            'tx_type': tx_type.type,
+            'asset': asset_owned.asset.acronym.upper(),
+            'tx_amount': str(round(tx['tx_amount'], 3)).replace('.', ','),
+            'tx_value': str(round(tx['tx_value'], 3)).replace('.', ','),
+            'tx_fee': str(round(tx['tx_fee'], 3)).replace('.', ','),
+            'tx_date': tx_date,
+            'tx_hash': tx['tx_hash'],
+            'tx_status': 'In Bearbeitung' if tx['status'] == 0 else 'Abgeschlossen',
+            'tx_sender_address': tx['tx_sender_address'],
+            'tx_recipient_address': tx['tx_recipient_address'],
+            'tx_comment': '' if not tx['tx_comment'] else Comment.objects.get(id=tx['tx_comment']).text,
+        })
+    return txs
+
+
+def serialize_instances(user: User) -> list:
+    """Intermediate transaction list: model instances with the foreign keys joined by select_related, formatted per
+    row"""
+    transactions = Transaction.objects.filter(user=user).select_related('asset__asset', 'tx_type', 'tx_comment') \
+        .order_by('-tx_date', '-id')
+    txs = []
+    for tx in transactions:
+        txs.append({
+            'tx_id': tx.id,
+            'tx_type': tx.tx_type.type,
+            'asset': tx.asset.asset.acronym.upper(),
+            'tx_amount': str(round(tx.tx_amount, 3)).replace('.', ','),
+            'tx_value': str(round(tx.tx_value, 3)).replace('.', ','),
+            'tx_fee': str(round(tx.tx_fee, 3)).replace('.', ','),
+            'tx_date': tx.tx_date.astimezone(pytz.UTC).strftime('%d.%m.%Y %H:%M'),
+            'tx_hash': tx.tx_hash,
+            'tx_status': 'In Bearbeitung' if not tx.status else 'Abgeschlossen',
+            'tx_sender_address': tx.tx_sender_address,
+            'tx_recipient_address': tx.tx_recipient_address,
+            'tx_comment': '' if tx.tx_comment is None else tx.tx_comment.text,
+        })
+    return txs
+
+
+def serialize_list(user: User) -> list:
+    """Current transaction list: values() projection with joined fields and TransactionListSerializer"""
+    rows = TransactionListSerializer.project(Transaction.objects.filter(user=user).order_by('-tx_date', '-id'))
+    return TransactionListSerializer(list(rows), many=True).data
+
+
+class QueryCounter:
+    """Execute wrapper counting the queries of a connection, unlike connection.queries not limited to 9000 queries"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(serialize, user: User) -> dict:
+    """Return wall time, CPU time and number of queries of one serialization run"""
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        started_wall = time.perf_counter()
+        started_cpu = time.process_time()
+        result = serialize(user)
+        cpu = time.process_time() - started_cpu
+        wall = time.perf_counter() - started_wall
+    return {'wall': wall, 'cpu': cpu, 'queries': queries.count, 'rows': len(result), 'result': result}
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the transaction list serialization on generated transactions: the original serializer with '
+            'one query per row, model instances joined by select_related and the values() projection with '
+            'TransactionListSerializer. The data is rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Number of generated transactions')
+
+    def create_rows(self, rows: int) -> User:
+        """Create a user with one portfolio, ten assets and staking rewards like a Kraken import"""
+        user = User.objects.create_user(username=f'benchmark-{time.time_ns()}', password='benchmark')
+        portfolio_type, _ = PortfolioType.objects.get_or_create(type='Staking')
+        tx_type, _ = TransactionType.objects.get_or_create(type='Reward')
+        portfolio = Portfolio.objects.create(user=user, name='Benchmark', portfolio_type=portfolio_type)
+        owned = []
+        for i in range(10):
+            asset_info = AssetInfo.objects.create(fullname=f'Benchmark {i}', api_id_name=f'benchmark-{i}',
+                                                  acronym=f'bm{i}', current_price=1.0)
+            owned.append(AssetOwned.objects.create(portfolio=portfolio, asset=asset_info, quantity_owned=1.0))
+        comments = Comment.objects.bulk_create([Comment(text=f'Benchmark-Import: {i}') for i in range(rows // 2)])
+        start = timezone.now() - timedelta(days=rows)
+        Transaction.objects.bulk_create([
+            Transaction(user=user, asset=owned[i % len(owned)], tx_type=tx_type,
+                        tx_comment=comments[i // 2] if i % 2 == 0 else None, tx_hash=f'BM{i}', tx_amount=0.0001 * i,
+                        tx_value=0.01 * i, tx_fee=0.0, tx_date=start + timedelta(hours=i), status=True)
+            for i in range(rows)
+        ], batch_size=1000)
+        return user
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.create_rows(rows=options['rows'])
+                original = measure(serialize=serialize_original, user=user)
+                instances = measure(serialize=serialize_instances, user=user)
+                current = measure(serialize=serialize_list, user=user)
+                current_result = [dict(row) for row in current['result']]
+                if original['result'] != current_result or instances['result'] != current_result:
+                    self.stdout.write('Warning: serializers returned different data')
+                for name, stats in (('original serializer', original), ('model instances', instances),
+                                    ('list serializer', current)):
+                    self.stdout.write(
+                        f"{name}: {stats['rows']} rows, {stats['queries']} queries, {stats['wall']:.2f}s wall, "
+                        f"{stats['cpu']:.2f}s CPU ({stats['cpu'] / max(stats['rows'], 1) * 1e6:.1f} µs CPU per row)")
+                for name, stats in (('original serializer', original), ('model instances', instances)):
+                    self.stdout.write(f"speedup against {name}: CPU x{stats['cpu'] / max(current['cpu'], 1e-9):.1f}, "
+                                      f"wall x{stats['wall'] / max(current['wall'], 1e-9):.1f}")
+                raise Rollback
+        except Rollback:
+            pass
@@ -6,12 +6,12 @@ import time
 import hmac
 import hashlib
 import base64
-import requests
 import urllib.parse
 import pandas as pd
 from datetime import datetime
 from kryptotracker.models import *
-from kryptotracker.utils import crypto_data
+from kryptotracker.utils import asset_resolver, crypto_data, dashboard_snapshot, http_client, kraken_assets, \
+    rate_limiter
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 
@@ -33,7 +33,7 @@ def kraken_request(uri_path: str, data: dict, api_key: str, api_sec: str):
         'API-Key': api_key,
         'API-Sign': get_kraken_signature(urlpath=uri_path, data=data, api_sec=api_sec)
     }
-    req = requests.post((api_url + uri_path), headers=headers, data=data)
+    req = http_client.post((api_url + uri_path), headers=headers, data=data)
     return req
 
 
@@ -82,6 +82,7 @@ def get_kraken_ledgers_info(a_key: str, a_sec: str, start: int = None):
 
 
 # Start: ########################### Handle Spot and Staking Portfolio Update ############################
+@dashboard_snapshot.deferred_invalidation()
 def handle_portfolio_update(user: User, balances: dict, staking_allocations: dict) -> None:
     """Update user staking and spot portfolio with current data from kraken exchange."""
     cleaned_balances = clean_map_balances(data=balances)
@@ -99,18 +100,15 @@ def handle_portfolio_update(user: User, balances: dict, staking_allocations: dic
 
 def clean_map_balances(data: dict) -> dict:
     """Remove staking assets from balance due to doubles with staking_allocations and map coins."""
-    # remove staking assets
-    cleaned_balances = {key: value for key, value in data.items() if not key.endswith('.S') and not key.endswith('.M')}
+    # remove staking assets (all earn variants e.g. .S, .M, .F, .B)
+    cleaned_balances = {key: value for key, value in data.items() if not kraken_assets.normalizer.is_earn_variant(key)}
     # map coins
-    coin_mapping = crypto_data.map_kraken_coins()
-    mapped_balances = {coin_mapping.get(key, key): value for key, value in cleaned_balances.items()}
+    mapped_balances = {kraken_assets.normalizer.normalize_symbol(key): value for key, value in cleaned_balances.items()}
     return mapped_balances
 
 
 def extract_staking_data(data: dict) -> list:
     """Return current staking data from staking portfolio"""
-    coin_mapping = crypto_data.map_kraken_coins()
-
     extracted_data = []
     for item in data:
         # drop unnecessary elements
@@ -122,8 +120,7 @@ def extract_staking_data(data: dict) -> list:
             item['amount_allocated'].pop('allocations', None)
 
         # map kraken asset names with original
-        if item['native_asset'] in coin_mapping:
-            item['native_asset'] = coin_mapping[item['native_asset']]
+        item['native_asset'] = kraken_assets.normalizer.normalize_symbol(item['native_asset'])
 
         extracted_data.append({
             'asset': item['native_asset'],
@@ -180,15 +177,27 @@ def get_or_create_portfolios(user: User, staking_data: list = None, ledgers: boo
     return portfolio_staking, portfolio_spot
 
 
+def get_assets_owned(portfolio: Portfolio, asset_infos) -> dict:
+    """Return the owned assets of a portfolio for many AssetInfos with one query, the first per asset by id"""
+    assets_owned = {}
+    for asset_owned in AssetOwned.objects.filter(portfolio=portfolio,
+                                                 asset__in=[asset_info for asset_info in asset_infos if asset_info]) \
+            .order_by('id'):
+        assets_owned.setdefault(asset_owned.asset_id, asset_owned)
+    return assets_owned
+
+
 def update_staking_portfolio(staking_portfolio: Portfolio, data: list) -> None:
     """Update staking portfolio and their assets (amount, quantity_price) based on provided data from kraken API"""
     sum_staking = 0.0
+    asset_infos = asset_resolver.resolver.resolve_many(acronyms=[staking_data['asset'] for staking_data in data])
+    assets_owned = get_assets_owned(portfolio=staking_portfolio, asset_infos=asset_infos.values())
     for staking_data in data:
         sum_staking += float(staking_data['converted'])
-        asset_info = AssetInfo.objects.filter(acronym=staking_data['asset']).first()
+        asset_info = asset_infos[staking_data['asset']]
         # crypto_data.update_asset_info(asset_info=asset_info) # probably don't need
         if asset_info is not None:
-            asset_in_staking = AssetOwned.objects.filter(asset=asset_info, portfolio=staking_portfolio).first()
+            asset_in_staking = assets_owned.get(asset_info.pk)
             if asset_in_staking is None:
                 asset_in_staking = AssetOwned.objects.create(
                     asset=asset_info,
@@ -209,20 +218,16 @@ def update_staking_portfolio(staking_portfolio: Portfolio, data: list) -> None:
 def update_spot_portfolio(spot_portfolio: Portfolio, data: dict) -> None:
     """Update spot portfolio and their assets (quantity_owned, quantity_price) based on provided data from kraken API"""
     sum_spot = 0
+    asset_infos = asset_resolver.resolver.resolve_many(acronyms=data.keys())
+    # refresh all prices with one batched request, EthereumPoW is updated with webscraping
+    crypto_data.refresh_asset_infos(asset_infos=asset_infos.values())
+    assets_owned = get_assets_owned(portfolio=spot_portfolio, asset_infos=asset_infos.values())
     for crpyto_symbol, amount in data.items():
-        asset_info = AssetInfo.objects.filter(acronym=crpyto_symbol).first()
+        asset_info = asset_infos[crpyto_symbol]
         if asset_info is not None:
-            if asset_info.fullname == "EthereumPoW":
-                data = crypto_data.get_crypto_data_from_coinmarketcap(crypto_name=asset_info.api_id_name[:-4])
-                if data is not None:
-                    asset_info.current_price = data['current_price']
-                    asset_info.image = data['image']
-                    asset_info.save()
-            else:
-                crypto_data.update_asset_info(asset_info=asset_info)
             quantity_price = asset_info.current_price * float(amount)
             sum_spot += quantity_price
-            asset_in_spot = AssetOwned.objects.filter(asset=asset_info, portfolio=spot_portfolio).first()
+            asset_in_spot = assets_owned.get(asset_info.pk)
             if asset_in_spot is None and crpyto_symbol != 'KFEE':
                 asset_in_spot = AssetOwned.objects.create(
                     asset=asset_info,
@@ -243,6 +248,7 @@ def update_spot_portfolio(spot_portfolio: Portfolio, data: dict) -> None:
 
 # Start: ########################### Handle import of new transactions in ledgers ############################
 # TODO: import new tx according to type
+@dashboard_snapshot.deferred_invalidation()
 def handle_new_ledger_tx(user: User, data: dict):
     """Iterate through ledgers dictionary with new transactions and handle the import"""
     # convert timestamp into datetime from all elements 'time'
@@ -258,6 +264,7 @@ def handle_new_ledger_tx(user: User, data: dict):
 
     portfolio_staking, portfolio_spot = get_or_create_portfolios(user=user, ledgers=True, dataframe=df)
 
+    asset_infos = asset_resolver.resolver.resolve_many(acronyms=df['asset'].dropna())
     # TODO: import tx according to tx_type
     for index, element in df.iterrows():
         print(index)
@@ -266,7 +273,7 @@ def handle_new_ledger_tx(user: User, data: dict):
             print(f"Transaktion vom {element['time']} bereits importiert.")
             continue
 
-        asset_info = AssetInfo.objects.filter(acronym=element["asset"]).first()
+        asset_info = asset_infos.get(element["asset"])
         if asset_info is not None:
             if element['type'] == "Reward":
                 asset_owned = AssetOwned.objects.filter(asset=asset_info,
@@ -287,8 +294,7 @@ def create_dataframe_from_ledgers_data(data: dict) -> pd.DataFrame:
     # drop unnecessary column and convert time, asset and type fields
     df = df.drop(columns=['aclass'])
     df['time'] = pd.to_datetime(df['time']).dt.strftime('%Y-%m-%dT%H:%M')
-    coin_mapping = crypto_data.map_kraken_coins()
-    df['asset'] = df['asset'].map(coin_mapping).fillna(df['asset'])
+    df['asset'] = kraken_assets.normalizer.normalize(df['asset'])
     tx_type_mapping = crypto_data.map_kraken_tx_types()
     df['type'] = df['type'].map(tx_type_mapping).fillna(df['type'])
     df = df['migration' != df['subtype']]
@@ -397,6 +403,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write('API Request...')
+        # jobs may wait for the rate limit budget, request threads fail fast
+        rate_limiter.set_acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
         exchange_apis = ExchangeAPIs.objects.all()
         # go through each api and check for new data in their exchange
         for exchange_api in exchange_apis:
@@ -0,0 +1,82 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from kryptotracker.models import AssetOwned, Portfolio
+from kryptotracker.utils import dashboard_snapshot, etags
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Delete dust holdings and save holding values and portfolio balances with the current prices in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per query and bulk update')
+        parser.add_argument('--dust-threshold', type=float, default=dashboard_snapshot.DUST_THRESHOLD,
+                            help='Holdings valued below this amount in EUR are deleted')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the changes')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        current_time = timezone.now()
+
+        # value all holdings with their current price, collect dust and changed values
+        dust = []
+        changed_owned = []
+        updated_owned = 0
+        balances = {}
+        for own in AssetOwned.objects.select_related('asset').order_by('pk').iterator(chunk_size=batch_size):
+            value = (own.asset.current_price or 0.0) * own.quantity_owned
+            if value < options['dust_threshold']:
+                dust.append(own.pk)
+                continue
+            balances[own.portfolio_id] = balances.get(own.portfolio_id, 0.0) + value
+            if value != own.quantity_price:
+                own.quantity_price = value
+                own.updated_at = current_time
+                changed_owned.append(own)
+            if len(changed_owned) >= batch_size:
+                updated_owned += self.save_owned(owned=changed_owned, dry_run=dry_run)
+                changed_owned = []
+        updated_owned += self.save_owned(owned=changed_owned, dry_run=dry_run)
+
+        # materialize portfolio balances as sum of their holding values
+        changed_portfolios = []
+        updated_portfolios = 0
+        for portfolio in Portfolio.objects.order_by('pk').only('pk', 'user_id', 'balance').iterator(chunk_size=batch_size):
+            balance = balances.get(portfolio.pk, 0.0)
+            if balance != portfolio.balance:
+                portfolio.balance = balance
+                portfolio.updated_at = current_time
+                changed_portfolios.append(portfolio)
+            if len(changed_portfolios) >= batch_size:
+                updated_portfolios += self.save_portfolios(portfolios=changed_portfolios, dry_run=dry_run)
+                changed_portfolios = []
+        updated_portfolios += self.save_portfolios(portfolios=changed_portfolios, dry_run=dry_run)
+
+        if not dry_run:
+            for i in range(0, len(dust), batch_size):
+                AssetOwned.objects.filter(pk__in=dust[i:i + batch_size]).delete()
+
+        message = (f"{'Would update' if dry_run else 'Updated'} {updated_owned} holdings and {updated_portfolios} "
+                   f"portfolios, {'would delete' if dry_run else 'deleted'} {len(dust)} dust holdings")
+        self.stdout.write(message)
+        logger.info(message)
+
+    def save_owned(self, owned: list, dry_run: bool) -> int:
+        """Write holding values with one bulk update, bulk updates write no history rows"""
+        if owned and not dry_run:
+            AssetOwned.objects.bulk_update(owned, ['quantity_price', 'updated_at'])
+        return len(owned)
+
+    def save_portfolios(self, portfolios: list, dry_run: bool) -> int:
+        """Write portfolio balances with one bulk update and bump the change counters of their owners"""
+        if portfolios and not dry_run:
+            Portfolio.objects.bulk_update(portfolios, ['balance', 'updated_at'])
+            # bulk updates send no signals, the portfolio list of the owners changed
+            etags.bump(user_ids=[portfolio.user_id for portfolio in portfolios], counter=etags.DATA)
+        return len(portfolios)
@@ -0,0 +1,77 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+
+import time
+import random
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from kryptotracker.models import AssetInfo, AssetOwned
+from kryptotracker.utils import crypto_data, http_client, rate_limiter, trends
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_held_asset_infos():
+    """Return all AssetInfos referenced by any AssetOwned, euro excluded"""
+    return AssetInfo.objects.filter(id__in=AssetOwned.objects.values('asset_id')).exclude(api_id_name='euro').order_by('id')
+
+
+class Command(BaseCommand):
+    help = 'Refresh current prices of all held assets in batches on a fixed cadence and backfill missing price history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between two refresh runs')
+        parser.add_argument('--batch-size', type=int, default=crypto_data.COINGECKO_MARKETS_MAX_IDS,
+                            help='AssetInfos per batch')
+        parser.add_argument('--jitter', type=float, default=0.1,
+                            help='Random deviation of the interval as fraction, e.g. 0.1 for +-10%%')
+        parser.add_argument('--once', action='store_true', help='Run one refresh and exit')
+
+    def refresh(self, batch_size: int) -> dict:
+        """Refresh all held assets batch by batch and return fetch timings of the run"""
+        asset_infos = list(get_held_asset_infos())
+        timings = []
+        updated = 0
+        for i in range(0, len(asset_infos), batch_size):
+            batch = asset_infos[i:i + batch_size]
+            started = time.monotonic()
+            updated += len(crypto_data.refresh_asset_infos(asset_infos=batch, force=True))
+            timings.append(time.monotonic() - started)
+
+        # price history for the trends is only requested for assets without stored history
+        backfilled = trends.backfill_missing_history(asset_infos=asset_infos)
+
+        return {
+            'assets': len(asset_infos),
+            'updated': updated,
+            'backfilled': len(backfilled),
+            'batches': len(timings),
+            'total_seconds': sum(timings),
+            'max_batch_seconds': max(timings, default=0.0),
+        }
+
+    def handle(self, *args, **options):
+        self.stdout.write('Price daemon started...')
+        # jobs may wait for the rate limit budget, request threads fail fast
+        rate_limiter.set_acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+        try:
+            while True:
+                close_old_connections()
+                stats = self.refresh(batch_size=options['batch_size'])
+                message = (f"Refreshed {stats['updated']}/{stats['assets']} assets in {stats['batches']} batches, "
+                           f"{stats['total_seconds']:.2f}s total, {stats['max_batch_seconds']:.2f}s slowest batch, "
+                           f"backfilled history of {stats['backfilled']} assets")
+                self.stdout.write(message)
+                logger.info(message)
+                if options['once']:
+                    break
+
+                # jitter spreads the upstream requests of several daemons/hosts
+                interval = options['interval'] * (1 + random.uniform(-options['jitter'], options['jitter']))
+                time.sleep(max(0.0, interval - stats['total_seconds']))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            http_client.close_sessions()
+        self.stdout.write('Price daemon stopped...')
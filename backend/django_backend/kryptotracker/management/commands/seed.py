@@ -2,7 +2,7 @@
 # Date: 22.01.2023
 
 import json
-import requests
+from kryptotracker.utils import http_client, rate_limiter
 from pathlib import Path
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
@@ -65,12 +65,14 @@ class Command(BaseCommand):
             asset_names_str = "%2C%20".join(asset_names)
             url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=eur&ids={asset_id}%2C%20{asset_names_str}&order=market_cap_desc&per_page=250&page=1&sparkline=false&locale=de"
 
-        response = requests.get(url)
+        response = http_client.get(url)
         data = response.json()
         return data
 
     def handle(self, *args, **options):
         self.stdout.write('Seeding data...')
+        # jobs may wait for the rate limit budget, request threads fail fast
+        rate_limiter.set_acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
         faker = Faker()
 
         # create dummy user
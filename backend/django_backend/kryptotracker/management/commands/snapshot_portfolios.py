@@ -0,0 +1,155 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+
+from datetime import date, datetime, time, timedelta
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from kryptotracker.models import AssetInfo, AssetOwned, Portfolio, PortfolioSnapshot, PriceTick, Transaction
+import logging
+
+logger = logging.getLogger(__name__)
+
+# the closing price of a day is the last price tick at most this long before the end of the day
+CLOSE_PRICE_TOLERANCE = timedelta(days=2)
+
+
+def to_local_date(value: datetime) -> date:
+    """Return the local date of a naive or aware datetime"""
+    return timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+
+
+def get_day_end(day: date) -> datetime:
+    """Return the start of the next day, aware if time zone support is active"""
+    day_end = datetime.combine(day + timedelta(days=1), time.min)
+    return timezone.make_aware(day_end) if timezone.is_aware(timezone.now()) else day_end
+
+
+class Command(BaseCommand):
+    help = ('Write the daily value snapshots of all portfolios, rolled forward from the last snapshot of each '
+            'portfolio (run nightly after midnight)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', type=date.fromisoformat, default=None,
+                            help='Last day to snapshot (YYYY-MM-DD), default yesterday')
+        parser.add_argument('--max-gap-days', type=int, default=31,
+                            help='Days missing since the last snapshot (or the creation of a portfolio) that are '
+                                 'filled at most')
+        parser.add_argument('--batch-size', type=int, default=500, help='Snapshots per bulk insert')
+
+    def get_days(self, last_day: date) -> dict:
+        """Return the days to snapshot of each portfolio: the days after its last snapshot up to last_day"""
+        last_snapshots = dict(PortfolioSnapshot.objects.values('portfolio_id').annotate(last=Max('day'))
+                              .values_list('portfolio_id', 'last'))
+        first_allowed = last_day - timedelta(days=self.max_gap_days - 1)
+        days = {}
+        for portfolio_id, user_id, created_at in Portfolio.objects.values_list('id', 'user_id', 'created_at'):
+            if portfolio_id in last_snapshots:
+                first_day = last_snapshots[portfolio_id] + timedelta(days=1)
+            else:
+                first_day = to_local_date(created_at)
+            first_day = max(first_day, first_allowed)
+            if first_day <= last_day:
+                days[portfolio_id] = (user_id, [first_day + timedelta(days=i)
+                                                for i in range((last_day - first_day).days + 1)])
+        return days
+
+    def get_close_prices(self, asset_ids: set, days: list) -> dict:
+        """Return the closing prices {(asset id, day): price} of assets from the price ticks with one query"""
+        day_ends = {day: int(get_day_end(day).timestamp()) for day in days}
+        ticks = pd.DataFrame.from_records(
+            PriceTick.objects.filter(asset_id__in=asset_ids,
+                                     ts__gte=min(day_ends.values()) - 86400 - CLOSE_PRICE_TOLERANCE.total_seconds(),
+                                     ts__lt=max(day_ends.values())).values_list('asset_id', 'ts', 'price'),
+            columns=['asset_id', 'ts', 'price']
+        )
+        if ticks.empty:
+            return {}
+        targets = pd.DataFrame([(asset_id, day, day_end - 1) for asset_id in asset_ids
+                                for day, day_end in day_ends.items()], columns=['asset_id', 'day', 'ts'])
+        merged = pd.merge_asof(targets.sort_values('ts'), ticks.sort_values('ts'), on='ts', by='asset_id',
+                               direction='backward', tolerance=int(CLOSE_PRICE_TOLERANCE.total_seconds()))
+        merged = merged.dropna(subset=['price'])
+        return {(asset_id, day): float(price) for asset_id, day, price
+                in merged[['asset_id', 'day', 'price']].itertuples(index=False)}
+
+    def handle(self, *args, **options):
+        current_time = timezone.now()
+        last_day = options['day'] or to_local_date(current_time) - timedelta(days=1)
+        if last_day >= to_local_date(current_time):
+            raise CommandError('Only finished days can be snapshotted.')
+        self.max_gap_days = max(1, options['max_gap_days'])
+
+        days = self.get_days(last_day=last_day)
+        if not days:
+            self.stdout.write('All portfolios are up to date')
+            return
+        first_day = min(portfolio_days[0] for _, portfolio_days in days.values())
+
+        # current holdings are the anchor, the quantities at the end of a day are the holdings minus the
+        # transactions after that day, only transactions after the last snapshots are read
+        holdings = {portfolio_id: {} for portfolio_id in days}
+        for portfolio_id, asset_id, quantity in AssetOwned.objects.filter(portfolio_id__in=days.keys()) \
+                .values_list('portfolio_id', 'asset_id', 'quantity_owned'):
+            holdings[portfolio_id][asset_id] = holdings[portfolio_id].get(asset_id, 0.0) + quantity
+        transactions = {portfolio_id: [] for portfolio_id in days}
+        for portfolio_id, asset_id, tx_amount, target_asset_id, target_amount, tx_date in Transaction.objects.filter(
+                asset__portfolio_id__in=days.keys(), tx_date__gte=get_day_end(first_day - timedelta(days=1))) \
+                .values_list('asset__portfolio_id', 'asset__asset_id', 'tx_amount', 'target_asset_id', 'target_amount',
+                             'tx_date') \
+                .order_by('-tx_date'):
+            if target_asset_id is not None:
+                # manual trade: the (positive) amount of the source asset left the portfolio, the target leg came in
+                transactions[portfolio_id].append((tx_date, asset_id, -abs(tx_amount)))
+                transactions[portfolio_id].append((tx_date, target_asset_id, target_amount or 0.0))
+            else:
+                # signed amounts, imported trades are stored as one transaction per leg
+                transactions[portfolio_id].append((tx_date, asset_id, tx_amount))
+
+        asset_ids = {asset_id for assets in holdings.values() for asset_id in assets}
+        asset_ids.update(asset_id for txs in transactions.values() for _, asset_id, _ in txs)
+        asset_infos = AssetInfo.objects.only('id', 'acronym', 'api_id_name', 'current_price').in_bulk(asset_ids)
+        all_days = sorted({day for _, portfolio_days in days.values() for day in portfolio_days})
+        close_prices = self.get_close_prices(asset_ids=asset_ids, days=all_days) if asset_ids else {}
+
+        snapshots = []
+        missing_prices = set()
+        for portfolio_id, (user_id, portfolio_days) in days.items():
+            quantities = dict(holdings[portfolio_id])
+            txs = iter(transactions[portfolio_id])
+            tx = next(txs, None)
+            # walk backwards from today to the first missing day, undo the transactions of each passed day
+            for day in reversed(portfolio_days):
+                day_end = get_day_end(day)
+                while tx is not None and tx[0] >= day_end:
+                    quantities[tx[1]] = quantities.get(tx[1], 0.0) - tx[2]
+                    tx = next(txs, None)
+
+                breakdown = []
+                for asset_id, quantity in quantities.items():
+                    asset_info = asset_infos.get(asset_id)
+                    if asset_info is None or abs(quantity) < 1e-12:
+                        continue
+                    price = 1.0 if asset_info.api_id_name == 'euro' else close_prices.get((asset_id, day))
+                    if price is None:
+                        # no price tick around that day, the current price is the best estimate
+                        missing_prices.add(asset_info.acronym)
+                        price = asset_info.current_price or 0.0
+                    breakdown.append({'asset_id': asset_id, 'acronym': asset_info.acronym.upper(),
+                                      'quantity': quantity, 'price': price, 'value': quantity * price})
+                breakdown.sort(key=lambda item: item['value'], reverse=True)
+                snapshots.append(PortfolioSnapshot(user_id=user_id, portfolio_id=portfolio_id, day=day,
+                                                   value=sum(item['value'] for item in breakdown),
+                                                   breakdown=breakdown))
+
+        # rows of concurrent runs are skipped, snapshots of a day are never rewritten
+        PortfolioSnapshot.objects.bulk_create(snapshots, batch_size=options['batch_size'], ignore_conflicts=True)
+        if missing_prices:
+            logger.error(f"Snapshot error: no closing prices for {', '.join(sorted(missing_prices))}, "
+                         f"valued with the current price")
+
+        message = (f"Wrote {len(snapshots)} snapshots of {len(days)} portfolios "
+                   f"from {first_day.isoformat()} to {last_day.isoformat()}")
+        self.stdout.write(message)
+        logger.info(message)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kryptotracker", "0011_exchangeapis"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistoricalPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("provider", models.CharField(max_length=50)),
+                ("asset_key", models.CharField(max_length=255)),
+                ("bucket", models.BigIntegerField()),
+                ("price", models.FloatField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("provider", "asset_key", "bucket"),
+                        name="unique_historical_price_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kryptotracker", "0013_ratelimitbucket"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="assetinfo",
+            name="stale_after",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="historicalassetinfo",
+            name="stale_after",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
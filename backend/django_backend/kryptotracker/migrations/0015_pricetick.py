@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# ticks are copied in chunks to keep memory flat on large history tables
+CHUNK_SIZE = 5000
+
+
+def copy_price_history(apps, schema_editor):
+    """Copy the price history of HistoricalAssetInfo to PriceTick, consecutive equal prices are stored once"""
+    AssetInfo = apps.get_model("kryptotracker", "AssetInfo")
+    HistoricalAssetInfo = apps.get_model("kryptotracker", "HistoricalAssetInfo")
+    PriceTick = apps.get_model("kryptotracker", "PriceTick")
+
+    asset_ids = set(AssetInfo.objects.values_list("id", flat=True))
+    last_prices = {}
+    ticks = []
+    history = (
+        HistoricalAssetInfo.objects.filter(current_price__gt=0)
+        .order_by("id", "history_date")
+        .values_list("id", "history_date", "current_price")
+    )
+    for asset_id, history_date, price in history.iterator(chunk_size=CHUNK_SIZE):
+        if asset_id not in asset_ids or last_prices.get(asset_id) == price:
+            continue
+        last_prices[asset_id] = price
+        ticks.append(PriceTick(asset_id=asset_id, ts=int(history_date.timestamp()), price=price))
+        if len(ticks) >= CHUNK_SIZE:
+            PriceTick.objects.bulk_create(ticks, ignore_conflicts=True)
+            ticks = []
+    PriceTick.objects.bulk_create(ticks, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kryptotracker", "0014_assetinfo_stale_after"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceTick",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("ts", models.PositiveIntegerField()),
+                ("price", models.FloatField()),
+                (
+                    "asset",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_ticks",
+                        to="kryptotracker.assetinfo",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("asset", "ts"), name="unique_price_tick_asset_ts"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(copy_price_history, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="historicalassetinfo",
+            name="current_price",
+        ),
+        migrations.RemoveField(
+            model_name="historicalassetinfo",
+            name="image",
+        ),
+        migrations.RemoveField(
+            model_name="historicalassetinfo",
+            name="stale_after",
+        ),
+        migrations.RemoveField(
+            model_name="historicalassetinfo",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="historicalassetowned",
+            name="quantity_price",
+        ),
+        migrations.RemoveField(
+            model_name="historicalassetowned",
+            name="updated_at",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("kryptotracker", "0015_pricetick"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="assetinfo",
+            name="acronym",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="historicalassetinfo",
+            name="acronym",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
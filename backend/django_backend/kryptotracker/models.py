@@ -28,13 +28,15 @@ class Portfolio(models.Model):
 
 
 class AssetInfo(models.Model):
-    history = HistoricalRecords()
+    # price changes are recorded in PriceTick, history only tracks the reference data
+    history = HistoricalRecords(excluded_fields=['current_price', 'image', 'stale_after', 'updated_at'])
 
     fullname = models.CharField(max_length=255, null=False)
     api_id_name = models.CharField(max_length=255, null=False)
-    acronym = models.CharField(max_length=100, null=False)
+    acronym = models.CharField(max_length=100, null=False, db_index=True)
     current_price = models.FloatField(default=0.0, null=True)
     image = models.TextField(null=True, blank=True)
+    stale_after = models.PositiveIntegerField(null=True, blank=True)  # minutes, None uses settings.PRICE_STALE_AFTER
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -43,7 +45,8 @@ class AssetInfo(models.Model):
 
 
 class AssetOwned(models.Model):
-    history = HistoricalRecords()
+    # valuation changes (quantity_price) are derived from PriceTick and not recorded in history
+    history = HistoricalRecords(excluded_fields=['quantity_price', 'updated_at'])
 
     portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE, null=False)
     asset = models.ForeignKey(AssetInfo, on_delete=models.CASCADE, null=False)
@@ -55,6 +58,14 @@ class AssetOwned(models.Model):
     def __str__(self):
         return self.asset.fullname
 
+    def save_valuation(self):
+        """Save a changed quantity_price only, without a history record"""
+        self.skip_history_when_saving = True
+        try:
+            self.save(update_fields=['quantity_price', 'updated_at'])
+        finally:
+            del self.skip_history_when_saving
+
 
 class Comment(models.Model):
     text = models.TextField(null=False)
@@ -84,9 +95,20 @@ class Transaction(models.Model):
     tx_fee = models.FloatField(default=0.0, null=True, blank=True)
     tx_date = models.DateTimeField(null=False)
     status = models.BooleanField(default=False)
+    # target leg of manual trades ("Handel"), the transaction itself is the outgoing source leg. Imported trades are
+    # stored as one signed transaction per leg and leave these empty.
+    target_asset = models.ForeignKey(AssetInfo, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='incoming_trades')
+    target_amount = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=False)
     updated_at = models.DateTimeField(auto_now=True, null=False)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of the transaction list (newest first)
+            models.Index(fields=['user', '-tx_date', '-id'], name='transaction_user_date_id_idx'),
+        ]
+
 
 class TaxReport(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
@@ -107,3 +129,52 @@ class ExchangeAPIs(models.Model):
     exchange_name = models.CharField(max_length=255, null=False)
     created_at = models.DateTimeField(auto_now_add=True, null=False)
     updated_at = models.DateTimeField(auto_now=True, null=False)
+
+
+class HistoricalPrice(models.Model):
+    """Historical EUR price of an asset at one minute, shared by all users and imports."""
+    provider = models.CharField(max_length=50, null=False)
+    asset_key = models.CharField(max_length=255, null=False)  # CoinGecko id or CryptoCompare symbol
+    bucket = models.BigIntegerField(null=False)  # unix timestamp floored to the minute
+    price = models.FloatField(null=False)
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'asset_key', 'bucket'], name='unique_historical_price_bucket'),
+        ]
+
+
+class RateLimitBucket(models.Model):
+    """Token bucket of an external API provider, shared by all workers and management commands."""
+    provider = models.CharField(max_length=50, unique=True, null=False)
+    tokens = models.FloatField(null=False)
+    refilled_at = models.FloatField(null=False)  # unix timestamp of the last refill
+
+
+class PriceTick(models.Model):
+    """EUR price of an asset at one refresh, appended in bulk by every price refresh."""
+    asset = models.ForeignKey(AssetInfo, on_delete=models.CASCADE, null=False, related_name='price_ticks')
+    ts = models.PositiveIntegerField(null=False)  # unix timestamp in seconds
+    price = models.FloatField(null=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['asset', 'ts'], name='unique_price_tick_asset_ts'),
+        ]
+
+
+class PortfolioSnapshot(models.Model):
+    """Value of a portfolio at the end of one day with per-asset breakdown, written by the snapshot_portfolios command."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
+    portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE, null=False, related_name='snapshots')
+    day = models.DateField(null=False)
+    value = models.FloatField(default=0.0, null=False)
+    breakdown = models.JSONField(default=list)  # [{asset_id, acronym, quantity, price, value}]
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+
+    class Meta:
+        constraints = [
+            # also the index of the history range scan (portfolio, day)
+            models.UniqueConstraint(fields=['portfolio', 'day'], name='unique_portfolio_snapshot_day'),
+        ]
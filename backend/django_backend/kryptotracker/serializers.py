@@ -5,7 +5,9 @@ from rest_framework import serializers
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
+from django.db.models import F
 from .models import *
+import pytz
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -152,6 +154,65 @@ class TransactionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class TransactionListSerializer(serializers.BaseSerializer):
+    """Read-only serializer of the transaction list in the shape of the frontend. Works on the rows of project(), asset
+    acronym, type and comment are joined by the database and each date is formatted once without parsing."""
+    # columns of the projection, the joined fields are flattened
+    columns = ('id', 'tx_amount', 'tx_value', 'tx_fee', 'tx_date', 'tx_hash', 'status', 'tx_sender_address',
+               'tx_recipient_address')
+    joined_columns = {
+        'asset_acronym': F('asset__asset__acronym'),
+        'tx_type_name': F('tx_type__type'),
+        'comment_text': F('tx_comment__text'),
+    }
+
+    @classmethod
+    def project(cls, queryset):
+        """Return the queryset as rows (dicts) with the columns the serializer needs"""
+        return queryset.values(*cls.columns, **cls.joined_columns)
+
+    @staticmethod
+    def format_date(value) -> str:
+        """Format a transaction date in UTC e.g. 18.10.2026 12:00"""
+        value = value.astimezone(pytz.UTC)
+        return f"{value.day:02d}.{value.month:02d}.{value.year} {value.hour:02d}:{value.minute:02d}"
+
+    @staticmethod
+    def format_number(value) -> str:
+        """Round to 3 decimals with decimal comma e.g. 0,125"""
+        return str(round(value, 3)).replace('.', ',')
+
+    def to_representation(self, row):
+        format_number = self.format_number
+        return {
+            'tx_id': row['id'],
+            'tx_type': row['tx_type_name'],
+            'asset': row['asset_acronym'].upper(),
+            'tx_amount': format_number(row['tx_amount']),
+            'tx_value': format_number(row['tx_value']),
+            'tx_fee': format_number(row['tx_fee']),
+            'tx_date': self.format_date(row['tx_date']),
+            'tx_hash': row['tx_hash'],
+            'tx_status': 'Abgeschlossen' if row['status'] else 'In Bearbeitung',
+            'tx_sender_address': row['tx_sender_address'],
+            'tx_recipient_address': row['tx_recipient_address'],
+            'tx_comment': row['comment_text'] or '',
+        }
+
+
+class DashboardTransactionSerializer(TransactionListSerializer):
+    """Read-only serializer of the last transactions on the dashboard, rows of TransactionListSerializer.project()."""
+
+    def to_representation(self, row):
+        return {
+            'tx_date': self.format_date(row['tx_date']),
+            'tx_amount': row['tx_amount'],
+            'tx_value': row['tx_value'],
+            'tx_type': row['tx_type_name'],
+            'asset': row['asset_acronym'].upper()
+        }
+
+
 class TransactionCreateSerializer(serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())  # Setzt den aktuellen User automatisch
 
@@ -0,0 +1,40 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from kryptotracker.models import AssetInfo, AssetOwned, Portfolio, TaxReport, Transaction
+from kryptotracker.utils import asset_resolver, dashboard_snapshot
+
+# AssetInfo fields the acronym index of the asset resolver is built from
+RESOLVER_FIELDS = {'acronym', 'api_id_name'}
+
+
+@receiver(post_save, sender=AssetInfo)
+def invalidate_asset_resolver_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the acronym index if an AssetInfo was created or its acronym/api id may have changed"""
+    if created or update_fields is None or RESOLVER_FIELDS.intersection(update_fields):
+        asset_resolver.resolver.invalidate()
+
+
+@receiver(post_delete, sender=AssetInfo)
+def invalidate_asset_resolver_on_delete(sender, instance, **kwargs):
+    """Rebuild the acronym index after an AssetInfo was deleted"""
+    asset_resolver.resolver.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=Portfolio)
+@receiver([post_save, post_delete], sender=TaxReport)
+def invalidate_dashboard_snapshot(sender, instance, **kwargs):
+    """Invalidate the dashboard snapshot and ETags of the user a transaction, portfolio or tax report belongs to"""
+    dashboard_snapshot.invalidate_data(user_ids=[instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=AssetOwned)
+def invalidate_dashboard_snapshot_on_asset_owned(sender, instance, **kwargs):
+    """Invalidate the dashboard snapshot and ETags of the owner of the asset's portfolio"""
+    if AssetOwned.portfolio.is_cached(instance):
+        dashboard_snapshot.invalidate_data(user_ids=[instance.portfolio.user_id])
+    else:
+        # the owner is looked up when the invalidation runs, once for all portfolios of a deferred block
+        dashboard_snapshot.invalidate_data(portfolio_ids=[instance.portfolio_id])
@@ -1,3 +1,678 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from datetime import datetime, time, timedelta
+from io import StringIO
+from pathlib import Path
+import pandas as pd
+import urllib3
+from unittest import mock
+from . import views
+from .models import PortfolioType, Portfolio, AssetInfo, AssetOwned, TransactionType, Transaction, PriceTick, \
+    PortfolioSnapshot
+from .utils import asset_resolver, circuit_breaker, coinmarketcap, conversion, crypto_data, dashboard_snapshot, \
+    http_client, kraken_assets, price_cache, price_engine, price_store, providers, rate_limiter, trends
 
 # Create your tests here.
+
+
+@override_settings(PRICE_REFRESH_MODE='daemon')
+class DashboardTestCase(TestCase):
+    """Base class with a user, portfolio types and helpers to fill and load the dashboard."""
+
+    # auth token, token lookup, portfolios, owned assets, price ticks of assets without cached trends, transaction
+    # aggregate, last five transactions, tax reports
+    EXPECTED_QUERIES = 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='dashboard', password='Test123')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.spot = PortfolioType.objects.create(type='Spot')
+        cls.staking = PortfolioType.objects.create(type='Staking')
+        cls.tx_type = TransactionType.objects.create(type='Kaufen')
+
+    def setUp(self):
+        dashboard_snapshot.get_cache().clear()
+        price_cache.clear()
+
+    def add_holdings(self, portfolios: int, assets: int):
+        """Create portfolios with assets and one transaction per asset, all valued with their current price"""
+        for i in range(portfolios):
+            portfolio = Portfolio.objects.create(user=self.user, name=f'Portfolio {Portfolio.objects.count()}',
+                                                 portfolio_type=self.spot if i % 2 == 0 else self.staking)
+            for j in range(assets):
+                asset_info = AssetInfo.objects.create(fullname=f'Coin {portfolio.pk}-{j}',
+                                                      api_id_name=f'coin-{portfolio.pk}-{j}',
+                                                      acronym=f'c{portfolio.pk}{j}', current_price=2.0)
+                owned = AssetOwned.objects.create(portfolio=portfolio, asset=asset_info, quantity_owned=3.0,
+                                                  quantity_price=6.0)
+                portfolio.balance += owned.quantity_price
+                Transaction.objects.create(user=self.user, asset=owned, tx_type=self.tx_type, tx_amount=3.0,
+                                           tx_value=6.0, tx_date=timezone.now())
+            portfolio.save()
+
+    def get_dashboard(self, **headers):
+        return self.client.get('/api/dashboard/', HTTP_AUTHORIZATION=f'Token {self.token.key}', **headers)
+
+
+class DashboardQueryCountTest(DashboardTestCase):
+    """The dashboard is built from a fixed number of queries, independent of portfolio size."""
+
+    def test_query_count_is_fixed(self):
+        self.add_holdings(portfolios=2, assets=2)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.get_dashboard()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['transactions'], {'count': 4, 'with_coins': 4})
+
+        self.add_holdings(portfolios=4, assets=5)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.get_dashboard()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['portfolios_data']), 6)
+        self.assertEqual(len(response.data['last_five_transactions']), 5)
+        self.assertAlmostEqual(response.data['sum_balance'], 24 * 6.0)
+
+    def test_read_has_no_side_effects(self):
+        self.add_holdings(portfolios=1, assets=2)
+        owned = AssetOwned.objects.select_related('asset').order_by('pk')
+        AssetInfo.objects.filter(pk=owned[0].asset_id).update(current_price=4.0)
+        AssetInfo.objects.filter(pk=owned[1].asset_id).update(current_price=0.001)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.get_dashboard()
+        self.assertEqual(response.status_code, 200)
+        # valued with the current price, dust is hidden but neither deleted nor saved
+        self.assertAlmostEqual(response.data['sum_balance'], 12.0)
+        self.assertEqual(AssetOwned.objects.count(), 2)
+        self.assertEqual(list(owned.values_list('quantity_price', flat=True)), [6.0, 6.0])
+
+
+class DashboardSnapshotTest(DashboardTestCase):
+    """Repeat dashboard loads are served from the snapshot until a write of the user invalidates it."""
+
+    # auth token, token lookup
+    SNAPSHOT_QUERIES = 2
+
+    def test_repeat_load_is_served_from_snapshot(self):
+        self.add_holdings(portfolios=2, assets=2)
+        response = self.get_dashboard()
+        with self.assertNumQueries(self.SNAPSHOT_QUERIES):
+            cached = self.get_dashboard()
+        self.assertEqual(cached.data['sum_balance'], response.data['sum_balance'])
+        self.assertEqual(cached.data['last_five_transactions'], response.data['last_five_transactions'])
+
+    def test_writes_invalidate_snapshot(self):
+        self.add_holdings(portfolios=1, assets=1)
+        self.get_dashboard()
+        portfolio = Portfolio.objects.get(user=self.user)
+        portfolio.name = 'Umbenannt'
+        portfolio.save()
+        # rebuilt without the price tick query, the trends are cached since the first load
+        with self.assertNumQueries(self.EXPECTED_QUERIES - 1):
+            response = self.get_dashboard()
+        self.assertEqual(response.data['portfolios_data'][0]['name'], 'Umbenannt')
+
+        AssetOwned.objects.filter(portfolio=portfolio).delete()
+        response = self.get_dashboard()
+        self.assertEqual(response.data['transactions'], {'count': 0, 'with_coins': 0})
+
+    def test_deferred_invalidation(self):
+        self.add_holdings(portfolios=1, assets=1)
+        owned = AssetOwned.objects.get(portfolio__user=self.user)
+        with mock.patch.object(dashboard_snapshot, 'invalidate') as invalidate:
+            with dashboard_snapshot.deferred_invalidation():
+                self.add_holdings(portfolios=2, assets=3)
+                # update and history row, the owner of rows loaded without their portfolio is looked up at the end
+                with self.assertNumQueries(2):
+                    owned.save()
+                invalidate.assert_not_called()
+        invalidate.assert_called_once_with(user_ids={self.user.pk})
+
+    def test_dust_is_not_counted(self):
+        self.add_holdings(portfolios=1, assets=2)
+        AssetOwned.objects.filter(pk=AssetOwned.objects.order_by('pk').first().pk).update(quantity_owned=0.001)
+        dashboard_snapshot.invalidate(user_ids=[self.user.pk])
+        response = self.get_dashboard()
+        self.assertEqual(len(response.data['portfolios_data'][0]['currencies']), 1)
+        self.assertEqual(response.data['transactions'], {'count': 2, 'with_coins': 1})
+
+    def test_price_ticks_patch_snapshot(self):
+        self.add_holdings(portfolios=1, assets=2)
+        self.get_dashboard()
+        asset_info = AssetInfo.objects.filter(assetowned__portfolio__user=self.user).order_by('pk').first()
+        asset_info.current_price = 5.0
+        AssetInfo.objects.filter(pk=asset_info.pk).update(current_price=5.0)
+        self.assertEqual(dashboard_snapshot.apply_price_ticks(asset_infos=[asset_info]), 1)
+        with self.assertNumQueries(self.SNAPSHOT_QUERIES):
+            response = self.get_dashboard()
+        self.assertAlmostEqual(response.data['sum_balance'], 15.0 + 6.0)
+
+
+class ConditionalGetTest(DashboardTestCase):
+    """Polling with If-None-Match is answered with 304 until the user's data or held prices change."""
+
+    def test_not_modified_until_change(self):
+        self.add_holdings(portfolios=1, assets=1)
+        etag = self.get_dashboard()['ETag']
+        # only the authentication query, the view does not run
+        with self.assertNumQueries(1):
+            response = self.get_dashboard(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # a price refresh of a held asset changes the ETag
+        dashboard_snapshot.apply_price_ticks(asset_infos=AssetInfo.objects.all())
+        response = self.get_dashboard(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # a new transaction changes the ETag of the transaction list
+        etag = self.client.get('/api/transaction/', HTTP_AUTHORIZATION=f'Token {self.token.key}')['ETag']
+        self.add_holdings(portfolios=1, assets=1)
+        response = self.client.get('/api/transaction/', HTTP_AUTHORIZATION=f'Token {self.token.key}',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class TransactionPaginationTest(DashboardTestCase):
+    """The transaction list is paginated with a (tx_date, id) cursor, each page costs the same queries."""
+
+    # auth token, token lookup, one page
+    PAGE_QUERIES = 3
+
+    def get_transactions(self, **params):
+        return self.client.get('/api/transaction/', params, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_pages_cover_all_transactions(self):
+        self.add_holdings(portfolios=2, assets=4)
+        # equal dates are ordered by id
+        Transaction.objects.filter(pk__in=Transaction.objects.order_by('pk')[:3]).update(tx_date=timezone.now())
+
+        ids = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(self.PAGE_QUERIES):
+                response = self.get_transactions(limit=3, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            ids += [tx['tx_id'] for tx in response.data['transactions']]
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+        expected = list(Transaction.objects.order_by('-tx_date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_filters(self):
+        self.add_holdings(portfolios=2, assets=2)
+        portfolio = Portfolio.objects.order_by('pk').first()
+        response = self.get_transactions(portfolio=portfolio.pk, type='Kaufen', status=0)
+        self.assertEqual(len(response.data['transactions']), 2)
+        acronym = AssetOwned.objects.filter(portfolio=portfolio).first().asset.acronym
+        self.assertEqual(len(self.get_transactions(asset=acronym.upper()).data['transactions']), 1)
+        self.assertEqual(len(self.get_transactions(**{'from': '2000-01-01', 'to': '2000-12-31'}).data['transactions']), 0)
+        self.assertEqual(self.get_transactions(cursor='invalid').status_code, 400)
+
+
+class BulkTransactionTest(DashboardTestCase):
+    """Lists of transactions are created in one database transaction, invalid entries are reported by index."""
+
+    def post_transactions(self, items):
+        return self.client.post('/api/transaction/bulk/', items, content_type='application/json',
+                                HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_bulk_create(self):
+        portfolio = Portfolio.objects.create(user=self.user, name='Bulk', portfolio_type=self.spot)
+        coin = AssetInfo.objects.create(fullname='Coin', api_id_name='coin', acronym='coin', current_price=2.0)
+        euro = AssetInfo.objects.create(fullname='Euro', api_id_name='euro', acronym='eur', current_price=1.0)
+        sell = TransactionType.objects.create(type='Verkaufen')
+        trade = TransactionType.objects.create(type='Handel')
+        price_store.store_prices(provider=price_store.PROVIDER_COINGECKO, asset_key='coin',
+                                 prices={price_store.to_bucket('2026-01-01T12:00'): 1.5})
+        item = {'portfolio': portfolio.pk, 'assetId': coin.pk, 'transactionType': self.tx_type.pk,
+                'transactionDate': '2026-01-01T12:00', 'amount': 4, 'price': None, 'comment': 'Sparplan'}
+
+        response = self.post_transactions([
+            item,
+            {**item, 'transactionType': sell.pk, 'amount': 1, 'comment': ''},
+            {**item, 'transactionType': trade.pk, 'targetAssetId': euro.pk, 'amount': 1},
+            {**item, 'assetId': 0},
+            {**item, 'transactionDate': '01.01.2026'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], [0, 1, 2])
+        self.assertEqual([error['index'] for error in response.data['errors']], [3, 4])
+
+        holdings = {owned.asset_id: owned.quantity_owned for owned in AssetOwned.objects.filter(portfolio=portfolio)}
+        self.assertEqual(holdings, {coin.pk: 2.0, euro.pk: 2.0})
+        portfolio.refresh_from_db()
+        self.assertEqual(portfolio.balance, 6.0)
+        self.assertEqual(sorted(Transaction.objects.filter(user=self.user).values_list('tx_amount', 'tx_value')),
+                         [(-1.0, 1.5), (1.0, 1.5), (4.0, 6.0)])
+        self.assertEqual(Transaction.objects.filter(tx_comment__text='Sparplan').count(), 2)
+        self.assertEqual(AssetOwned.history.filter(portfolio=portfolio).count(), 2)
+
+        # existing holdings are updated
+        self.assertEqual(self.post_transactions([{**item, 'comment': ''}]).status_code, 201)
+        self.assertEqual(AssetOwned.objects.get(portfolio=portfolio, asset=coin).quantity_owned, 6.0)
+        self.assertEqual(AssetOwned.history.filter(portfolio=portfolio).count(), 3)
+
+        self.assertEqual(self.post_transactions([{**item, 'assetId': 0}]).status_code, 400)
+        self.assertEqual(self.post_transactions({'amount': 1}).status_code, 400)
+
+        # non-finite amounts and negative prices or fees are rejected per entry
+        response = self.post_transactions([{**item, 'amount': 'NaN'}, {**item, 'amount': 'inf'},
+                                           {**item, 'price': -1}, {**item, 'transactionFee': '-0.5'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1, 2, 3])
+
+    def test_concurrent_balance_change(self):
+        portfolio = Portfolio.objects.create(user=self.user, name='Bulk', portfolio_type=self.spot, balance=10.0)
+        coin = AssetInfo.objects.create(fullname='Coin', api_id_name='coin', acronym='coin', current_price=2.0)
+        price_store.store_prices(provider=price_store.PROVIDER_COINGECKO, asset_key='coin',
+                                 prices={price_store.to_bucket('2026-01-01T12:00'): 1.5})
+        resolve_prices = views.TransactionBulkAPIView.resolve_prices
+
+        def change_balance(view, parsed, errors):
+            # another request changes the balance after the portfolio was read for the validation
+            Portfolio.objects.filter(pk=portfolio.pk).update(balance=F('balance') + 5.0)
+            resolve_prices(view, parsed, errors)
+
+        with mock.patch.object(views.TransactionBulkAPIView, 'resolve_prices', change_balance):
+            response = self.post_transactions([{'portfolio': portfolio.pk, 'assetId': coin.pk,
+                                                'transactionType': self.tx_type.pk,
+                                                'transactionDate': '2026-01-01T12:00', 'amount': 4}])
+        self.assertEqual(response.status_code, 201)
+        portfolio.refresh_from_db()
+        self.assertEqual(portfolio.balance, 10.0 + 5.0 + 8.0)
+
+
+class PortfolioHistoryTest(DashboardTestCase):
+    """Daily snapshots are rolled back from the current holdings, trades move value between assets of a day."""
+
+    def test_snapshots_with_trades(self):
+        today = timezone.now().date()
+        days = [today - timedelta(days=i) for i in (3, 2, 1)]
+        portfolio = Portfolio.objects.create(user=self.user, name='History', portfolio_type=self.spot)
+        Portfolio.objects.filter(pk=portfolio.pk).update(created_at=datetime.combine(days[0], time(8)))
+        coin = AssetInfo.objects.create(fullname='Coin', api_id_name='coin', acronym='coin', current_price=2.0)
+        euro = AssetInfo.objects.create(fullname='Euro', api_id_name='euro', acronym='eur', current_price=1.0)
+        coin_owned = AssetOwned.objects.create(portfolio=portfolio, asset=coin, quantity_owned=2.0)
+        euro_owned = AssetOwned.objects.create(portfolio=portfolio, asset=euro, quantity_owned=10.0)
+        PriceTick.objects.bulk_create([PriceTick(asset=coin, ts=int(datetime.combine(day, time(12)).timestamp()),
+                                                 price=2.0) for day in days])
+        trade = TransactionType.objects.create(type='Handel')
+        # imported trade: one signed transaction per leg (bought 1 coin for 2 euro)
+        for owned, amount in ((coin_owned, 1.0), (euro_owned, -2.0)):
+            Transaction.objects.create(user=self.user, asset=owned, tx_type=trade, tx_amount=amount, tx_value=2.0,
+                                       tx_date=datetime.combine(days[1], time(12)))
+        # manual trade: the source leg with the target leg (sold 1 coin for 2 euro)
+        Transaction.objects.create(user=self.user, asset=coin_owned, tx_type=trade, tx_amount=1.0, tx_value=2.0,
+                                   target_asset=euro, target_amount=2.0, tx_date=datetime.combine(days[2], time(12)))
+
+        call_command('snapshot_portfolios', stdout=StringIO())
+        quantities = {snapshot.day: {item['acronym']: item['quantity'] for item in snapshot.breakdown}
+                      for snapshot in PortfolioSnapshot.objects.filter(portfolio=portfolio)}
+        self.assertEqual(quantities, {days[0]: {'COIN': 2.0, 'EUR': 10.0}, days[1]: {'COIN': 3.0, 'EUR': 8.0},
+                                      days[2]: {'COIN': 2.0, 'EUR': 10.0}})
+        # snapshots of a day are never written twice
+        call_command('snapshot_portfolios', stdout=StringIO())
+        self.assertEqual(PortfolioSnapshot.objects.filter(portfolio=portfolio).count(), 3)
+
+        response = self.client.get(f'/api/portfolio/{portfolio.pk}/history/', {'range': '7d'},
+                                   HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['history'], [{'day': day.strftime('%d.%m.%Y'), 'value': 14.0} for day in days])
+        response = self.client.get(f'/api/portfolio/{portfolio.pk}/history/',
+                                   {'from': days[1].isoformat(), 'to': days[1].isoformat(), 'breakdown': 1},
+                                   HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual([item['quantity'] for item in response.data['history'][0]['breakdown']], [8.0, 3.0])
+        self.assertEqual(self.client.get(f'/api/portfolio/{portfolio.pk}/history/', {'range': '2w'},
+                                         HTTP_AUTHORIZATION=f'Token {self.token.key}').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/portfolio/{portfolio.pk + 1}/history/',
+                                         HTTP_AUTHORIZATION=f'Token {self.token.key}').status_code, 404)
+
+
+class TrendTest(DashboardTestCase):
+    """Trends are calculated from the stored price ticks without upstream requests."""
+
+    def test_trends_from_price_ticks(self):
+        self.add_holdings(portfolios=1, assets=2)
+        with_history, without_history = AssetInfo.objects.order_by('pk')
+        now = timezone.now()
+        PriceTick.objects.bulk_create([
+            PriceTick(asset=with_history, ts=int((now - timedelta(days=7, hours=1)).timestamp()), price=1.0),
+            PriceTick(asset=with_history, ts=int((now - timedelta(hours=24, minutes=30)).timestamp()), price=2.5),
+        ])
+        result = trends.get_trends(asset_infos=[with_history, without_history], current_time=now)
+        self.assertEqual(result[with_history.pk], {'24h': -20.0, '7d': 100.0})
+        self.assertEqual(result[without_history.pk], {'24h': None, '7d': None})
+
+        # trends are cached, the dashboard shows them without calculating again
+        currencies = self.get_dashboard().data['portfolios_data'][0]['currencies']
+        self.assertEqual([currency['trend'] for currency in currencies], ['-20.00%', 'k. A.'])
+
+
+@override_settings(CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 2, 'FAILURE_WINDOW': 60, 'RESET_TIMEOUT': 0},
+                   HTTP_CLIENT={'BACKEND': 'live'})
+class CircuitBreakerTest(SimpleTestCase):
+    """Circuit breakers open after repeated failures and close after a successful half-open trial."""
+
+    def setUp(self):
+        circuit_breaker._breakers.clear()
+
+    def tearDown(self):
+        # breakers are global per worker, open circuits must not leak into other tests
+        circuit_breaker._breakers.clear()
+
+    def test_state_changes(self):
+        breaker = circuit_breaker.get_breaker('test')
+        breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+
+        # reset timeout is over: one trial passes, its failure opens the circuit again
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, circuit_breaker.HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, circuit_breaker.CLOSED)
+        self.assertTrue(breaker.allow_request())
+
+    def test_trial_aborted_by_rate_limiter(self):
+        breaker = circuit_breaker.get_breaker('coingecko')
+        breaker.record_failure()
+        breaker.record_failure()
+        with mock.patch.object(http_client.rate_limiter, 'is_limited', return_value=True), \
+                mock.patch.object(http_client.rate_limiter, 'acquire', return_value=False), \
+                mock.patch.object(http_client, 'get_session') as get_session:
+            with self.assertRaises(http_client.RateLimitExceeded):
+                http_client.get('https://api.coingecko.com/api/v3/ping')
+            get_session.assert_not_called()
+
+        # the skipped request did not take the trial
+        self.assertEqual(breaker.state, circuit_breaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+
+
+class KrakenAssetNormalizerTest(SimpleTestCase):
+    """Kraken asset codes are mapped to acronyms without touching digits or prefixes that belong to the ticker."""
+
+    def setUp(self):
+        self.normalizer = kraken_assets.KrakenAssetNormalizer(overrides={'XBT': 'BTC', 'ETH2': 'ETH'})
+
+    def test_earn_variants(self):
+        for symbol, expected in (('DOT.S', 'DOT'), ('DOT28.S', 'DOT'), ('ATOM.21.S', 'ATOM'), ('KSM07.S', 'KSM'),
+                                 ('USDC.M', 'USDC'), ('XBT.M', 'BTC'), ('ETH2.S', 'ETH'), ('C98.S', 'C98'),
+                                 ('API3.S', 'API3'), ('1INCH.S', '1INCH')):
+            self.assertEqual(self.normalizer.normalize_symbol(symbol), expected, symbol)
+        self.assertTrue(self.normalizer.is_earn_variant('ADA.S'))
+        self.assertFalse(self.normalizer.is_earn_variant('ADA'))
+
+    def test_legacy_codes(self):
+        for symbol, expected in (('XXBT', 'BTC'), ('XETH', 'ETH'), ('ZEUR', 'EUR'), ('XION', 'XION'),
+                                 ('ZORA', 'ZORA'), ('ZETA', 'ZETA'), ('XCAD', 'XCAD'), ('xeth', 'ETH')):
+            self.assertEqual(self.normalizer.normalize_symbol(symbol), expected, symbol)
+
+    def test_normalize_series(self):
+        series = pd.Series(['XXBT', None, 'DOT28.S', 'XXBT'])
+        self.assertEqual(self.normalizer.normalize(series).tolist()[2:], ['DOT', 'BTC'])
+        self.assertTrue(pd.isna(self.normalizer.normalize(series)[1]))
+
+
+@override_settings(RATE_LIMITS={'test': {'rate': 0.001, 'capacity': 1}})
+class RateLimiterTest(TestCase):
+    """Request threads fail fast on an empty budget, retries are taken from the budget like first attempts."""
+
+    def setUp(self):
+        rate_limiter._empty_until.clear()
+
+    def test_request_threads_fail_fast(self):
+        self.assertTrue(rate_limiter.acquire(provider='test'))
+        self.assertFalse(rate_limiter.acquire(provider='test'))
+        # the empty bucket is known in this process, no further row lock is taken
+        with self.assertNumQueries(0):
+            self.assertFalse(rate_limiter.acquire(provider='test'))
+
+    def test_retries_take_budget(self):
+        retry = http_client.BudgetRetry(total=3, provider='test')
+        error = urllib3.exceptions.ConnectTimeoutError()
+        retry = retry.increment(method='GET', url='/', error=error)
+        self.assertEqual(retry.provider, 'test')
+        with self.assertRaises(http_client.RateLimitExceeded):
+            retry.increment(method='GET', url='/', error=error)
+
+    def test_timeout_reaches_engine_threads(self):
+        def fetch_batch(keys):
+            return {key: rate_limiter.get_acquire_timeout() for key in keys}
+
+        with rate_limiter.acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT):
+            data = price_engine.engine.fetch_many(namespace='test-timeout', keys=['a'], fetch_batch=fetch_batch)
+        self.assertEqual(data, {'a': rate_limiter.DEFAULT_ACQUIRE_TIMEOUT})
+        # request threads fail fast again after the block
+        self.assertEqual(rate_limiter.get_acquire_timeout(), 0)
+        self.assertEqual(price_engine.engine.fetch_many(namespace='test-timeout', keys=['b'], fetch_batch=fetch_batch),
+                         {'b': 0})
+
+
+@override_settings(RATE_LIMITS={'coingecko': {'rate': 20, 'capacity': 1}}, HTTP_CLIENT={'BACKEND': 'live'})
+class ImportRateLimitTest(DashboardTestCase):
+    """Imports wait for an empty provider budget instead of storing transactions without price."""
+
+    def setUp(self):
+        super().setUp()
+        rate_limiter._empty_until.clear()
+        circuit_breaker._breakers.clear()
+        TransactionType.objects.create(type='Reward')
+        AssetInfo.objects.create(fullname='Ethereum', api_id_name='ethereum', acronym='eth', current_price=2000.0)
+
+    def tearDown(self):
+        circuit_breaker._breakers.clear()
+
+    def test_kiln_import_waits_for_budget(self):
+        csv_file = SimpleUploadedFile('kiln.csv', b'Date,Rewards (in ETH),Balance (in ETH),Reward rate\n'
+                                                  b'2024-01-01 12:00:00,0.01,32.01,3.5\n'
+                                                  b'2024-01-02 12:00:00,0.01,32.02,3.5\n')
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'prices': [[price_store.to_bucket(tx_date) * 1000, 2000.0]
+                                                 for tx_date in ('2024-01-01T12:00', '2024-01-02T12:00')]}
+        # another request took the whole budget
+        self.assertTrue(rate_limiter.acquire(provider='coingecko'))
+        with mock.patch.object(http_client, 'get_session') as get_session, \
+                mock.patch.object(dashboard_snapshot, 'invalidate') as invalidate:
+            get_session.return_value.request.return_value = response
+            result = self.client.post('/api/file-import-kiln/', {'csvFile': csv_file},
+                                      HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(result.status_code, 200)
+        # the import invalidates the dashboard once, not once per saved row
+        invalidate.assert_called_once_with(user_ids={self.user.pk})
+        get_session.return_value.request.assert_called_once()
+        self.assertEqual(list(Transaction.objects.filter(user=self.user).values_list('tx_value', 'status')),
+                         [(20.0, True), (20.0, True)])
+
+
+class CoinMarketCapTest(TestCase):
+    """Coin pages are parsed from their embedded page state, USD prices are converted with the tether price."""
+
+    pages_dir = Path(__file__).parent / 'management' / 'commands' / 'coinmarketcap_pages'
+
+    def get_page(self, url, **kwargs):
+        slug = url.rstrip('/').rsplit('/', 1)[-1]
+        return mock.Mock(text=(self.pages_dir / f'{slug}.html').read_text(encoding='utf-8'))
+
+    def test_parse_fixture_pages(self):
+        pages = {page.stem: coinmarketcap.parse_coin_page(page.read_text(encoding='utf-8'))
+                 for page in self.pages_dir.glob('*.html')}
+        self.assertEqual(pages['bitcoin'], {'price': 67012.35, 'currency': 'USD', 'name': 'Bitcoin', 'symbol': 'BTC',
+                                            'image': 'https://s2.coinmarketcap.com/static/img/coins/64x64/1.png'})
+        self.assertEqual((pages['ethereum-pow']['symbol'], pages['ethereum-pow']['price']), ('ETHW', 3.4127))
+        self.assertIsNone(coinmarketcap.parse_coin_page('<html></html>'))
+
+    def test_usd_prices_converted_with_tether(self):
+        AssetInfo.objects.create(fullname='Tether', api_id_name='tether', acronym='usdt', current_price=0.9)
+        with mock.patch.object(providers.http_client, 'get', side_effect=self.get_page):
+            data = providers.CoinMarketCapProvider().current_prices(asset_keys=['bitcoin', 'ethereum-pow'])
+        self.assertAlmostEqual(data['bitcoin']['current_price'], 67012.35 * 0.9)
+        self.assertEqual(data['ethereum-pow']['acronym'], 'ETHW')
+
+    def test_missing_usd_rate(self):
+        # fresh database: no tether price, the rate is requested once from CoinGecko
+        with mock.patch.object(providers.http_client, 'get', side_effect=self.get_page), \
+                mock.patch.object(providers.CoinGeckoProvider, 'simple_price', return_value=0.92) as simple_price:
+            data = providers.CoinMarketCapProvider().current_prices(asset_keys=['bitcoin', 'ethereum-pow'])
+        simple_price.assert_called_once()
+        self.assertAlmostEqual(data['bitcoin']['current_price'], 67012.35 * 0.92)
+
+        with mock.patch.object(providers.http_client, 'get', side_effect=self.get_page), \
+                mock.patch.object(providers.CoinGeckoProvider, 'simple_price', return_value=None), \
+                self.assertLogs('kryptotracker.utils.providers', level='ERROR') as logs:
+            data = providers.CoinMarketCapProvider().current_prices(asset_keys=['bitcoin', 'ethereum-pow'])
+        self.assertEqual(data, {})
+        self.assertIn('bitcoin, ethereum-pow not updated', logs.output[-1])
+
+
+class HistoricalPricePrefetchTest(TestCase):
+    """Transactions get the price of the nearest market chart point within COINGECKO_RANGE_MAX_DISTANCE."""
+
+    def setUp(self):
+        price_cache.clear()
+
+    def chart(self, *dates):
+        return [[price_store.to_bucket(tx_date) * 1000, float(i + 1)] for i, tx_date in enumerate(dates)]
+
+    def test_nearest_price(self):
+        points = self.chart('2024-01-01T12:00', '2024-01-01T15:00', '2024-01-01T16:00', '2024-01-01T18:00')
+        tx_dates = ['2024-01-01T12:00', '2024-01-01T15:10', '2024-01-01T17:50', '2024-01-01T17:00',
+                    '2024-01-01T19:30', '2024-01-03T12:00']
+        with mock.patch.object(crypto_data, 'get_price_range_coingecko', return_value=points) as price_range:
+            prices = crypto_data.prefetch_historical_prices({'bitcoin': tx_dates})
+        price_range.assert_called_once()
+        self.assertEqual(prices, {
+            ('bitcoin', '2024-01-01T12:00'): 1.0,  # exact hit
+            ('bitcoin', '2024-01-01T15:10'): 2.0,  # nearest before
+            ('bitcoin', '2024-01-01T17:50'): 4.0,  # nearest after
+            ('bitcoin', '2024-01-01T17:00'): 3.0,  # equal distance takes the point before
+        })
+
+        # resolved prices are stored, only the dates out of tolerance are requested again
+        with mock.patch.object(crypto_data, 'get_price_range_coingecko', return_value=None) as price_range:
+            self.assertEqual(crypto_data.prefetch_historical_prices({'bitcoin': tx_dates}), prices)
+        start, end = price_store.to_bucket('2024-01-01T19:30'), price_store.to_bucket('2024-01-03T12:00')
+        max_distance = int(crypto_data.COINGECKO_RANGE_MAX_DISTANCE.total_seconds())
+        price_range.assert_called_once_with(crypto_id='bitcoin', start_timestamp=start - max_distance,
+                                            end_timestamp=end + max_distance)
+
+    def test_euro_and_failed_requests(self):
+        with mock.patch.object(crypto_data, 'get_price_range_coingecko', return_value=None) as price_range:
+            prices = crypto_data.prefetch_historical_prices({'euro': ['2024-01-01T12:00'],
+                                                             'bitcoin': ['2024-01-01T12:00']})
+        self.assertEqual(prices, {})
+        price_range.assert_called_once()
+
+
+class CoinPairsTest(TestCase):
+    """Kraken pair metadata is returned under the pair names of the trades, whether cached or fetched."""
+
+    def setUp(self):
+        price_cache.clear()
+
+    def test_requested_pair_names(self):
+        dataframe = pd.DataFrame({'pair': ['XBTEUR', 'ADAEUR', 'XBTEUR']})
+        metadata = {'XXBTZEUR': {'altname': 'XBTEUR', 'wsname': 'XBT/EUR'},
+                    'ADAEUR': {'altname': 'ADAEUR', 'wsname': 'ADA/EUR'}}
+        with mock.patch.object(crypto_data.providers, 'get_provider') as get_provider:
+            get_provider.return_value.pair_metadata.return_value = metadata
+            fetched = crypto_data.get_coin_pairs(dataframe=dataframe)
+            cached = crypto_data.get_coin_pairs(dataframe=dataframe)
+        get_provider.return_value.pair_metadata.assert_called_once()
+        self.assertEqual(fetched, {'XBTEUR': metadata['XXBTZEUR'], 'ADAEUR': metadata['ADAEUR']})
+        self.assertEqual(cached, fetched)
+
+
+class ConversionTest(TestCase):
+    """Trade amounts are converted with the rate matrix, refreshed prices replace the rates of their assets."""
+
+    def setUp(self):
+        price_cache.clear()
+        conversion.clear_rates()
+
+    def test_refresh_evicts_rates(self):
+        coin = AssetInfo.objects.create(fullname='Coin', api_id_name='coin', acronym='coin', current_price=2.0)
+        euro = AssetInfo.objects.create(fullname='Euro', api_id_name='euro', acronym='eur', current_price=1.0)
+        self.assertEqual(conversion.convert_amount(base_asset=coin, target_asset=euro, amount=3), 6.0)
+
+        with mock.patch.object(crypto_data.price_engine.engine, 'fetch_many',
+                               return_value={'coin': {'current_price': 4.0, 'image': ''}}):
+            crypto_data.refresh_asset_infos(asset_infos=[coin], force=True)
+        self.assertEqual(conversion.convert_amount(base_asset=coin, target_asset=euro, amount=3), 12.0)
+        self.assertEqual(conversion.convert_amount(base_asset=euro, target_asset=coin, amount=12), 3.0)
+
+
+class AssetResolverTest(TestCase):
+    """Ambiguous acronyms resolve to the coin with the best market cap rank, AssetInfo changes rebuild the index."""
+
+    def setUp(self):
+        price_cache.clear()
+        patcher = mock.patch.object(asset_resolver, 'load_market_cap_ranks',
+                                    return_value={'ethereum': 2, 'ethereum-fork': 900})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # resolver of another worker, it reads the version of the index on every lookup
+        self.resolver = asset_resolver.AssetResolver()
+        self.resolver.version_check_interval = 0
+        self.fork = AssetInfo.objects.create(fullname='Ethereum Fork', api_id_name='ethereum-fork', acronym='eth')
+        self.unranked = AssetInfo.objects.create(fullname='Ether Token', api_id_name='ether-token', acronym='ETH')
+        self.ethereum = AssetInfo.objects.create(fullname='Ethereum', api_id_name='ethereum', acronym='eth')
+        self.euro = AssetInfo.objects.create(fullname='Euro', api_id_name='euro', acronym='eur')
+        AssetInfo.objects.create(fullname='Euro Token', api_id_name='euro-token', acronym='EUR')
+
+    def test_duplicate_acronyms(self):
+        self.assertEqual(self.resolver.resolve_id('Eth'), self.ethereum.pk)
+        self.assertEqual(self.resolver.resolve_id('EUR'), self.euro.pk)
+        self.assertEqual(self.resolver.resolve_api_id('ether-token'), self.unranked.pk)
+        self.assertEqual(self.resolver.resolve_many(['ETH', 'eur', 'XYZ', None]),
+                         {'ETH': self.ethereum, 'eur': self.euro, 'XYZ': None, None: None})
+
+    def test_invalidated_by_asset_info_changes(self):
+        self.assertEqual(self.resolver.resolve_id('ETH'), self.ethereum.pk)
+        # price updates keep the index
+        self.ethereum.current_price = 3000.0
+        self.ethereum.save(update_fields=['current_price'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.resolver.resolve_id('ETH'), self.ethereum.pk)
+
+        self.ethereum.acronym = 'ethw'
+        self.ethereum.save()
+        self.assertEqual(self.resolver.resolve_id('ETH'), self.fork.pk)
+        self.assertEqual(self.resolver.resolve_id('ETHW'), self.ethereum.pk)
+
+        self.fork.delete()
+        self.assertEqual(self.resolver.resolve_id('ETH'), self.unranked.pk)
+        self.unranked.delete()
+        self.assertIsNone(self.resolver.resolve_id('ETH'))
+
+        AssetInfo.objects.create(fullname='Ether New', api_id_name='ether-new', acronym='eth')
+        self.assertIsNotNone(self.resolver.resolve_id('ETH'))
+
+    def test_version_checked_per_interval(self):
+        resolver = asset_resolver.AssetResolver()
+        self.assertEqual(resolver.resolve_id('ETH'), self.ethereum.pk)
+        # lookups within the interval neither read the cache nor query the database
+        with mock.patch.object(asset_resolver.price_cache, 'get_cache') as get_cache, self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertEqual(resolver.resolve_id('ETH'), self.ethereum.pk)
+        get_cache.assert_not_called()
+
+        # changes of other workers are seen after the interval
+        self.ethereum.acronym = 'ethw'
+        self.ethereum.save()
+        resolver._checked_at -= resolver.version_check_interval
+        self.assertEqual(resolver.resolve_id('ETH'), self.fork.pk)
@@ -18,12 +18,14 @@ urlpatterns = [
     path("user-edit/<str:token>", views.EditUser.as_view(), name="user_edit"),
 
     path('dashboard/', views.DashboardAPIView.as_view(), name='dashboard-list'),
+    path('provider-health/', views.ProviderHealthAPIView.as_view(), name='provider-health'),
 
     path('portfolio-type/', views.PortfolioTypeAPIView.as_view(), name='portfolio-type-list'),
     path('portfolio-type/<int:pk>/', views.PortfolioTypeAPIView.as_view(), name='portfolio-type-detail'),
 
     path('portfolio/', views.PortfolioAPIView.as_view(), name='portfolio-list'),
     path('portfolio/<int:pk>/', views.PortfolioAPIView.as_view(), name='portfolio-detail'),
+    path('portfolio/<int:pk>/history/', views.PortfolioHistoryAPIView.as_view(), name='portfolio-history'),
 
     path('asset-owned/', views.AssetOwnedAPIView.as_view(), name='asset'),
 
@@ -31,6 +33,7 @@ urlpatterns = [
     path('transaction-type/<int:pk>/', views.TransactionTypeAPIView.as_view(), name='transaction-detail'),
 
     path('transaction/', views.TransactionAPIView.as_view(), name='transaction-list'),
+    path('transaction/bulk/', views.TransactionBulkAPIView.as_view(), name='transaction-bulk'),
     path('transaction/<int:pk>/', views.TransactionDetailAPIView.as_view(), name='transaction-detail'),
 
     path('file-import-kraken/', views.KrakenFileImportAPIView.as_view(), name='file-import'),
@@ -0,0 +1,115 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import json
+import math
+import time
+import threading
+from pathlib import Path
+from kryptotracker.models import AssetInfo
+from kryptotracker.utils import price_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# CoinGecko export the AssetInfos are seeded from, its market_cap_rank decides which coin an ambiguous acronym means
+COINS_LIST_PATH = Path(__file__).resolve().parent.parent / 'management' / 'commands' / 'coingecko_coins_list.json'
+
+
+def load_market_cap_ranks(path: Path = COINS_LIST_PATH) -> dict:
+    """Return market cap rank by CoinGecko id from the seeded coins list"""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return {entry['id']: entry['market_cap_rank'] for entry in json.load(file)
+                    if entry.get('market_cap_rank') is not None}
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load market cap ranks: {e}")
+        return {}
+
+
+class AssetResolver:
+    """
+    In-memory index of AssetInfo ids by acronym (case-insensitive) and by CoinGecko id. If several AssetInfos share an
+    acronym the one with the best market cap rank wins ("ETH" is Ethereum), euro always wins for "EUR".
+    The index is built on first use and rebuilt after AssetInfos changed in any worker (version in the price cache).
+    """
+
+    # seconds between two reads of the version in the price cache, changes of other workers are seen after this delay
+    version_check_interval = 5
+
+    def __init__(self):
+        self._ranks = None
+        self._by_acronym = None
+        self._by_api_id = None
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _rank(self, api_id_name: str) -> float:
+        if api_id_name == 'euro':
+            return 0
+        return self._ranks.get(api_id_name, math.inf)
+
+    def _build(self) -> None:
+        if self._ranks is None:
+            self._ranks = load_market_cap_ranks()
+        rows = sorted(AssetInfo.objects.values_list('id', 'acronym', 'api_id_name'),
+                      key=lambda row: (self._rank(row[2]), row[0]))
+        by_acronym = {}
+        for asset_info_id, acronym, api_id_name in rows:
+            by_acronym.setdefault(acronym.upper(), asset_info_id)
+        self._by_acronym = by_acronym
+        self._by_api_id = {api_id_name: asset_info_id for asset_info_id, acronym, api_id_name in rows}
+
+    def _ensure_index(self) -> None:
+        """Build the index on first use or if another worker invalidated it, the version is read at most once per
+        version_check_interval"""
+        now = time.monotonic()
+        if self._by_acronym is not None and now - self._checked_at < self.version_check_interval:
+            return
+        version = price_cache.get_cache().get(price_cache.make_key('asset-resolver-version'))
+        self._checked_at = now
+        if self._by_acronym is not None and version == self._version:
+            return
+        with self._lock:
+            if self._by_acronym is None or version != self._version:
+                self._build()
+                self._version = version
+
+    def _lookup(self, acronym: str):
+        if not acronym or not isinstance(acronym, str):
+            return None
+        return self._by_acronym.get(acronym.upper())
+
+    def resolve_id(self, acronym: str):
+        """Return the id of the AssetInfo an acronym stands for or None"""
+        self._ensure_index()
+        return self._lookup(acronym)
+
+    def resolve_api_id(self, api_id_name: str):
+        """Return the id of the AssetInfo of a CoinGecko id or None"""
+        self._ensure_index()
+        return self._by_api_id.get(api_id_name)
+
+    def resolve_many(self, acronyms) -> dict:
+        """
+        Return the AssetInfo objects of many acronyms with one query.
+        :param acronyms: Iterable of acronyms (case-insensitive).
+        :return: Dictionary with the given acronym as key and AssetInfo or None as value.
+        """
+        self._ensure_index()
+        ids = {acronym: self._lookup(acronym) for acronym in set(acronyms)}
+        asset_infos = AssetInfo.objects.in_bulk([asset_info_id for asset_info_id in ids.values() if asset_info_id])
+        return {acronym: asset_infos.get(asset_info_id) for acronym, asset_info_id in ids.items()}
+
+    def resolve(self, acronym: str):
+        """Return the AssetInfo an acronym stands for or None"""
+        return self.resolve_many([acronym]).get(acronym)
+
+    def invalidate(self) -> None:
+        """Rebuild the index of all workers on their next lookup"""
+        price_cache.get_cache().set(price_cache.make_key('asset-resolver-version'), time.time_ns(), timeout=None)
+        with self._lock:
+            self._by_acronym = None
+
+
+resolver = AssetResolver()
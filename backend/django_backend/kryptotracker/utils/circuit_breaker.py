@@ -0,0 +1,134 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import time
+import threading
+from collections import deque
+from django.conf import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# default configuration, can be overwritten with CIRCUIT_BREAKER in settings
+DEFAULTS = {
+    'FAILURE_THRESHOLD': 5,  # failures within FAILURE_WINDOW that open the circuit
+    'FAILURE_WINDOW': 60,  # seconds
+    'RESET_TIMEOUT': 120,  # seconds an open circuit waits before a trial request (half-open)
+}
+
+
+def get_config(key: str):
+    """Return circuit breaker config value from settings.CIRCUIT_BREAKER or the module defaults"""
+    return getattr(settings, 'CIRCUIT_BREAKER', {}).get(key, DEFAULTS[key])
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one external provider (per worker process).
+    closed: requests pass, failures are counted. open: requests are skipped until RESET_TIMEOUT is over.
+    half_open: one trial request passes, its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.state = CLOSED
+        self.failures = deque()  # timestamps of failures within the window
+        self.opened_at = None
+        self.last_failure_at = None
+        self.last_success_at = None
+        self.total_failures = 0
+        self.total_successes = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _update_state(self, now: float) -> None:
+        """Switch from open to half-open once the reset timeout is over"""
+        if self.state == OPEN and now - self.opened_at >= get_config('RESET_TIMEOUT'):
+            self.state = HALF_OPEN
+            self._trial_running = False
+
+    def is_open(self) -> bool:
+        """Return True if requests to the provider are currently skipped (does not take the half-open trial)"""
+        with self._lock:
+            self._update_state(now=time.time())
+            return self.state == OPEN or (self.state == HALF_OPEN and self._trial_running)
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent. In half-open state only one trial request is allowed."""
+        with self._lock:
+            self._update_state(now=time.time())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release_trial(self) -> None:
+        """Free the half-open trial of a request that was never sent, e.g. skipped by the rate limiter"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_running = False
+
+    def record_success(self) -> None:
+        """Count a successful request, a successful trial closes the circuit"""
+        with self._lock:
+            self.total_successes += 1
+            self.last_success_at = time.time()
+            if self.state == HALF_OPEN:
+                logger.info(f"Circuit of {self.provider} closed")
+                self.state = CLOSED
+                self.failures.clear()
+                self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Count a failed request, open the circuit if the threshold is reached or the trial failed"""
+        with self._lock:
+            now = time.time()
+            self.total_failures += 1
+            self.last_failure_at = now
+            self.failures.append(now)
+            while self.failures and now - self.failures[0] > get_config('FAILURE_WINDOW'):
+                self.failures.popleft()
+
+            if self.state == HALF_OPEN or (self.state == CLOSED and len(self.failures) >= get_config('FAILURE_THRESHOLD')):
+                logger.error(f"Circuit of {self.provider} opened after {len(self.failures)} failures")
+                self.state = OPEN
+                self.opened_at = now
+                self._trial_running = False
+
+    def health(self) -> dict:
+        """Return current state and failure counters of the provider"""
+        with self._lock:
+            self._update_state(now=time.time())
+            return {
+                'state': self.state,
+                'recent_failures': len(self.failures),
+                'total_failures': self.total_failures,
+                'total_successes': self.total_successes,
+                'last_failure_at': self.last_failure_at,
+                'last_success_at': self.last_success_at,
+                'opened_at': self.opened_at if self.state != CLOSED else None,
+            }
+
+
+_breakers = {}
+_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Return the circuit breaker of a provider, create it on first use"""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _lock:
+            breaker = _breakers.setdefault(provider, CircuitBreaker(provider=provider))
+    return breaker
+
+
+def provider_health(providers=()) -> dict:
+    """Return the health of the given providers and all other providers requested by this worker"""
+    providers = list(dict.fromkeys(list(providers) + list(_breakers.keys())))
+    return {provider: get_breaker(provider).health() for provider in providers}
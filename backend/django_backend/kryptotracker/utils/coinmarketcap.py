@@ -0,0 +1,70 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# coinmarketcap pages are rendered with Next.js, the page state is embedded as JSON in this script tag
+NEXT_DATA_MARKER = 'id="__NEXT_DATA__"'
+SCRIPT_END = '</script>'
+COIN_IMAGE_URL = 'https://s2.coinmarketcap.com/static/img/coins/64x64/{id}.png'
+
+
+def extract_next_data(html: str):
+    """
+    Extract the embedded Next.js page state of a coinmarketcap page without building a DOM tree.
+    Only the content of the __NEXT_DATA__ script tag is located with string search and parsed as JSON.
+    :param html: HTML of the page.
+    :return: Dictionary of the page state or None if the script tag is missing or invalid.
+    """
+    start = html.find(NEXT_DATA_MARKER)
+    if start == -1:
+        return None
+    start = html.find('>', start) + 1
+    end = html.find(SCRIPT_END, start)
+    if start == 0 or end == -1:
+        return None
+    try:
+        return json.loads(html[start:end])
+    except ValueError:
+        return None
+
+
+def get_coin_detail(next_data: dict):
+    """Return the coin detail of the page state, for current (detailRes) and older (info) page layouts"""
+    page_props = next_data.get('props', {}).get('pageProps', {})
+    detail = (page_props.get('detailRes') or {}).get('detail') or page_props.get('info')
+    if not isinstance(detail, dict):
+        return None
+    return detail
+
+
+def parse_coin_page(html: str):
+    """
+    Parse price, name, symbol and image of a coinmarketcap currency page from its embedded JSON state.
+    :param html: HTML of the page.
+    :return: Dictionary with price, currency, image, name and symbol or None if the data is not available.
+    """
+    next_data = extract_next_data(html=html)
+    if next_data is None:
+        logger.error("__NEXT_DATA__ not found in coinmarketcap page")
+        return None
+
+    detail = get_coin_detail(next_data=next_data)
+    if detail is None:
+        logger.error("Coin detail not found in coinmarketcap page state")
+        return None
+
+    try:
+        return {
+            'price': float(detail['statistics']['price']),
+            # page state prices are quoted in USD independent of the page language
+            'currency': detail.get('quoteCurrency', 'USD'),
+            'image': COIN_IMAGE_URL.format(id=detail['id']),
+            'name': detail['name'],
+            'symbol': detail['symbol'],
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Incomplete coin detail in coinmarketcap page state: {e}")
+        return None
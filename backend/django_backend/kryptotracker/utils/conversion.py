@@ -0,0 +1,95 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import time
+import threading
+from django.conf import settings
+from kryptotracker.models import AssetInfo
+from kryptotracker.utils import crypto_data
+import logging
+
+logger = logging.getLogger(__name__)
+
+# seconds a triangulated rate is kept in memory, can be overwritten with CONVERSION_RATE_TTL in settings
+DEFAULT_RATE_TTL = 60
+
+_rates = {}  # (base api id, target api id) -> (rate, expires at)
+_lock = threading.Lock()
+
+
+def get_rate_ttl() -> float:
+    """Return seconds a conversion rate stays in the rate matrix"""
+    return getattr(settings, 'CONVERSION_RATE_TTL', DEFAULT_RATE_TTL)
+
+
+def get_eur_price(asset_info: AssetInfo, tx_date: str = None):
+    """
+    Return the EUR price of an asset from the cached AssetInfo price or, if a date is given, from the historical
+    price store (CoinGecko on a miss).
+    :param asset_info: AssetInfo object.
+    :param tx_date: Optional date in format 'YYYY-MM-DDTHH:MM'.
+    :return: Price in EUR or None if no price is available.
+    """
+    if asset_info.api_id_name == 'euro':
+        return 1.0
+    if tx_date is not None:
+        return crypto_data.get_historical_price_at_time_coingecko(crypto_id=asset_info.api_id_name, tx_date=tx_date)
+    return asset_info.current_price if asset_info.current_price else None
+
+
+def get_rate(base_asset: AssetInfo, target_asset: AssetInfo, tx_date: str = None):
+    """
+    Return how many target units one base unit is worth, triangulated through the EUR prices of both assets.
+    Current rates are kept in an in-memory matrix for CONVERSION_RATE_TTL seconds.
+    :return: Conversion rate or None if a leg has no price.
+    """
+    key = (base_asset.api_id_name, target_asset.api_id_name)
+    if tx_date is None:
+        cached = _rates.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+    base_price = get_eur_price(asset_info=base_asset, tx_date=tx_date)
+    target_price = get_eur_price(asset_info=target_asset, tx_date=tx_date)
+    if not base_price or not target_price:
+        return None
+
+    rate = base_price / target_price
+    if tx_date is None:
+        expires_at = time.monotonic() + get_rate_ttl()
+        with _lock:
+            _rates[key] = (rate, expires_at)
+            _rates[(key[1], key[0])] = (1 / rate, expires_at)
+    return rate
+
+
+def convert_amount(base_asset: AssetInfo, target_asset: AssetInfo, amount: float, tx_date: str = None):
+    """
+    Convert an amount of one asset into another with local EUR prices. Only if a leg has no price the conversion
+    falls back to the CoinGecko /simple/price endpoint.
+    :param base_asset: AssetInfo to convert from.
+    :param target_asset: AssetInfo to convert to.
+    :param amount: Amount of the base asset.
+    :param tx_date: Optional date in format 'YYYY-MM-DDTHH:MM' to convert with historical prices.
+    :return: Equivalent amount of the target asset or None if no rate is available.
+    """
+    rate = get_rate(base_asset=base_asset, target_asset=target_asset, tx_date=tx_date)
+    if rate is not None:
+        return float(amount * rate)
+
+    logger.info(f"No local rate for {base_asset.api_id_name} -> {target_asset.api_id_name}, request CoinGecko")
+    return crypto_data.convert_crypto_amount(base_crypto=base_asset.api_id_name, target_crypto=target_asset.acronym,
+                                             amount=amount)
+
+
+def clear_rates() -> None:
+    """Remove all rates from the rate matrix, e.g. after prices were refreshed"""
+    with _lock:
+        _rates.clear()
+
+
+def evict_rates(api_id_names) -> None:
+    """Remove the rates of assets from the rate matrix after their prices were refreshed"""
+    api_id_names = set(api_id_names)
+    with _lock:
+        for key in [key for key in _rates if key[0] in api_id_names or key[1] in api_id_names]:
+            del _rates[key]
@@ -1,15 +1,26 @@
 # Author: Roberto Piazza
 # Date: 06.04.2023
-import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+from django.conf import settings
 from django.utils import timezone
-from kryptotracker.models import AssetInfo
+from kryptotracker.models import AssetInfo, PriceTick
+from kryptotracker.utils import circuit_breaker, conversion, dashboard_snapshot, price_cache, price_engine, price_store, \
+    providers, trends
 import logging
 
 logger = logging.getLogger(__name__)
 
+# CoinGecko /coins/markets accepts up to 250 ids per request
+COINGECKO_MARKETS_MAX_IDS = 250
+# CoinGecko market_chart/range returns hourly data for ranges up to 90 days and daily data above
+COINGECKO_RANGE_CHUNK = timedelta(days=90)
+# maximum distance between a transaction and the nearest price point of a range
+COINGECKO_RANGE_MAX_DISTANCE = timedelta(hours=1)
+# AssetInfo prices older than this are refreshed, if neither AssetInfo.stale_after nor settings.PRICE_STALE_AFTER is set
+ASSET_INFO_STALE_AFTER = timedelta(minutes=30)
+
 
 def get_currency_data(api_id_name: str):
     """
@@ -33,30 +44,55 @@ def get_currency_data(api_id_name: str):
     # }
     # return context
 
-    url = f"https://api.coingecko.com/api/v3/coins/markets?vs_currency=eur&ids={api_id_name}&order=market_cap_desc&per_page=250&page=1&sparkline=false&locale=de"
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # throw exception if statuscode != 2xx
-        data = response.json()[0]
+        data = providers.get_provider('coingecko').current_prices(asset_keys=[api_id_name]).get(api_id_name)
         if data:
-            return {
-                'fullname': data['name'],
-                'api_id_name': data['id'],
-                'acronym': data['symbol'],
-                'current_price': float(data['current_price']),
-                'image': data['image']
-            }
+            return data
         else:
             raise Exception("API data fetch failed")
     except Exception as e:
         logger.error(f"Error retrieving data from the CoinGecko API: {e}")
         return None
-    except requests.RequestException as e:
-        logger.error(f"Error with request CoinGecko API: {e}")
+
+
+def get_currencies_data(api_id_names: list):
+    """
+    Get realtime data of multiple cryptocurrencies from CoinGecko API with one request.
+    :param api_id_names: List of CoinGecko ids, at most COINGECKO_MARKETS_MAX_IDS per call.
+    :return: Dictionary with api_id_name as key and cryptocurrency data (fullname, api_id_name, symbol, current price
+    and image) as value. None if the request failed.
+    """
+    try:
+        return providers.get_provider('coingecko').current_prices(asset_keys=api_id_names)
+    except Exception as e:
+        logger.error(f"Error retrieving data from the CoinGecko API: {e}")
         return None
 
 
+def fetch_currencies_data_batch(api_id_names: list) -> dict:
+    """Get realtime data of any number of cryptocurrencies with requests of COINGECKO_MARKETS_MAX_IDS ids each"""
+    data = {}
+    for i in range(0, len(api_id_names), COINGECKO_MARKETS_MAX_IDS):
+        chunk_data = get_currencies_data(api_id_names=api_id_names[i:i + COINGECKO_MARKETS_MAX_IDS])
+        if chunk_data is not None:
+            data.update(chunk_data)
+    return data
+
+
 def get_historical_price_at_time(crypto_symbol: str, tx_date: str):
+    """
+    Get cryptocurrency price at given date and time. Read from the local price store, on a miss from CryptoCompare API.
+    :param crypto_symbol: Name of the cryptocurrency to get data.
+    :param tx_date: Transaction date from HTML formular to get specific time price.
+    :return: Return cryptocurrency price at specified date and time.
+    """
+    return price_store.read_through(provider=price_store.PROVIDER_CRYPTOCOMPARE, asset_key=crypto_symbol.upper(),
+                                    tx_date=tx_date,
+                                    fetch=lambda: fetch_historical_price_at_time(crypto_symbol=crypto_symbol,
+                                                                                 tx_date=tx_date))
+
+
+def fetch_historical_price_at_time(crypto_symbol: str, tx_date: str):
     """
     Get cryptocurrency price at given date and time from CryptoCompare API.
     :param crypto_symbol: Name of the cryptocurrency to get data.
@@ -75,24 +111,27 @@ def get_historical_price_at_time(crypto_symbol: str, tx_date: str):
     # return float(data[crypto_symbol]['EUR'])
     datetime_obj = datetime.strptime(tx_date, '%Y-%m-%dT%H:%M')
     timestamp = int(datetime_obj.timestamp())
-    url = f"https://min-api.cryptocompare.com/data/pricehistorical?fsym={crypto_symbol}&tsyms=EUR&ts={timestamp}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        if data[crypto_symbol]['EUR']:
-            return float(data[crypto_symbol]['EUR'])
-        else:
-            raise Exception(f"Could not get price for {crypto_symbol}")
+        return providers.get_provider('cryptocompare').historical_price(asset_key=crypto_symbol, timestamp=timestamp)
     except Exception as e:
         logger.error(f"Error retrieving data from the API: {e}")
         return None
-    except requests.RequestException as e:
-        logger.error(f"Error retrieving data from the API: {e}")
-        return None
 
 
 def get_historical_price_at_time_coingecko(crypto_id: str, tx_date: str):
+    """
+    Get cryptocurrency price at a given date and time. Read from the local price store, on a miss from CoinGecko API.
+    :param crypto_id: ID of the cryptocurrency to get data.
+    :param tx_date: Transaction date and time in ISO-8601 format ('YYYY-MM-DDTHH:MM').
+    :return: Return cryptocurrency price at specified date and time.
+    """
+    return price_store.read_through(provider=price_store.PROVIDER_COINGECKO, asset_key=crypto_id.lower(),
+                                    tx_date=tx_date,
+                                    fetch=lambda: fetch_historical_price_at_time_coingecko(crypto_id=crypto_id,
+                                                                                           tx_date=tx_date))
+
+
+def fetch_historical_price_at_time_coingecko(crypto_id: str, tx_date: str):
     """
     Get cryptocurrency price at a given date and time from CoinGecko API using market_chart/range endpoint.
     :param crypto_id: ID of the cryptocurrency to get data.
@@ -111,27 +150,86 @@ def get_historical_price_at_time_coingecko(crypto_id: str, tx_date: str):
     # convert date into unix-timestamp
     datetime_obj = datetime.strptime(tx_date, '%Y-%m-%dT%H:%M')
     timestamp = int(datetime_obj.timestamp())
-    # choose start- and end timestamp for api query
-    start_timestamp = timestamp - 300  # 5 mins target time
-    end_timestamp = timestamp + 300  # 5 mins after target time
-    url = f"https://api.coingecko.com/api/v3/coins/{crypto_id.lower()}/market_chart/range?vs_currency=eur&from={start_timestamp}&to={end_timestamp}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        prices = data['prices']
-        if prices:
-            return prices[0][1]
-        else:
-            raise Exception("No price data found")
+        return providers.get_provider('coingecko').historical_price(asset_key=crypto_id, timestamp=timestamp)
     except Exception as e:
         logger.error(f"Error retrieving data from the API: {e}")
         return None
-    except requests.RequestException as e:
+
+
+def get_price_range_coingecko(crypto_id: str, start_timestamp: int, end_timestamp: int):
+    """
+    Get all cryptocurrency prices between two unix timestamps from CoinGecko API using market_chart/range endpoint.
+    :param crypto_id: ID of the cryptocurrency to get data.
+    :param start_timestamp: Start of the range as unix timestamp.
+    :param end_timestamp: End of the range as unix timestamp, at most COINGECKO_RANGE_CHUNK after start.
+    :return: List of [timestamp in ms, price] sorted by timestamp. None if the request failed.
+    """
+    try:
+        return providers.get_provider('coingecko').historical_prices(asset_key=crypto_id, start_timestamp=start_timestamp,
+                                                                     end_timestamp=end_timestamp)
+    except Exception as e:
         logger.error(f"Error retrieving data from the API: {e}")
         return None
 
 
+def chunk_buckets(buckets: list, chunk_size: int) -> list:
+    """Split sorted timestamps into ranges (start, end) of at most chunk_size seconds, ranges only cover timestamps"""
+    ranges = []
+    for bucket in buckets:
+        if ranges and bucket - ranges[-1][0] <= chunk_size:
+            ranges[-1][1] = bucket
+        else:
+            ranges.append([bucket, bucket])
+    return [(start, end) for start, end in ranges]
+
+
+def prefetch_historical_prices(tx_dates_by_asset: dict) -> dict:
+    """
+    Resolve the historical prices of many transactions with one market_chart/range request per asset (split in chunks
+    of COINGECKO_RANGE_CHUNK to keep hourly granularity) instead of one request per transaction. Each date gets the
+    price with the nearest timestamp. Resolved prices are written to the local price store.
+    :param tx_dates_by_asset: Dictionary with CoinGecko id as key and iterable of dates ('YYYY-MM-DDTHH:MM') as value.
+    :return: Dictionary with (CoinGecko id, date) as key and price as value. Unresolved dates are missing.
+    """
+    resolved = {}
+    max_distance = int(COINGECKO_RANGE_MAX_DISTANCE.total_seconds())
+    # padding on both sides must not push a request over the granularity limit
+    chunk_size = int(COINGECKO_RANGE_CHUNK.total_seconds()) - 2 * max_distance
+    for crypto_id, tx_dates in tx_dates_by_asset.items():
+        if crypto_id == 'euro':
+            continue
+        asset_key = crypto_id.lower()
+        buckets = {tx_date: price_store.to_bucket(tx_date) for tx_date in set(tx_dates)}
+        stored = price_store.get_prices(provider=price_store.PROVIDER_COINGECKO, asset_key=asset_key,
+                                        buckets=set(buckets.values()))
+        missing = sorted(set(bucket for bucket in buckets.values() if bucket not in stored))
+
+        fetched = {}
+        for start, end in chunk_buckets(buckets=missing, chunk_size=chunk_size):
+            prices = get_price_range_coingecko(crypto_id=crypto_id, start_timestamp=start - max_distance,
+                                               end_timestamp=end + max_distance)
+            if not prices:
+                continue
+            points = np.array(prices, dtype=np.float64)
+            timestamps = points[:, 0] / 1000
+            chunk = np.array([bucket for bucket in missing if start <= bucket <= end], dtype=np.float64)
+
+            # nearest neighbour: compare the point right of each bucket with the one left of it
+            right = np.clip(np.searchsorted(timestamps, chunk), 0, len(timestamps) - 1)
+            left = np.clip(right - 1, 0, len(timestamps) - 1)
+            nearest = np.where(np.abs(timestamps[left] - chunk) <= np.abs(timestamps[right] - chunk), left, right)
+            in_range = np.abs(timestamps[nearest] - chunk) <= max_distance
+            fetched.update({int(bucket): float(price)
+                            for bucket, price in zip(chunk[in_range], points[nearest[in_range], 1])})
+
+        if fetched:
+            price_store.store_prices(provider=price_store.PROVIDER_COINGECKO, asset_key=asset_key, prices=fetched)
+        stored.update(fetched)
+        resolved.update({(crypto_id, tx_date): stored[bucket] for tx_date, bucket in buckets.items() if bucket in stored})
+    return resolved
+
+
 def convert_crypto_amount(base_crypto: str, target_crypto: str, amount: float):
     """
     Convert a specified amount of one cryptocurrency to its equivalent in another cryptocurrency.
@@ -150,12 +248,8 @@ def convert_crypto_amount(base_crypto: str, target_crypto: str, amount: float):
     #     return 'Fehler - Umrechnungskurs nicht verfügbar'
     #
     # return float(amount * price)
-    url = f'https://api.coingecko.com/api/v3/simple/price?ids={base_crypto}&vs_currencies={target_crypto}'
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        price = data.get(base_crypto, {}).get(target_crypto)
+        price = providers.get_provider('coingecko').simple_price(base_asset_key=base_crypto, target_currency=target_crypto)
         if price is not None:
             return float(amount * price)
         else:
@@ -163,9 +257,6 @@ def convert_crypto_amount(base_crypto: str, target_crypto: str, amount: float):
     except Exception as e:
         logger.error(f"Error retrieving data from the API: {e}")
         return None
-    except requests.RequestException as e:
-        logger.error(f"Error retrieving data from the API: {e}")
-        return None
 
 
 def get_crypto_data_from_coinmarketcap(crypto_name: str):
@@ -217,99 +308,126 @@ def get_crypto_data_from_coinmarketcap(crypto_name: str):
     #     'name': name.split('-')[0].strip(),
     #     'symbol': symbol
     # }
-    url = f'https://coinmarketcap.com/de/currencies/{crypto_name}/'
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Extract current cryptocurrency price and format into float
-        price_selector = '.sc-f70bb44c-0.jxpCgO.base-text'
-        price_element = soup.select_one(price_selector)
-        if not price_element:
-            raise Exception("Price element not found with webscraping")
-            # return 'Fehler - Preiselement nicht gefunden'
-
-        price_text = price_element.text.strip().replace('€', '').replace(',', '')
-        try:
-            # removal of spaces and commas and conversion to a number
-            price = float(price_text.replace(',', ''))
-        except ValueError:
-            logger.error("Could not convert the price to a number after webscraping")
-            return None
-            # return 'Fehler - Konnte den Preis nicht in eine Zahl konvertieren'
-
-        # Extract Image-URL
-        image_selector = '[data-role="coin-logo"] img'
-        image_element = soup.select_one(image_selector)
-        # image_src = image_element['src'] if image_element and 'src' in image_element.attrs else 'Bild-Element nicht gefunden'
-        image_src = image_element['src']
-
-        # Extract Name
-        name_selector = '[data-role="coin-name"]'
-        name_element = soup.select_one(name_selector)
-        # name = name_element.get_text(strip=True) if name_element else 'Name-Element nicht gefunden'
-        name = name_element.get_text(strip=True)
-
-        # Extract Symbol
-        symbol_selector = '[data-role="coin-symbol"]'
-        symbol_element = soup.select_one(symbol_selector)
-        # symbol = symbol_element.text.strip() if symbol_element else 'Symbol-Element nicht gefunden'
-        symbol = symbol_element.text.strip()
-
-        if not all([price_element, image_element, name_element, symbol_element]):
-            raise Exception("Not all data available with webscraping")
-        else:
-            return {
-                'current_price': price,
-                'image': image_src,
-                'name': name.split('-')[0].strip(),
-                'symbol': symbol
-            }
-    except Exception as e:
-        logger.error(f"Error retrieving data from webscraping: {e}")
-        return None
-    except requests.RequestException as e:
-        logger.error(f"Error retrieving data from webscraping: {e}")
-        return None
+    return providers.get_provider('coinmarketcap').current_prices(asset_keys=[crypto_name]).get(crypto_name)
+
+
+def fetch_crypto_data_from_coinmarketcap_batch(crypto_names: list) -> dict:
+    """Get cryptocurrency data of multiple cryptocurrencies from webscraping coinmarketcap, one page per name"""
+    return providers.get_provider('coinmarketcap').current_prices(asset_keys=list(crypto_names))
 
 
 # TODO: what if api call and webscraping fails?
 def update_asset_info(asset_info: AssetInfo):
     """Update asset info image and current price. If CoinGecko fails use webscraping and get data from coinmarkecap"""
+    refresh_asset_infos(asset_infos=[asset_info])
+
+
+def get_stale_after(asset_info: AssetInfo) -> timedelta:
+    """Return the staleness window of an AssetInfo: its own stale_after, settings.PRICE_STALE_AFTER or the default"""
+    if asset_info.stale_after is not None:
+        return timedelta(minutes=asset_info.stale_after)
+    stale_after = getattr(settings, 'PRICE_STALE_AFTER', None)
+    return timedelta(minutes=stale_after) if stale_after is not None else ASSET_INFO_STALE_AFTER
+
+
+def is_asset_info_stale(asset_info: AssetInfo, current_time: datetime = None) -> bool:
+    """Return True if the AssetInfo price is older than its staleness window or was never set. Euro is never stale."""
     if asset_info.api_id_name == 'euro':
-        return
+        return False
+    current_time = current_time if current_time is not None else timezone.now()
+    return current_time - asset_info.updated_at >= get_stale_after(asset_info) or asset_info.current_price == 0.0
 
+
+def refresh_asset_infos(asset_infos, force: bool = False) -> list:
+    """
+    Update image and current price of all stale AssetInfo objects with batched CoinGecko requests (max. 250 ids per
+    request) and write the results back with one bulk_update. Assets missing in the CoinGecko response and EthereumPoW
+    are updated with webscraping from coinmarketcap.
+    :param asset_infos: Queryset or iterable of AssetInfo objects. Objects are updated in place.
+    :param force: Refresh all given assets (except euro) even if their price is not stale yet.
+    :return: List of updated AssetInfo objects.
+    """
     current_time = timezone.now()
-    time_delta = timedelta(minutes=30)
-    if current_time - asset_info.updated_at < time_delta and asset_info.current_price != 0.0:
-        return
+    asset_infos = [asset_info for asset_info in asset_infos if asset_info is not None]
+    # prices already refreshed by another worker are taken from the shared price cache
+    price_cache.apply_current_prices(asset_infos=asset_infos)
 
-    try:
-        if asset_info.fullname == "EthereumPoW":
-            new_data = get_crypto_data_from_coinmarketcap(crypto_name=asset_info.api_id_name[:-4])
-            if new_data is not None:
-                asset_info.current_price = new_data['current_price']
-                asset_info.image = new_data['image']
-                asset_info.save()
+    # group instances by api id, the same AssetInfo can be passed multiple times (e.g. owned in several portfolios)
+    stale = {}
+    for asset_info in asset_infos:
+        if asset_info.api_id_name == 'euro':
+            continue
+        if force or is_asset_info_stale(asset_info=asset_info, current_time=current_time):
+            stale.setdefault(asset_info.api_id_name, []).append(asset_info)
+
+    # only one worker refreshes an asset, the others keep their cached price until the refresh is in the cache
+    locked = []
+    for api_id_name, infos in list(stale.items()):
+        if price_cache.acquire_refresh_lock(api_id_name=api_id_name):
+            locked.append(api_id_name)
+        elif not force and infos[0].current_price:
+            del stale[api_id_name]
+    if not stale:
+        return []
+
+    scraping_names = [name for name, infos in stale.items() if infos[0].fullname == "EthereumPoW"]
+    api_id_names = [name for name in stale.keys() if name not in scraping_names]
+
+    # concurrent refreshes of the same assets (e.g. parallel dashboard loads) share one upstream request,
+    # providers with an open circuit are skipped immediately
+    new_data = {}
+    if not circuit_breaker.get_breaker('coingecko').is_open():
+        new_data = price_engine.engine.fetch_many(namespace='coingecko-markets', keys=api_id_names,
+                                                  fetch_batch=fetch_currencies_data_batch)
+        new_data = {api_id_name: data for api_id_name, data in new_data.items() if data is not None}
+
+    # fallback with webscraping for all assets CoinGecko could not deliver
+    crypto_names = {(api_id_name[:-4] if api_id_name in scraping_names else api_id_name): api_id_name
+                    for api_id_name in stale.keys() if api_id_name not in new_data}
+    if circuit_breaker.get_breaker('coinmarketcap').is_open():
+        logger.error(f"Update error: {len(crypto_names)} AssetInfos not updated, CoinGecko and coinmarketcap unavailable")
+        crypto_names = {}
+    scraped_data = price_engine.engine.fetch_many(namespace='coinmarketcap', keys=crypto_names.keys(),
+                                                  fetch_batch=fetch_crypto_data_from_coinmarketcap_batch)
+    for crypto_name, api_id_name in crypto_names.items():
+        if scraped_data.get(crypto_name) is not None:
+            new_data[api_id_name] = scraped_data[crypto_name]
         else:
-            new_data = get_currency_data(api_id_name=asset_info.api_id_name)
-            # if 'current_price' in new_data and 'image' in new_data:
-            if new_data is not None:
-                asset_info.current_price = new_data['current_price']
-                asset_info.image = new_data['image']
-                asset_info.save()
-            else:
-                new_data = get_crypto_data_from_coinmarketcap(crypto_name=asset_info.api_id_name)
-                if new_data is not None:
-                    asset_info.current_price = new_data['current_price']
-                    asset_info.image = new_data['image']
-                    asset_info.save()
-                else:
-                    raise Exception(f"AssetInfo {asset_info.fullname} could not be updated with api request and webscraping")
-    except Exception as e:
-        logger.error(f"Update error: {e}")
-        return None
+            logger.error(f"Update error: AssetInfo {stale[api_id_name][0].fullname} could not be updated with api "
+                         f"request and webscraping")
+
+    updated = []
+    for api_id_name, data in new_data.items():
+        for asset_info in stale.get(api_id_name, []):
+            asset_info.current_price = data['current_price']
+            asset_info.image = data['image']
+            asset_info.updated_at = current_time
+            updated.append(asset_info)
+
+    # write back each row once, bulk_update does not touch auto_now fields itself
+    unique_updated = list({asset_info.pk: asset_info for asset_info in updated}.values())
+    if unique_updated:
+        AssetInfo.objects.bulk_update(unique_updated, ['current_price', 'image', 'updated_at'])
+        append_price_ticks(asset_infos=unique_updated, current_time=current_time)
+        price_cache.set_current_prices(asset_infos=unique_updated)
+        # conversions of this worker use the new prices at once, not only after CONVERSION_RATE_TTL
+        conversion.evict_rates(api_id_names=[asset_info.api_id_name for asset_info in unique_updated])
+        dashboard_snapshot.apply_price_ticks(asset_infos=unique_updated,
+                                             trends=trends.update_trends(asset_infos=unique_updated,
+                                                                         current_time=current_time))
+    # locks of failed refreshes are released too, they expire after REFRESH_LOCK_TIMEOUT if a refresh crashes
+    price_cache.release_refresh_locks(api_id_names=locked)
+    return updated
+
+
+def append_price_ticks(asset_infos, current_time: datetime) -> None:
+    """Append the current prices of refreshed AssetInfo objects to the price history with one bulk insert"""
+    ts = int(current_time.timestamp())
+    PriceTick.objects.bulk_create(
+        [PriceTick(asset=asset_info, ts=ts, price=asset_info.current_price) for asset_info in asset_infos
+         if asset_info.current_price],
+        ignore_conflicts=True
+    )
 
 
 def map_kraken_coins():
@@ -383,7 +501,8 @@ def map_kraken_tx_types():
 
 
 def get_coin_pairs(dataframe: pd.DataFrame):
-    """Return separated coin pairs from Kraken API e.g. for XXBTZEUR is XXBT and ZEUR"""
+    """Return separated coin pairs from Kraken API e.g. for XXBTZEUR is XXBT and ZEUR, keyed by the pair names of the
+    dataframe (cached or not)"""
     # pairs = set([row['pair'] for index, row in dataframe.iterrows()])
     # joined_pairs_list = ",".join(pairs)
     # url = f'https://api.kraken.com/0/public/AssetPairs?pair={joined_pairs_list}'
@@ -394,19 +513,19 @@ def get_coin_pairs(dataframe: pd.DataFrame):
     # data = response.json()['result']
     # return data
     pairs = set([row['pair'] for index, row in dataframe.iterrows()])
-    joined_pairs_list = ",".join(pairs)
-    url = f'https://api.kraken.com/0/public/AssetPairs?pair={joined_pairs_list}'
+    data = price_cache.get_pairs(pairs=pairs)
+    missing = [pair for pair in pairs if pair not in data]
+    if not missing:
+        return data
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()['result']
-        if data:
-            return data
-        else:
-            raise Exception("Asset Pairs could not be separated")
+        fetched = providers.get_provider('kraken').pair_metadata(pairs=missing)
     except Exception as e:
         logger.error(f"Error retrieving data from the API: {e}")
         return None
-    except requests.RequestException as e:
-        logger.error(f"Error retrieving data from the API: {e}")
-        return None
+    # Kraken can return the metadata under another pair name (e.g. XXBTZEUR for XBTEUR), cache it by requested name
+    by_altname = {metadata.get('altname'): metadata for metadata in fetched.values()}
+    requested = {pair: fetched.get(pair, by_altname.get(pair)) for pair in missing}
+    requested = {pair: metadata for pair, metadata in requested.items() if metadata is not None}
+    price_cache.set_pairs(pairs=requested)
+    data.update(requested)
+    return data
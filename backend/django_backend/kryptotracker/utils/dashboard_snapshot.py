@@ -0,0 +1,287 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import time
+import contextlib
+import contextvars
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.utils import timezone
+from kryptotracker.models import AssetInfo, AssetOwned, Portfolio
+from kryptotracker.utils import crypto_data, etags, price_refresh
+import logging
+
+logger = logging.getLogger(__name__)
+
+# cache alias shared by all workers, can be overwritten with DASHBOARD_CACHE_ALIAS in settings
+DEFAULT_CACHE_ALIAS = 'dashboard'
+# version of the key layout and snapshot format, increase on incompatible changes
+KEY_VERSION = 2
+
+SNAPSHOT_TIMEOUT = timedelta(days=1)
+# holdings valued below this amount in EUR are hidden on the dashboard (deleted by maintain_portfolios)
+DUST_THRESHOLD = 0.01
+
+# users and portfolios changed within a deferred_invalidation() block, invalidated once at its end
+_deferred = contextvars.ContextVar('dashboard_deferred_invalidation', default=None)
+
+
+def get_cache():
+    """Return the dashboard cache, the default cache if no 'dashboard' cache is configured"""
+    try:
+        return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def make_key(*parts) -> str:
+    """Return a versioned cache key e.g. 'dashboard:v1:snapshot:1'"""
+    return ':'.join(['dashboard', f'v{KEY_VERSION}', *[str(part) for part in parts]])
+
+
+def get_stale_at(asset_info: AssetInfo):
+    """Return the time the AssetInfo price gets stale (see crypto_data.is_asset_info_stale), None for euro"""
+    if asset_info.api_id_name == 'euro':
+        return None
+    if not asset_info.current_price:
+        return asset_info.updated_at
+    return asset_info.updated_at + crypto_data.get_stale_after(asset_info)
+
+
+def format_trend(change) -> str:
+    """Format a percent change for the dashboard e.g. '1.23%' or '-0.50%', 'k. A.' if unknown"""
+    return f"{change:.2f}%" if change is not None else 'k. A.'
+
+
+def build_lines(owned: list, trends: dict) -> list:
+    """
+    Return one line with quantity, price and trend data for each owned asset, dust included (a price change can lift
+    it).
+    :param owned: List of AssetOwned objects with their AssetInfo.
+    :param trends: Dictionary with AssetInfo id as key and dict {window name: percent change} as value.
+    :return: List of dictionaries.
+    """
+    return [{
+        'portfolio_id': own.portfolio_id,
+        'asset_id': own.asset_id,
+        'acronym': own.asset.acronym.upper(),
+        'img': own.asset.image,
+        'amount': own.quantity_owned,
+        'price': own.asset.current_price,
+        'updated_at': own.asset.updated_at,
+        'stale_at': get_stale_at(own.asset),
+        'trend_24h': trends.get(own.asset_id, {}).get('24h'),
+        'trend_7d': trends.get(own.asset_id, {}).get('7d'),
+    } for own in owned]
+
+
+def build_valuation(portfolios: list, lines: list, current_time: datetime) -> dict:
+    """
+    Value all lines with their price, hide dust and return balances, portfolio tables and chart data of the dashboard.
+    :param portfolios: List of dictionaries with id, name and type of the portfolios.
+    :param lines: List of lines (see build_lines).
+    :param current_time: Time the price ages are calculated for.
+    :return: Dictionary with sum_balance, spot_balance, staking_balance, portfolios_data, chart_data and with_coins
+    (number of shown holdings).
+    """
+    currencies_by_portfolio = {portfolio['id']: [] for portfolio in portfolios}
+    balances = {portfolio['id']: 0.0 for portfolio in portfolios}
+    assets_sum = {}
+    with_coins = 0
+    for line in lines:
+        value = (line['price'] or 0.0) * line['amount']
+        if value < DUST_THRESHOLD or line['portfolio_id'] not in balances:
+            continue
+        balances[line['portfolio_id']] += value
+        with_coins += 1
+        currencies_by_portfolio[line['portfolio_id']].append({
+            'acronym': line['acronym'],
+            'img': line['img'],
+            'amount': line['amount'],
+            'price': line['price'],
+            'owned_value': value,
+            'price_age': (current_time - line['updated_at']).total_seconds(),
+            'trend': format_trend(line['trend_24h']),
+            'trend_24h': line['trend_24h'],
+            'trend_7d': line['trend_7d'],
+        })
+        assets_sum[line['acronym']] = assets_sum.get(line['acronym'], 0.0) + round(value, 3)
+
+    sum_balance = 0.0
+    spot_balance = 0.0
+    staking_balance = 0.0
+    portfolios_data = []
+    for portfolio in portfolios:
+        balance = balances[portfolio['id']]
+        sum_balance += balance
+        if portfolio['type'] == 'Spot':
+            spot_balance += balance
+        if portfolio['type'] == 'Staking':
+            staking_balance += balance
+        # sort currencies in ascending order based on the acronyms
+        currencies = sorted(currencies_by_portfolio[portfolio['id']], key=lambda currency: currency['acronym'])
+        portfolios_data.append({'name': portfolio['name'], 'type': portfolio['type'], 'currencies': currencies})
+    portfolios_data.sort(key=lambda portfolio: portfolio['name'])
+
+    chart_data = sorted([{'asset': asset, 'EUR': value} for asset, value in assets_sum.items()],
+                        key=lambda x: x['EUR'], reverse=True)
+    return {
+        'sum_balance': sum_balance,
+        'spot_balance': spot_balance,
+        'staking_balance': staking_balance,
+        'portfolios_data': portfolios_data,
+        'chart_data': chart_data,
+        'with_coins': with_coins,
+    }
+
+
+def render(snapshot: dict, current_time: datetime = None) -> dict:
+    """Return the dashboard response data of a snapshot, values and price ages are calculated on each call"""
+    current_time = current_time if current_time is not None else timezone.now()
+    valuation = build_valuation(portfolios=snapshot['portfolios'], lines=snapshot['lines'], current_time=current_time)
+    return {
+        # variables for stat cards
+        'sum_balance': valuation['sum_balance'],
+        'spot_balance': valuation['spot_balance'],
+        'staking_balance': valuation['staking_balance'],
+        'first_transaction': snapshot['first_transaction'],
+        'last_transaction': snapshot['last_transaction'],
+        'transactions': {'count': snapshot['count_transactions'], 'with_coins': valuation['with_coins']},
+        # variables for balance tables
+        'portfolios_data': valuation['portfolios_data'],
+        # variable for last transactions list
+        'last_five_transactions': snapshot['last_five_transactions'],
+        # variable for bar chart
+        'chart_data': valuation['chart_data'],
+        # variable for tax_data
+        'tax_data': snapshot['tax_data'],
+    }
+
+
+def is_fresh(snapshot: dict, current_time: datetime) -> bool:
+    """Return True if the snapshot can be served: always in daemon mode (price ticks patch it), in the other refresh
+    modes only while no price is stale, a stale price is refreshed by building the dashboard again"""
+    if price_refresh.get_refresh_mode() == price_refresh.MODE_DAEMON:
+        return True
+    return all(line['stale_at'] is None or line['stale_at'] > current_time for line in snapshot['lines'])
+
+
+def get_snapshot(user_id: int):
+    """
+    Return the snapshot of a user's dashboard with one cache read.
+    :param user_id: Id of the user.
+    :return: Tuple of the snapshot (None if missing, invalidated or stale) and the current generation, the generation
+    has to be passed to set_snapshot() when the snapshot is built again.
+    """
+    snapshot_key = make_key('snapshot', user_id)
+    generation_key = make_key('generation', user_id)
+    cached = get_cache().get_many([snapshot_key, generation_key])
+    snapshot = cached.get(snapshot_key)
+    generation = cached.get(generation_key)
+    if snapshot is None or snapshot['generation'] != generation or not is_fresh(snapshot, timezone.now()):
+        return None, generation
+    return snapshot, generation
+
+
+def has_snapshot(user_id: int) -> bool:
+    """Return True if the dashboard of the user can be served from its snapshot (valid and prices not stale)"""
+    return get_snapshot(user_id=user_id)[0] is not None
+
+
+def set_snapshot(user_id: int, generation, snapshot: dict) -> None:
+    """Write the snapshot of a user's dashboard built with the generation returned by get_snapshot()"""
+    snapshot['generation'] = generation
+    get_cache().set(make_key('snapshot', user_id), snapshot, timeout=SNAPSHOT_TIMEOUT.total_seconds())
+
+
+def invalidate(user_ids) -> None:
+    """Invalidate the dashboard snapshots of users. A new generation is written, so snapshots built or patched
+    concurrently with the old generation are never served."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    generation = time.time_ns()
+    cache = get_cache()
+    cache.set_many({make_key('generation', user_id): generation for user_id in user_ids}, timeout=None)
+    cache.delete_many([make_key('snapshot', user_id) for user_id in user_ids])
+
+
+def invalidate_data(user_ids=(), portfolio_ids=()) -> None:
+    """
+    Invalidate the dashboard snapshots and data ETags of users after their transactions, portfolios or owned assets
+    changed. Within deferred_invalidation() the users are collected and invalidated once at the end of the block.
+    :param user_ids: Ids of the affected users.
+    :param portfolio_ids: Ids of portfolios whose owners are affected, looked up with one query.
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        pending['user_ids'].update(user_ids)
+        pending['portfolio_ids'].update(portfolio_ids)
+        return
+    user_ids = set(user_ids)
+    if portfolio_ids:
+        user_ids.update(Portfolio.objects.filter(pk__in=list(portfolio_ids)).values_list('user_id', flat=True))
+    if user_ids:
+        invalidate(user_ids=user_ids)
+        etags.bump(user_ids=user_ids, counter=etags.DATA)
+
+
+@contextlib.contextmanager
+def deferred_invalidation():
+    """Invalidate the users of all rows saved within the block once at its end instead of once per row, e.g. in
+    imports. Usable as decorator, nested blocks belong to the outermost one."""
+    if _deferred.get() is not None:
+        yield
+        return
+    pending = {'user_ids': set(), 'portfolio_ids': set()}
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        invalidate_data(user_ids=pending['user_ids'], portfolio_ids=pending['portfolio_ids'])
+
+
+def apply_price_ticks(asset_infos, trends: dict = None) -> int:
+    """
+    Patch the lines of refreshed assets in the dashboard snapshots of all users holding them, everything else in the
+    snapshots is kept.
+    :param asset_infos: Iterable of refreshed AssetInfo objects.
+    :param trends: Dictionary with AssetInfo id as key and dict {window name: percent change} as value, optional.
+    :return: Number of patched snapshots.
+    """
+    asset_infos = {asset_info.pk: asset_info for asset_info in asset_infos}
+    if not asset_infos:
+        return 0
+    user_ids = set(AssetOwned.objects.filter(asset_id__in=asset_infos.keys())
+                   .values_list('portfolio__user_id', flat=True).distinct())
+    if not user_ids:
+        return 0
+    # conditional GETs of the holders must not be answered with 304 anymore
+    etags.bump(user_ids=user_ids, counter=etags.PRICES)
+
+    cache = get_cache()
+    keys = {}
+    for user_id in user_ids:
+        keys[make_key('snapshot', user_id)] = make_key('generation', user_id)
+    cached = cache.get_many([*keys.keys(), *keys.values()])
+    patched = {}
+    for snapshot_key, generation_key in keys.items():
+        snapshot = cached.get(snapshot_key)
+        if snapshot is None or snapshot['generation'] != cached.get(generation_key):
+            continue
+        for line in snapshot['lines']:
+            asset_info = asset_infos.get(line['asset_id'])
+            if asset_info is not None:
+                line['price'] = asset_info.current_price
+                line['img'] = asset_info.image
+                line['updated_at'] = asset_info.updated_at
+                line['stale_at'] = get_stale_at(asset_info)
+            if trends is not None and line['asset_id'] in trends:
+                line['trend_24h'] = trends[line['asset_id']].get('24h')
+                line['trend_7d'] = trends[line['asset_id']].get('7d')
+        patched[snapshot_key] = snapshot
+    if patched:
+        cache.set_many(patched, timeout=SNAPSHOT_TIMEOUT.total_seconds())
+    return len(patched)
@@ -0,0 +1,107 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+import logging
+
+logger = logging.getLogger(__name__)
+
+# cache alias shared by all workers, the counters live next to the dashboard snapshots by default
+DEFAULT_CACHE_ALIAS = 'dashboard'
+# version of the ETag format, increase to make all ETags held by clients invalid
+ETAG_VERSION = 1
+
+# change counters of a user: DATA is bumped on writes of transactions, holdings, portfolios and tax reports,
+# PRICES on price refreshes of assets the user holds
+DATA = 'data'
+PRICES = 'prices'
+
+
+def get_cache():
+    """Return the cache of the change counters, the default cache if no 'dashboard' cache is configured"""
+    try:
+        return caches[getattr(settings, 'ETAG_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def make_key(counter: str, user_id: int) -> str:
+    """Return the cache key of a change counter e.g. 'changes:v1:data:1'"""
+    return ':'.join(['changes', f'v{ETAG_VERSION}', counter, str(user_id)])
+
+
+def get_versions(user_id: int, counters: tuple) -> list:
+    """
+    Return the current values of change counters of a user with one cache read. Counters missing in the cache (never
+    bumped or evicted) are started with the current time, so ETags issued before can never match again.
+    :param user_id: Id of the user.
+    :param counters: Tuple of counter names.
+    :return: List of counter values in the order of counters.
+    """
+    cache = get_cache()
+    keys = [make_key(counter, user_id) for counter in counters]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump(user_ids, counter: str) -> None:
+    """Change a counter of users, ETags built with the old value do not match anymore"""
+    user_ids = set(user_ids)
+    if user_ids:
+        version = time.time_ns()
+        get_cache().set_many({make_key(counter, user_id): version for user_id in user_ids}, timeout=None)
+
+
+def make_etag(scope: str, user_id: int, versions: list, query: str = '') -> str:
+    """Return the ETag of a response from the scope (endpoint), user, counter values and query string"""
+    parts = [scope, f'v{ETAG_VERSION}', str(user_id), *[str(version) for version in versions]]
+    if query:
+        parts.append(hashlib.sha1(query.encode()).hexdigest()[:12])
+    return f'"{"-".join(parts)}"'
+
+
+def conditional(scope: str, counters: tuple, is_current=None):
+    """
+    Decorator of APIView GET methods: responses get an ETag from the change counters of the authenticated user and
+    requests with a matching If-None-Match are answered with 304 before the view runs any query.
+    :param scope: Name of the endpoint, part of the ETag.
+    :param counters: Change counters the response depends on e.g. (DATA, PRICES).
+    :param is_current: Optional callable(user_id) -> bool, a 304 is only sent if it returns True (e.g. prices of the
+    response are not stale).
+    """
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(view, request, *args, **kwargs):
+            user = request.user
+            if user is None or not user.is_authenticated:
+                return get(view, request, *args, **kwargs)
+
+            etag = make_etag(scope=scope, user_id=user.pk, versions=get_versions(user_id=user.pk, counters=counters),
+                             query=request.GET.urlencode())
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if (etag in if_none_match or '*' in if_none_match) and (is_current is None or is_current(user.pk)):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = get(view, request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            # the browser revalidates on each request, the response differs per user
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
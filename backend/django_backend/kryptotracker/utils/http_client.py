@@ -0,0 +1,252 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import json
+import time
+import random
+import hashlib
+import threading
+import requests
+from pathlib import Path
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from kryptotracker.utils import circuit_breaker, rate_limiter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# default configuration, can be overwritten with HTTP_CLIENT in settings
+DEFAULTS = {
+    'TIMEOUT': (3.05, 10),  # (connect, read) timeout in seconds
+    'POOL_MAXSIZE': 10,  # keep-alive connections per host
+    'MAX_RETRIES': 3,
+    'BACKOFF_FACTOR': 0.5,  # sleep 0.5s, 1s, 2s between retries
+    'RETRY_STATUS': (429, 500, 502, 503, 504),
+    'HOST_CONCURRENCY': {
+        'api.coingecko.com': 4,
+        'min-api.cryptocompare.com': 4,
+        'api.kraken.com': 2,
+        'coinmarketcap.com': 2,
+    },
+    'DEFAULT_HOST_CONCURRENCY': 4,
+    'BACKEND': 'live',  # 'live', 'record' (live requests, responses written to RECORDINGS_DIR) or 'replay'
+    'RECORDINGS_DIR': None,  # defaults to BASE_DIR / 'http_recordings'
+    'REPLAY_LATENCY': 0.0,  # seconds per replayed response, or (min, max) for a random latency
+}
+
+BACKEND_LIVE = 'live'
+BACKEND_RECORD = 'record'
+BACKEND_REPLAY = 'replay'
+
+# hosts of external APIs and their provider name for rate limits and circuit breakers
+HOST_PROVIDERS = {
+    'api.coingecko.com': 'coingecko',
+    'min-api.cryptocompare.com': 'cryptocompare',
+    'api.kraken.com': 'kraken',
+    'coinmarketcap.com': 'coinmarketcap',
+}
+
+
+class RateLimitExceeded(requests.RequestException):
+    """Raised if the provider budget is exhausted and the request was not sent"""
+
+
+class ProviderUnavailable(requests.RequestException):
+    """Raised if the circuit of the provider is open and the request was not sent"""
+
+
+class BudgetRetry(Retry):
+    """Retry of urllib3 that takes every retry of a rate limited provider from the shared budget"""
+
+    def __init__(self, *args, provider: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.provider = provider
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.provider = self.provider
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method=method, url=url, response=response, error=error, _pool=_pool,
+                                  _stacktrace=_stacktrace)
+        if self.provider is not None and not rate_limiter.acquire(provider=self.provider):
+            if response is not None:
+                response.drain_conn()
+            raise RateLimitExceeded(f"Rate limit of {self.provider} exhausted, retry not sent")
+        return retry
+
+
+_sessions = {}
+_semaphores = {}
+_lock = threading.Lock()
+_recording_lock = threading.Lock()
+
+
+def get_config(key: str):
+    """Return HTTP client config value from settings.HTTP_CLIENT or the module defaults"""
+    return getattr(settings, 'HTTP_CLIENT', {}).get(key, DEFAULTS[key])
+
+
+def _create_session(host: str) -> requests.Session:
+    """Create a session with a keep-alive connection pool and retry with backoff on 429/5xx (idempotent methods only),
+    retries of rate limited providers are taken from their budget"""
+    provider = HOST_PROVIDERS.get(host)
+    retry = BudgetRetry(
+        total=get_config('MAX_RETRIES'),
+        backoff_factor=get_config('BACKOFF_FACTOR'),
+        status_forcelist=get_config('RETRY_STATUS'),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+        provider=provider if provider is not None and rate_limiter.is_limited(provider) else None,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=get_config('POOL_MAXSIZE'), max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(host: str) -> requests.Session:
+    """Return the shared session for a host, create it on first use"""
+    session = _sessions.get(host)
+    if session is None:
+        with _lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _sessions[host] = _create_session(host)
+    return session
+
+
+def get_semaphore(host: str) -> threading.BoundedSemaphore:
+    """Return the semaphore limiting concurrent requests to a host"""
+    semaphore = _semaphores.get(host)
+    if semaphore is None:
+        with _lock:
+            semaphore = _semaphores.get(host)
+            if semaphore is None:
+                limit = get_config('HOST_CONCURRENCY').get(host, get_config('DEFAULT_HOST_CONCURRENCY'))
+                semaphore = _semaphores[host] = threading.BoundedSemaphore(limit)
+    return semaphore
+
+
+def get_recordings_dir() -> Path:
+    """Return the directory of recorded responses"""
+    recordings_dir = get_config('RECORDINGS_DIR')
+    return Path(recordings_dir) if recordings_dir is not None else Path(settings.BASE_DIR) / 'http_recordings'
+
+
+def get_recording_path(method: str, url: str, params=None) -> Path:
+    """Return the file of a recorded response. Requests are identified by method and full url (with params),
+    request bodies are ignored because they contain volatile values like Kraken nonces."""
+    full_url = requests.Request(method.upper(), url, params=params).prepare().url
+    key = hashlib.sha1(f"{method.upper()} {full_url}".encode('utf-8')).hexdigest()
+    return get_recordings_dir() / f"{key}.json"
+
+
+def _record(method: str, url: str, params, response: requests.Response) -> None:
+    """Write a live response to the recordings directory"""
+    path = get_recording_path(method=method, url=url, params=params)
+    recording = {
+        'method': method.upper(),
+        'url': response.url,
+        'status_code': response.status_code,
+        'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+        'body': response.text,
+    }
+    with _recording_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(recording), encoding='utf-8')
+
+
+def _replay(method: str, url: str, params) -> requests.Response:
+    """Return a recorded response after the configured latency. Raises requests.ConnectionError if nothing was recorded."""
+    path = get_recording_path(method=method, url=url, params=params)
+    if not path.exists():
+        raise requests.ConnectionError(f"No recorded response for {method.upper()} {url}")
+
+    latency = get_config('REPLAY_LATENCY')
+    time.sleep(random.uniform(*latency) if isinstance(latency, (list, tuple)) else latency)
+
+    recording = json.loads(path.read_text(encoding='utf-8'))
+    response = requests.Response()
+    response.status_code = recording['status_code']
+    response.url = recording['url']
+    response.headers.update(recording['headers'])
+    response.encoding = 'utf-8'
+    response._content = recording['body'].encode('utf-8')
+    response.request = requests.Request(method.upper(), recording['url']).prepare()
+    return response
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the pooled session of the url host.
+    With backend 'replay' the recorded response is returned instead (no rate limit, no circuit breaker), with backend
+    'record' every live response is additionally written to the recordings directory.
+    :param method: HTTP method e.g. 'GET' or 'POST'.
+    :param url: Full url of the request.
+    :param kwargs: Keyword arguments passed to requests (headers, data, params, timeout, ...).
+    :return: Response object. Raises requests.RequestException on connection errors and timeouts,
+    ProviderUnavailable if the provider circuit is open and RateLimitExceeded if the shared provider budget is exhausted.
+    """
+    backend = get_config('BACKEND')
+    if backend == BACKEND_REPLAY:
+        return _replay(method=method, url=url, params=kwargs.get('params'))
+
+    host = urlsplit(url).hostname
+    kwargs.setdefault('timeout', get_config('TIMEOUT'))
+    provider = HOST_PROVIDERS.get(host)
+    breaker = circuit_breaker.get_breaker(provider) if provider is not None else None
+
+    # skip providers that are down immediately, without spending budget
+    if breaker is not None and breaker.is_open():
+        raise ProviderUnavailable(f"Circuit of {provider} is open")
+    # wait for the shared budget instead of burning requests that would fail with 429
+    if provider is not None and rate_limiter.is_limited(provider) and not rate_limiter.acquire(provider=provider):
+        raise RateLimitExceeded(f"Rate limit of {provider} exhausted")
+    # the half-open trial is only claimed once the request is sent
+    if breaker is not None and not breaker.allow_request():
+        raise ProviderUnavailable(f"Circuit of {provider} is open")
+
+    try:
+        with get_semaphore(host):
+            response = get_session(host).request(method, url, **kwargs)
+    except requests.RequestException:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # the request never got an answer (e.g. invalid arguments), a claimed trial must not block the provider
+        if breaker is not None:
+            breaker.release_trial()
+        raise
+
+    if breaker is not None:
+        if response.status_code == 429 or response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    if backend == BACKEND_RECORD:
+        _record(method=method, url=url, params=kwargs.get('params'), response=response)
+    return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request, see request()"""
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request, see request(). POST requests are not retried (e.g. Kraken nonces must not be replayed)"""
+    return request('POST', url, **kwargs)
+
+
+def close_sessions() -> None:
+    """Close all pooled connections, e.g. at the end of a management command"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
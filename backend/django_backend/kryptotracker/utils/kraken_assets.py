@@ -0,0 +1,63 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import re
+import pandas as pd
+from kryptotracker.utils import crypto_data
+
+# lock periods (days) kraken puts before the earn suffix of bonded assets e.g. DOT28.S, ATOM.21.S
+LOCK_PERIODS = ('03', '04', '07', '14', '21', '28')
+# earn variants of an asset: .S staked, .M opt-in rewards, .F flexible, .B bonded, .P parachain, optionally with a
+# known lock period before the suffix. Other digits belong to the ticker e.g. C98.S, API3.S
+EARN_SUFFIX_PATTERN = re.compile(rf'^(?P<base>.+?)(?:\.?(?:{"|".join(LOCK_PERIODS)}))?\.(?:S|M|F|B|P)$')
+# legacy asset codes of kraken: X + crypto code and Z + fiat code. Only these codes are mapped, current tickers
+# starting with X or Z (e.g. XION, ZORA) are kept as they are
+LEGACY_ASSETS = {
+    'XXBT': 'XBT', 'XETH': 'ETH', 'XETC': 'ETC', 'XLTC': 'LTC', 'XXRP': 'XRP', 'XXLM': 'XLM', 'XXMR': 'XMR',
+    'XZEC': 'ZEC', 'XREP': 'REP', 'XMLN': 'MLN', 'XXDG': 'XDG', 'XDAO': 'DAO', 'XICN': 'ICN', 'XNMC': 'NMC',
+    'XXVN': 'XVN', 'ZEUR': 'EUR', 'ZUSD': 'USD', 'ZGBP': 'GBP', 'ZCAD': 'CAD', 'ZJPY': 'JPY', 'ZAUD': 'AUD',
+    'ZCHF': 'CHF', 'ZKRW': 'KRW',
+}
+
+
+class KrakenAssetNormalizer:
+    """
+    Map kraken asset codes to the acronyms of CoinGecko/CoinMarketCap by rule: earn suffixes (and lock periods) are
+    removed and legacy codes (LEGACY_ASSETS) are mapped. Explicit overrides (map_kraken_coins) are applied before and
+    after each rule. Unknown codes are returned unchanged.
+    """
+
+    def __init__(self, overrides: dict):
+        self.overrides = overrides
+        self._normalized = {}
+
+    def is_earn_variant(self, symbol: str) -> bool:
+        """Return True if the code is an earn variant (staked, bonded, ...) of an asset e.g. DOT.S"""
+        return isinstance(symbol, str) and EARN_SUFFIX_PATTERN.match(symbol) is not None
+
+    def _normalize(self, symbol: str) -> str:
+        if symbol in self.overrides:
+            return self.overrides[symbol]
+        match = EARN_SUFFIX_PATTERN.match(symbol)
+        if match is not None:
+            symbol = match.group('base')
+            if symbol in self.overrides:
+                return self.overrides[symbol]
+        symbol = LEGACY_ASSETS.get(symbol, symbol)
+        return self.overrides.get(symbol, symbol)
+
+    def normalize_symbol(self, symbol):
+        """Return the normalized acronym of one kraken asset code, values that are no string are returned unchanged"""
+        if not isinstance(symbol, str):
+            return symbol
+        normalized = self._normalized.get(symbol)
+        if normalized is None:
+            normalized = self._normalized[symbol] = self._normalize(symbol.upper())
+        return normalized
+
+    def normalize(self, series: pd.Series) -> pd.Series:
+        """Normalize a column of kraken asset codes, each distinct code is normalized once and NaN is kept"""
+        mapping = {symbol: self.normalize_symbol(symbol) for symbol in series.dropna().unique()}
+        return series.map(mapping).fillna(series)
+
+
+normalizer = KrakenAssetNormalizer(overrides=crypto_data.map_kraken_coins())
@@ -0,0 +1,56 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def get_page_size(value) -> int:
+    """Return the page size from a query parameter, DEFAULT_PAGE_SIZE if unset. Raises ValueError on invalid values."""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError(f"Invalid page size {value}")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_cursor(date: datetime, pk: int) -> str:
+    """Return the opaque cursor of a row in a (date, id) descending order"""
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{pk}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return (date, id) of a cursor. Raises ValueError on invalid cursors."""
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, pk = value.split('|')
+        return datetime.fromisoformat(date), int(pk)
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor {cursor}") from e
+
+
+def paginate_keyset(queryset, cursor: str, page_size: int, date_field: str) -> tuple:
+    """
+    Return one page of a queryset ordered by date and id descending, the rows after the cursor are found with the
+    index on (date, id) instead of an offset. Exactly page_size + 1 rows are fetched to know if a next page exists.
+    :param queryset: Queryset of model instances or values() rows to paginate.
+    :param cursor: Cursor of the last row of the previous page (next_cursor) or None for the first page.
+    :param page_size: Number of rows per page.
+    :param date_field: Name of the date field of the order.
+    :return: Tuple of the list of rows and the cursor of the next page (None on the last page).
+    """
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{date_field}__lt': date}) | Q(**{date_field: date, 'id__lt': pk}))
+    rows = list(queryset.order_by(f'-{date_field}', '-id')[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    if isinstance(last, dict):
+        return rows, encode_cursor(date=last[date_field], pk=last['id'])
+    return rows, encode_cursor(date=getattr(last, date_field), pk=last.pk)
@@ -0,0 +1,154 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# cache alias shared by all workers, can be overwritten with PRICE_CACHE_ALIAS in settings
+DEFAULT_CACHE_ALIAS = 'prices'
+# version of the key layout and cached values, increase on incompatible changes. All cached prices can also be
+# invalidated without a deployment with clear() or by increasing VERSION of the cache in settings.
+KEY_VERSION = 1
+
+CURRENT_PRICE_TIMEOUT = timedelta(hours=6)
+PAIR_TIMEOUT = timedelta(days=1)
+# historical prices never change, they are only evicted by the cache backend (MAX_ENTRIES)
+HISTORICAL_PRICE_TIMEOUT = timedelta(days=30)
+# seconds one worker holds the refresh lock of an asset
+REFRESH_LOCK_TIMEOUT = 60
+# trends are calculated with each price refresh and live as long as the current price
+TREND_TIMEOUT = CURRENT_PRICE_TIMEOUT
+# the price history of an asset is requested at most once in this period
+BACKFILL_ATTEMPT_TIMEOUT = timedelta(days=1)
+
+
+def get_cache():
+    """Return the price cache, the default cache if no 'prices' cache is configured"""
+    try:
+        return caches[getattr(settings, 'PRICE_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def make_key(*parts) -> str:
+    """Return a versioned cache key e.g. 'prices:v1:current:bitcoin'"""
+    return ':'.join(['prices', f'v{KEY_VERSION}', *[str(part) for part in parts]])
+
+
+def get_current_prices(api_id_names) -> dict:
+    """
+    Return the cached current prices of assets.
+    :param api_id_names: Iterable of CoinGecko ids.
+    :return: Dictionary with api_id_name as key and dict with current_price, image and updated_at as value.
+    """
+    keys = {make_key('current', api_id_name): api_id_name for api_id_name in api_id_names}
+    if not keys:
+        return {}
+    return {keys[key]: value for key, value in get_cache().get_many(list(keys)).items()}
+
+
+def set_current_prices(asset_infos) -> None:
+    """Write the current prices of refreshed AssetInfo objects to the cache"""
+    values = {make_key('current', asset_info.api_id_name): {
+        'current_price': asset_info.current_price,
+        'image': asset_info.image,
+        'updated_at': asset_info.updated_at,
+    } for asset_info in asset_infos}
+    if values:
+        get_cache().set_many(values, timeout=CURRENT_PRICE_TIMEOUT.total_seconds())
+
+
+def apply_current_prices(asset_infos) -> list:
+    """
+    Update AssetInfo objects in place with cached prices that are newer than their own (refreshed by another worker).
+    :param asset_infos: Iterable of AssetInfo objects.
+    :return: List of updated AssetInfo objects.
+    """
+    asset_infos = [asset_info for asset_info in asset_infos if asset_info is not None]
+    cached = get_current_prices(api_id_names={asset_info.api_id_name for asset_info in asset_infos})
+    updated = []
+    for asset_info in asset_infos:
+        data = cached.get(asset_info.api_id_name)
+        if data is not None and data['updated_at'] > asset_info.updated_at:
+            asset_info.current_price = data['current_price']
+            asset_info.image = data['image']
+            asset_info.updated_at = data['updated_at']
+            updated.append(asset_info)
+    return updated
+
+
+def acquire_refresh_lock(api_id_name: str) -> bool:
+    """Return True if this worker may refresh the asset, False if another worker is already refreshing it"""
+    return get_cache().add(make_key('refresh-lock', api_id_name), timezone.now(), timeout=REFRESH_LOCK_TIMEOUT)
+
+
+def release_refresh_locks(api_id_names) -> None:
+    """Release the refresh locks of assets"""
+    get_cache().delete_many([make_key('refresh-lock', api_id_name) for api_id_name in api_id_names])
+
+
+def get_trends(api_id_names) -> dict:
+    """Return the cached trends {window name: percent change} of assets with api_id_name as key"""
+    keys = {make_key('trend', api_id_name): api_id_name for api_id_name in api_id_names}
+    if not keys:
+        return {}
+    return {keys[key]: value for key, value in get_cache().get_many(list(keys)).items()}
+
+
+def set_trends(trends: dict) -> None:
+    """Write trends {api_id_name: {window name: percent change}} to the cache, unknown trends (None) too"""
+    if trends:
+        get_cache().set_many({make_key('trend', api_id_name): trend for api_id_name, trend in trends.items()},
+                             timeout=TREND_TIMEOUT.total_seconds())
+
+
+def acquire_backfill_attempt(api_id_name: str) -> bool:
+    """Return True if the price history of the asset may be requested, False if it was tried in the last day"""
+    return get_cache().add(make_key('backfill', api_id_name), timezone.now(),
+                           timeout=BACKFILL_ATTEMPT_TIMEOUT.total_seconds())
+
+
+def get_pairs(pairs) -> dict:
+    """Return the cached Kraken pair metadata with pair name as key"""
+    keys = {make_key('pair', pair): pair for pair in pairs}
+    if not keys:
+        return {}
+    return {keys[key]: value for key, value in get_cache().get_many(list(keys)).items()}
+
+
+def set_pairs(pairs: dict) -> None:
+    """Write Kraken pair metadata {pair name: metadata} to the cache"""
+    if pairs:
+        get_cache().set_many({make_key('pair', pair): data for pair, data in pairs.items()},
+                             timeout=PAIR_TIMEOUT.total_seconds())
+
+
+def get_historical_prices(provider: str, asset_key: str, buckets) -> dict:
+    """Return the cached historical prices of an asset for the given minute buckets as dict {bucket: price}"""
+    keys = {make_key('historical', provider, asset_key, bucket): bucket for bucket in buckets}
+    if not keys:
+        return {}
+    return {keys[key]: value for key, value in get_cache().get_many(list(keys)).items()}
+
+
+def set_historical_prices(provider: str, asset_key: str, prices: dict) -> None:
+    """Write historical prices {bucket: price} of an asset to the cache"""
+    values = {make_key('historical', provider, asset_key, bucket): price
+              for bucket, price in prices.items() if price is not None}
+    if values:
+        get_cache().set_many(values, timeout=HISTORICAL_PRICE_TIMEOUT.total_seconds())
+
+
+def evict_current_prices(api_id_names) -> None:
+    """Remove the cached current prices of assets, e.g. after a manual price correction"""
+    get_cache().delete_many([make_key('current', api_id_name) for api_id_name in api_id_names])
+
+
+def clear() -> None:
+    """Remove all entries of the price cache"""
+    get_cache().clear()
@@ -0,0 +1,111 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+from django.db import connections
+import logging
+
+logger = logging.getLogger(__name__)
+
+# seconds a sync caller waits for the engine before giving up
+DEFAULT_TIMEOUT = 60
+
+
+def _fetch_in_executor(context: contextvars.Context, fetch_batch, keys: list):
+    """Call fetch_batch(keys) in a thread of the loop's pool within the context of the caller (e.g. its rate limit
+    timeout) and close the database connections of the thread afterwards (e.g. opened by the rate limiter), Django
+    does not close connections of threads it did not start"""
+    try:
+        return context.run(fetch_batch, keys)
+    finally:
+        connections.close_all()
+
+
+class PriceFetchEngine:
+    """
+    Asyncio fetch engine running its event loop in a daemon thread. Concurrent requests for the same key share one
+    in-flight future (single-flight), so parallel dashboard loads of different users trigger one upstream call per
+    asset instead of one per user and asset. Blocking provider functions run in the loop's thread pool.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._in_flight = {}  # (namespace, key) -> asyncio.Future, only accessed from the loop thread
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the engine loop, start it in a daemon thread on first use (and again after a fork)"""
+        if self._loop is None or not self._thread.is_alive():
+            with self._lock:
+                if self._loop is None or not self._thread.is_alive():
+                    self._loop = asyncio.new_event_loop()
+                    self._in_flight = {}
+                    self._thread = threading.Thread(target=self._loop.run_forever, name='price-fetch-engine',
+                                                    daemon=True)
+                    self._thread.start()
+        return self._loop
+
+    async def _run_batch(self, namespace: str, keys: list, futures: dict, fetch_batch,
+                         context: contextvars.Context) -> None:
+        """Call fetch_batch(keys) in the thread pool and fan the results out to all waiting futures"""
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(None, _fetch_in_executor, context, fetch_batch, keys) or {}
+        except Exception as e:
+            logger.error(f"Error in price fetch engine ({namespace}): {e}")
+            data = {}
+        finally:
+            for key in keys:
+                self._in_flight.pop((namespace, key), None)
+        for key, future in futures.items():
+            if not future.done():
+                future.set_result(data.get(key))
+
+    async def _fetch_many(self, namespace: str, keys: list, fetch_batch, context: contextvars.Context) -> dict:
+        """Join in-flight requests for known keys and start one batch for all other keys in the context of the
+        caller that starts it"""
+        loop = asyncio.get_running_loop()
+        new_futures = {}
+        for key in dict.fromkeys(keys):
+            if (namespace, key) not in self._in_flight:
+                new_futures[key] = self._in_flight[(namespace, key)] = loop.create_future()
+        if new_futures:
+            loop.create_task(self._run_batch(namespace, list(new_futures.keys()), new_futures, fetch_batch, context))
+
+        waiting = {key: self._in_flight[(namespace, key)] for key in dict.fromkeys(keys)}
+        # shield the shared futures, one cancelled waiter must not cancel the result for all others
+        results = await asyncio.gather(*[asyncio.shield(future) for future in waiting.values()])
+        return dict(zip(waiting.keys(), results))
+
+    def fetch_many(self, namespace: str, keys, fetch_batch, timeout: float = DEFAULT_TIMEOUT) -> dict:
+        """
+        Fetch data for many keys from sync code (thin bridge for Django views and commands).
+        :param namespace: Name of the upstream endpoint, keys are only coalesced within the same namespace.
+        :param keys: Iterable of hashable keys e.g. CoinGecko ids.
+        :param fetch_batch: Blocking callable receiving a list of keys and returning a dict {key: data}.
+        :param timeout: Seconds to wait for the result.
+        :return: Dictionary with every requested key and its data (None if the upstream call failed).
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(
+            self._fetch_many(namespace, keys, fetch_batch, contextvars.copy_context()), self._get_loop())
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            logger.error(f"Timeout in price fetch engine ({namespace}) for {len(keys)} keys")
+            return {key: None for key in keys}
+
+    async def afetch_many(self, namespace: str, keys, fetch_batch) -> dict:
+        """Async variant of fetch_many() usable from any event loop (e.g. async views)"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._fetch_many(namespace, list(keys), fetch_batch, contextvars.copy_context()), self._get_loop())
+        return await asyncio.wrap_future(future)
+
+
+engine = PriceFetchEngine()
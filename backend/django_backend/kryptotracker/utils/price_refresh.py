@@ -0,0 +1,125 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from kryptotracker.models import AssetInfo
+from kryptotracker.utils import crypto_data, rate_limiter, trends
+import logging
+
+logger = logging.getLogger(__name__)
+
+# refresh modes, see settings.PRICE_REFRESH_MODE
+MODE_INLINE = 'inline'  # stale prices are refreshed in the request thread
+MODE_STALE_WHILE_REVALIDATE = 'stale-while-revalidate'  # cached prices are returned, stale ones refreshed in background
+MODE_DAEMON = 'daemon'  # cached prices are returned, the price_daemon command keeps them fresh
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='price-refresh')
+_pending = set()  # ids of AssetInfos queued or being refreshed
+_pending_backfill = set()  # ids of AssetInfos queued or being backfilled
+_lock = threading.Lock()
+
+
+def get_refresh_mode() -> str:
+    """Return the configured price refresh mode"""
+    return getattr(settings, 'PRICE_REFRESH_MODE', MODE_INLINE)
+
+
+def _refresh_in_background(asset_info_ids: list) -> None:
+    """Refresh AssetInfos in a worker thread and close its database connection afterwards"""
+    # background workers may wait for the rate limit budget, request threads fail fast
+    rate_limiter.set_acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    try:
+        crypto_data.refresh_asset_infos(asset_infos=AssetInfo.objects.filter(id__in=asset_info_ids))
+    except Exception as e:
+        logger.error(f"Background refresh error: {e}")
+    finally:
+        with _lock:
+            _pending.difference_update(asset_info_ids)
+        connections.close_all()
+
+
+def schedule_refresh(asset_infos) -> int:
+    """
+    Queue stale AssetInfos for a background refresh. Assets already queued are skipped.
+    :param asset_infos: Iterable of AssetInfo objects.
+    :return: Number of newly queued assets.
+    """
+    with _lock:
+        asset_info_ids = [asset_info.pk for asset_info in dict.fromkeys(asset_infos) if asset_info.pk not in _pending]
+        _pending.update(asset_info_ids)
+    if asset_info_ids:
+        _executor.submit(_refresh_in_background, asset_info_ids)
+    return len(asset_info_ids)
+
+
+def _backfill_in_background(asset_info_ids: list) -> None:
+    """Backfill the price history of AssetInfos in a worker thread and close its database connection afterwards"""
+    # background workers may wait for the rate limit budget, request threads fail fast
+    rate_limiter.set_acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    try:
+        trends.backfill_missing_history(asset_infos=AssetInfo.objects.filter(id__in=asset_info_ids))
+    except Exception as e:
+        logger.error(f"Background backfill error: {e}")
+    finally:
+        with _lock:
+            _pending_backfill.difference_update(asset_info_ids)
+        connections.close_all()
+
+
+def schedule_backfill(asset_infos) -> int:
+    """
+    Queue AssetInfos without trends for a background backfill of their price history. Assets already queued are
+    skipped, in daemon mode the price_daemon backfills.
+    :param asset_infos: Iterable of AssetInfo objects.
+    :return: Number of newly queued assets.
+    """
+    if get_refresh_mode() == MODE_DAEMON:
+        return 0
+    with _lock:
+        asset_info_ids = [asset_info.pk for asset_info in dict.fromkeys(asset_infos)
+                          if asset_info.pk not in _pending_backfill and asset_info.api_id_name != 'euro']
+        _pending_backfill.update(asset_info_ids)
+    if asset_info_ids:
+        _executor.submit(_backfill_in_background, asset_info_ids)
+    return len(asset_info_ids)
+
+
+def read_asset_prices(asset_infos, schedule: bool = True) -> dict:
+    """
+    Return the cached prices of AssetInfos immediately and queue stale ones for a background refresh.
+    :param asset_infos: Iterable of AssetInfo objects.
+    :param schedule: Queue stale assets for a background refresh.
+    :return: Dictionary with AssetInfo id as key and dict with price, age in seconds and stale flag as value.
+    """
+    current_time = timezone.now()
+    prices = {}
+    stale = []
+    for asset_info in asset_infos:
+        is_stale = crypto_data.is_asset_info_stale(asset_info=asset_info, current_time=current_time)
+        if is_stale:
+            stale.append(asset_info)
+        prices[asset_info.pk] = {
+            'price': asset_info.current_price,
+            'age': (current_time - asset_info.updated_at).total_seconds(),
+            'stale': is_stale,
+        }
+    if schedule:
+        schedule_refresh(asset_infos=stale)
+    return prices
+
+
+def ensure_prices(asset_infos) -> dict:
+    """Refresh or read AssetInfo prices according to the refresh mode and return them like read_asset_prices().
+    Assets without any cached price are always refreshed in the request, there is nothing to serve for them."""
+    asset_infos = [asset_info for asset_info in asset_infos if asset_info is not None]
+    mode = get_refresh_mode()
+    if mode == MODE_INLINE:
+        crypto_data.refresh_asset_infos(asset_infos=asset_infos)
+        return read_asset_prices(asset_infos=asset_infos, schedule=False)
+
+    crypto_data.refresh_asset_infos(asset_infos=[asset_info for asset_info in asset_infos
+                                                 if not asset_info.current_price and asset_info.api_id_name != 'euro'])
+    return read_asset_prices(asset_infos=asset_infos, schedule=mode == MODE_STALE_WHILE_REVALIDATE)
@@ -0,0 +1,66 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+from datetime import datetime
+from kryptotracker.models import HistoricalPrice
+from kryptotracker.utils import price_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_COINGECKO = 'coingecko'
+PROVIDER_CRYPTOCOMPARE = 'cryptocompare'
+
+
+def to_bucket(tx_date: str) -> int:
+    """Return unix timestamp floored to the minute for a date in format 'YYYY-MM-DDTHH:MM'"""
+    timestamp = int(datetime.strptime(tx_date, '%Y-%m-%dT%H:%M').timestamp())
+    return timestamp - timestamp % 60
+
+
+def get_price(provider: str, asset_key: str, bucket: int):
+    """Return stored price of an asset at the minute bucket or None if not stored yet"""
+    return get_prices(provider=provider, asset_key=asset_key, buckets=[bucket]).get(bucket)
+
+
+def get_prices(provider: str, asset_key: str, buckets) -> dict:
+    """Return all stored prices of an asset for the given minute buckets as dict {bucket: price}.
+    Prices are read from the shared price cache first, only missing buckets are queried from the database."""
+    buckets = set(buckets)
+    prices = price_cache.get_historical_prices(provider=provider, asset_key=asset_key, buckets=buckets)
+    missing = buckets.difference(prices)
+    if missing:
+        stored = dict(HistoricalPrice.objects.filter(provider=provider, asset_key=asset_key, bucket__in=list(missing))
+                      .values_list('bucket', 'price'))
+        price_cache.set_historical_prices(provider=provider, asset_key=asset_key, prices=stored)
+        prices.update(stored)
+    return prices
+
+
+def store_prices(provider: str, asset_key: str, prices: dict) -> None:
+    """Store prices {bucket: price} of an asset. Buckets already stored (e.g. by a concurrent import) are kept."""
+    HistoricalPrice.objects.bulk_create(
+        [HistoricalPrice(provider=provider, asset_key=asset_key, bucket=bucket, price=price)
+         for bucket, price in prices.items() if price is not None],
+        ignore_conflicts=True
+    )
+    price_cache.set_historical_prices(provider=provider, asset_key=asset_key, prices=prices)
+
+
+def read_through(provider: str, asset_key: str, tx_date: str, fetch):
+    """
+    Return the price of an asset at tx_date from the store. On a miss call fetch() and store its result.
+    :param provider: Name of the price provider, prices of different providers are stored separately.
+    :param asset_key: Provider specific asset key (CoinGecko id or CryptoCompare symbol).
+    :param tx_date: Date in format 'YYYY-MM-DDTHH:MM'.
+    :param fetch: Callable without arguments returning the price from the provider or None.
+    :return: Price or None if the provider could not deliver one.
+    """
+    bucket = to_bucket(tx_date)
+    price = get_price(provider=provider, asset_key=asset_key, bucket=bucket)
+    if price is not None:
+        return price
+
+    price = fetch()
+    if price is not None:
+        store_prices(provider=provider, asset_key=asset_key, prices={bucket: price})
+    return price
@@ -0,0 +1,226 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import threading
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from kryptotracker.models import AssetInfo
+from kryptotracker.utils import circuit_breaker, coinmarketcap, http_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+# capabilities a provider can implement
+CURRENT_PRICES = 'current_prices'
+HISTORICAL_PRICE = 'historical_price'
+HISTORICAL_PRICES = 'historical_prices'
+PAIR_METADATA = 'pair_metadata'
+
+# default provider classes, can be overwritten with PRICE_PROVIDERS in settings (name -> dotted path of the class)
+DEFAULT_PROVIDERS = {
+    'coingecko': 'kryptotracker.utils.providers.CoinGeckoProvider',
+    'cryptocompare': 'kryptotracker.utils.providers.CryptoCompareProvider',
+    'coinmarketcap': 'kryptotracker.utils.providers.CoinMarketCapProvider',
+    'kraken': 'kryptotracker.utils.providers.KrakenProvider',
+}
+
+
+class ProviderError(Exception):
+    """Raised if a provider response does not contain the requested data"""
+
+
+class PriceProvider:
+    """
+    Base class of an external price provider. Subclasses implement the capabilities they support, all requests are
+    sent through the http client (pooled sessions, rate limits, circuit breakers and record/replay).
+    Methods raise requests.RequestException on request errors and ProviderError on unusable responses.
+    """
+    name = None
+    base_url = None
+    capabilities = ()
+
+    def supports(self, capability: str) -> bool:
+        """Return True if the provider implements the capability"""
+        return capability in self.capabilities
+
+    def get_json(self, path: str, **kwargs):
+        """Send a GET request to the provider and return the decoded JSON body"""
+        response = http_client.get(f"{self.base_url}{path}", **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def current_prices(self, asset_keys: list) -> dict:
+        """Return current EUR prices as {asset key: {'fullname', 'api_id_name', 'acronym', 'current_price', 'image'}}"""
+        raise NotImplementedError
+
+    def historical_price(self, asset_key: str, timestamp: int) -> float:
+        """Return the EUR price of an asset at a unix timestamp"""
+        raise NotImplementedError
+
+    def historical_prices(self, asset_key: str, start_timestamp: int, end_timestamp: int) -> list:
+        """Return all EUR prices between two unix timestamps as list of [timestamp in ms, price]"""
+        raise NotImplementedError
+
+    def pair_metadata(self, pairs: list) -> dict:
+        """Return metadata of trading pairs with the pair name as key"""
+        raise NotImplementedError
+
+
+class CoinGeckoProvider(PriceProvider):
+    name = 'coingecko'
+    base_url = 'https://api.coingecko.com/api/v3'
+    capabilities = (CURRENT_PRICES, HISTORICAL_PRICE, HISTORICAL_PRICES)
+    # /coins/markets accepts up to 250 ids per request
+    markets_max_ids = 250
+
+    def current_prices(self, asset_keys: list) -> dict:
+        data = self.get_json('/coins/markets', params={
+            'vs_currency': 'eur', 'ids': ','.join(asset_keys), 'order': 'market_cap_desc',
+            'per_page': self.markets_max_ids, 'page': 1, 'sparkline': 'false', 'locale': 'de'})
+        return {
+            item['id']: {
+                'fullname': item['name'],
+                'api_id_name': item['id'],
+                'acronym': item['symbol'],
+                'current_price': float(item['current_price']),
+                'image': item['image']
+            } for item in data if item.get('current_price') is not None
+        }
+
+    def historical_price(self, asset_key: str, timestamp: int) -> float:
+        # 5 mins before and after the target time
+        prices = self.historical_prices(asset_key=asset_key, start_timestamp=timestamp - 300,
+                                        end_timestamp=timestamp + 300)
+        if not prices:
+            raise ProviderError("No price data found")
+        return prices[0][1]
+
+    def historical_prices(self, asset_key: str, start_timestamp: int, end_timestamp: int) -> list:
+        data = self.get_json(f'/coins/{asset_key.lower()}/market_chart/range',
+                             params={'vs_currency': 'eur', 'from': start_timestamp, 'to': end_timestamp})
+        return data['prices']
+
+    def simple_price(self, base_asset_key: str, target_currency: str):
+        """Return the price of an asset in another currency or None if the pair is not available"""
+        data = self.get_json('/simple/price', params={'ids': base_asset_key, 'vs_currencies': target_currency})
+        return data.get(base_asset_key, {}).get(target_currency)
+
+
+class CryptoCompareProvider(PriceProvider):
+    name = 'cryptocompare'
+    base_url = 'https://min-api.cryptocompare.com/data'
+    capabilities = (HISTORICAL_PRICE,)
+
+    def historical_price(self, asset_key: str, timestamp: int) -> float:
+        data = self.get_json('/pricehistorical', params={'fsym': asset_key, 'tsyms': 'EUR', 'ts': timestamp})
+        price = data.get(asset_key, {}).get('EUR')
+        if not price:
+            raise ProviderError(f"Could not get price for {asset_key}")
+        return float(price)
+
+
+class CoinMarketCapProvider(PriceProvider):
+    name = 'coinmarketcap'
+    base_url = 'https://coinmarketcap.com'
+    capabilities = (CURRENT_PRICES,)
+    # CoinGecko id of the stablecoin whose EUR price converts the USD prices of the page state
+    usd_asset_key = 'tether'
+
+    def coin_page(self, asset_key: str) -> dict:
+        """Return the parsed coin page (price, currency, image, name, symbol) of one asset slug"""
+        response = http_client.get(f"{self.base_url}/de/currencies/{asset_key}/")
+        response.raise_for_status()
+        data = coinmarketcap.parse_coin_page(html=response.text)
+        if data is None:
+            raise ProviderError(f"Could not parse coinmarketcap page of {asset_key}")
+        return data
+
+    def get_usd_rate(self):
+        """Return the EUR price of one USD: the cached price of tether (USDT), on a fresh database without a tether
+        price one CoinGecko request. None if no rate is available."""
+        usdt_price = AssetInfo.objects.filter(api_id_name=self.usd_asset_key) \
+            .values_list('current_price', flat=True).first()
+        if usdt_price:
+            return usdt_price
+        try:
+            rate = get_provider('coingecko').simple_price(base_asset_key=self.usd_asset_key, target_currency='eur')
+        except (requests.RequestException, ProviderError, ValueError) as e:
+            logger.error(f"Error retrieving USD/EUR rate from CoinGecko: {e}")
+            return None
+        return float(rate) if rate else None
+
+    def current_prices(self, asset_keys: list) -> dict:
+        """One page per asset slug, assets whose page fails or cannot be converted to EUR are missing in the result"""
+        data = {}
+        usd_rate = None  # resolved once, on the first page quoted in USD
+        not_converted = []
+        for asset_key in asset_keys:
+            try:
+                page = self.coin_page(asset_key=asset_key)
+            except ProviderError as e:
+                logger.error(f"Error retrieving data from webscraping: {e}")
+                # request errors are counted by the http client, count broken pages here
+                circuit_breaker.get_breaker(self.name).record_failure()
+                continue
+            except requests.RequestException as e:
+                logger.error(f"Error retrieving data from webscraping: {e}")
+                continue
+
+            if page['currency'] == 'EUR':
+                price = page['price']
+            else:
+                if usd_rate is None:
+                    usd_rate = self.get_usd_rate() or 0.0
+                if not usd_rate:
+                    not_converted.append(asset_key)
+                    continue
+                price = page['price'] * usd_rate
+            data[asset_key] = {
+                'fullname': page['name'],
+                'api_id_name': asset_key,
+                'acronym': page['symbol'],
+                'current_price': price,
+                'image': page['image']
+            }
+        if not_converted:
+            logger.error(f"No USD/EUR rate ({self.usd_asset_key} has no price), coinmarketcap prices of "
+                         f"{', '.join(not_converted)} not updated")
+        return data
+
+
+class KrakenProvider(PriceProvider):
+    name = 'kraken'
+    base_url = 'https://api.kraken.com'
+    capabilities = (PAIR_METADATA,)
+
+    def pair_metadata(self, pairs: list) -> dict:
+        data = self.get_json('/0/public/AssetPairs', params={'pair': ','.join(pairs)})
+        if not data.get('result'):
+            raise ProviderError("Asset Pairs could not be separated")
+        return data['result']
+
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def get_provider_classes() -> dict:
+    """Return the configured provider classes (dotted paths) by name"""
+    return {**DEFAULT_PROVIDERS, **getattr(settings, 'PRICE_PROVIDERS', {})}
+
+
+def get_provider(name: str) -> PriceProvider:
+    """Return the provider instance of a name, create it on first use"""
+    provider = _providers.get(name)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _providers[name] = import_string(get_provider_classes()[name])()
+    return provider
+
+
+def get_providers(capability: str) -> list:
+    """Return all configured providers implementing a capability, in configuration order"""
+    providers = [get_provider(name) for name in get_provider_classes().keys()]
+    return [provider for provider in providers if provider.supports(capability)]
@@ -0,0 +1,141 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+import time
+import contextlib
+import contextvars
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from kryptotracker.models import RateLimitBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# default budgets, can be overwritten with RATE_LIMITS in settings
+DEFAULT_RATE_LIMITS = {
+    'coingecko': {'rate': 10 / 60, 'capacity': 10},
+    'cryptocompare': {'rate': 1.0, 'capacity': 20},
+    'kraken': {'rate': 0.33, 'capacity': 15},
+}
+
+# seconds background jobs (price daemon, background refresh, commands) are delayed at most before acquire() gives up
+DEFAULT_ACQUIRE_TIMEOUT = 30
+# seconds request/response threads are delayed at most, they fail fast and serve the cached price instead. Imports and
+# transactions that need historical prices wait up to DEFAULT_ACQUIRE_TIMEOUT (acquire_timeout()).
+# Can be overwritten with RATE_LIMIT_REQUEST_TIMEOUT in settings
+DEFAULT_REQUEST_TIMEOUT = 0
+
+# timeout of acquire() in the current thread, set by background jobs with set_acquire_timeout()
+_acquire_timeout = contextvars.ContextVar('rate_limit_acquire_timeout', default=None)
+_empty_until = {}  # provider -> monotonic time before which the bucket is known to be empty in this process
+
+
+def get_limits(provider: str) -> dict:
+    """Return rate (tokens per second) and capacity of a provider"""
+    return getattr(settings, 'RATE_LIMITS', DEFAULT_RATE_LIMITS).get(provider, DEFAULT_RATE_LIMITS.get(provider))
+
+
+def is_limited(provider: str) -> bool:
+    """Return True if a budget is configured for the provider"""
+    return get_limits(provider) is not None
+
+
+def _refill(tokens: float, refilled_at: float, limits: dict, now: float) -> float:
+    """Return tokens of a bucket after refilling it from refilled_at until now"""
+    return min(limits['capacity'], tokens + (now - refilled_at) * limits['rate'])
+
+
+def _take(provider: str, tokens: float) -> float:
+    """Take tokens from the provider bucket in one row-locked transaction.
+    Return 0 on success, otherwise the seconds until enough tokens are available (nothing is taken)."""
+    limits = get_limits(provider)
+    now = time.time()
+    with transaction.atomic():
+        try:
+            bucket, created = RateLimitBucket.objects.select_for_update().get_or_create(
+                provider=provider, defaults={'tokens': limits['capacity'], 'refilled_at': now})
+        except IntegrityError:
+            # bucket created by another worker in the meantime
+            bucket = RateLimitBucket.objects.select_for_update().get(provider=provider)
+
+        bucket.tokens = _refill(tokens=bucket.tokens, refilled_at=bucket.refilled_at, limits=limits, now=now)
+        bucket.refilled_at = now
+        wait = 0.0
+        if bucket.tokens >= tokens:
+            bucket.tokens -= tokens
+        else:
+            wait = (tokens - bucket.tokens) / limits['rate']
+        bucket.save(update_fields=['tokens', 'refilled_at'])
+    return wait
+
+
+def set_acquire_timeout(timeout: float):
+    """Set the seconds acquire() may delay the current thread, e.g. DEFAULT_ACQUIRE_TIMEOUT in background jobs.
+    Returns the token to restore the previous value with _acquire_timeout.reset()."""
+    return _acquire_timeout.set(timeout)
+
+
+@contextlib.contextmanager
+def acquire_timeout(timeout: float):
+    """Let acquire() delay the current thread up to timeout seconds within the block and restore the previous value
+    afterwards. Usable as decorator, e.g. for imports in request threads that must not skip historical prices."""
+    token = _acquire_timeout.set(timeout)
+    try:
+        yield
+    finally:
+        _acquire_timeout.reset(token)
+
+
+def get_acquire_timeout() -> float:
+    """Return the seconds acquire() may delay the current thread, RATE_LIMIT_REQUEST_TIMEOUT if no job set one"""
+    timeout = _acquire_timeout.get()
+    if timeout is None:
+        return getattr(settings, 'RATE_LIMIT_REQUEST_TIMEOUT', DEFAULT_REQUEST_TIMEOUT)
+    return timeout
+
+
+def acquire(provider: str, tokens: float = 1, timeout: float = None) -> bool:
+    """
+    Take tokens from the provider budget, delay the caller until they are available. While the bucket is known to be
+    empty, callers that can not wait long enough give up without a database round trip.
+    :param provider: Name of the provider e.g. 'coingecko'.
+    :param tokens: Number of requests to take from the budget.
+    :param timeout: Maximum seconds to wait, default get_acquire_timeout() (0 in request threads).
+    :return: True if the tokens were taken, False if the timeout would be exceeded.
+    """
+    if timeout is None:
+        timeout = get_acquire_timeout()
+    deadline = time.monotonic() + timeout
+    if _empty_until.get(provider, 0.0) > deadline:
+        return False
+    while True:
+        wait = _take(provider=provider, tokens=tokens)
+        if wait == 0.0:
+            return True
+        # other workers only take tokens, the bucket is empty at least until then
+        _empty_until[provider] = time.monotonic() + wait
+        if time.monotonic() + wait > deadline:
+            logger.error(f"Rate limit of {provider} exhausted, request not sent")
+            return False
+        time.sleep(wait)
+
+
+def remaining(provider: str) -> float:
+    """Return the currently available budget (number of requests) of a provider"""
+    limits = get_limits(provider)
+    bucket = RateLimitBucket.objects.filter(provider=provider).first()
+    if bucket is None:
+        return float(limits['capacity'])
+    return _refill(tokens=bucket.tokens, refilled_at=bucket.refilled_at, limits=limits, now=time.time())
+
+
+def wait_time(provider: str, tokens: float = 1) -> float:
+    """Return the seconds until the given number of requests can be sent to a provider"""
+    missing = tokens - remaining(provider=provider)
+    return max(0.0, missing / get_limits(provider)['rate'])
+
+
+def status() -> dict:
+    """Return remaining budget and wait time for one request of all configured providers"""
+    providers = getattr(settings, 'RATE_LIMITS', DEFAULT_RATE_LIMITS).keys()
+    return {provider: {'remaining': remaining(provider=provider), 'wait_time': wait_time(provider=provider)}
+            for provider in providers}
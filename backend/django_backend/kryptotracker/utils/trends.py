@@ -0,0 +1,144 @@
+# Author: Roberto Piazza
+# Date: 18.10.2026
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from django.db.models import Min
+from django.utils import timezone
+from kryptotracker.models import PriceTick
+from kryptotracker.utils import crypto_data, dashboard_snapshot, price_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+# trend windows: name -> (period, max. distance of the reference tick from the start of the period)
+TREND_WINDOWS = {
+    '24h': (timedelta(hours=24), timedelta(hours=2)),
+    '7d': (timedelta(days=7), timedelta(hours=12)),
+}
+LONGEST_WINDOW = max(TREND_WINDOWS.values(), key=lambda window: window[0])
+# history fetched for assets without price ticks, CoinGecko returns hourly prices for ranges of 1-90 days
+BACKFILL_PERIOD = timedelta(days=8)
+
+
+def get_history_start(current_time: datetime) -> int:
+    """Return the unix timestamp of the oldest price tick any trend window can use"""
+    period, tolerance = LONGEST_WINDOW
+    return int((current_time - period - tolerance).timestamp())
+
+
+def compute_trends(asset_infos, current_time: datetime = None) -> dict:
+    """
+    Calculate the percent change of all assets over each trend window in one pass over their price ticks: the
+    reference price of a window is the tick nearest to its start (within its tolerance) and compared with the current
+    price.
+    :param asset_infos: Iterable of AssetInfo objects with current price.
+    :param current_time: End of the trend windows.
+    :return: Dictionary with AssetInfo id as key and dict {window name: percent change or None} as value.
+    """
+    current_time = current_time if current_time is not None else timezone.now()
+    asset_infos = {asset_info.pk: asset_info for asset_info in asset_infos if asset_info is not None}
+    # the price of euro never changes
+    trends = {asset_id: {window: 0.0 if asset_info.api_id_name == 'euro' else None for window in TREND_WINDOWS}
+              for asset_id, asset_info in asset_infos.items()}
+    if not asset_infos:
+        return trends
+
+    ticks = pd.DataFrame.from_records(
+        PriceTick.objects.filter(asset_id__in=asset_infos.keys(), ts__gte=get_history_start(current_time))
+        .values_list('asset_id', 'ts', 'price'),
+        columns=['asset_id', 'ts', 'price']
+    )
+    if ticks.empty:
+        return trends
+
+    # one target row per asset and window, matched with the nearest tick of the same asset
+    now = int(current_time.timestamp())
+    targets = pd.DataFrame(
+        [(asset_id, window, now - int(period.total_seconds()), int(tolerance.total_seconds()))
+         for asset_id in asset_infos for window, (period, tolerance) in TREND_WINDOWS.items()],
+        columns=['asset_id', 'window', 'ts', 'tolerance']
+    )
+    ticks['tick_ts'] = ticks['ts']
+    merged = pd.merge_asof(targets.sort_values('ts'), ticks.sort_values('ts'), on='ts',
+                           by='asset_id', direction='nearest')
+    merged = merged[(merged['tick_ts'] - merged['ts']).abs() <= merged['tolerance']]
+    merged = merged[merged['price'] > 0]
+
+    current_prices = merged['asset_id'].map({asset_id: asset_info.current_price or np.nan
+                                             for asset_id, asset_info in asset_infos.items()})
+    merged = merged.assign(change=(current_prices / merged['price'] - 1) * 100).dropna(subset=['change'])
+    for asset_id, window, change in merged[['asset_id', 'window', 'change']].itertuples(index=False):
+        trends[asset_id][window] = round(float(change), 2)
+    return trends
+
+
+def get_trends(asset_infos, current_time: datetime = None) -> dict:
+    """
+    Return the trends of assets from the price cache, trends of assets missing in the cache are calculated with one
+    query (see compute_trends) and cached. No upstream requests are made.
+    :param asset_infos: Iterable of AssetInfo objects.
+    :param current_time: End of the trend windows.
+    :return: Dictionary with AssetInfo id as key and dict {window name: percent change or None} as value.
+    """
+    asset_infos = {asset_info.api_id_name: asset_info for asset_info in asset_infos if asset_info is not None}
+    cached = price_cache.get_trends(api_id_names=asset_infos.keys())
+    missing = [asset_info for api_id_name, asset_info in asset_infos.items() if api_id_name not in cached]
+    computed = update_trends(asset_infos=missing, current_time=current_time) if missing else {}
+    trends = {asset_infos[api_id_name].pk: trend for api_id_name, trend in cached.items()}
+    trends.update(computed)
+    return trends
+
+
+def update_trends(asset_infos, current_time: datetime = None) -> dict:
+    """Calculate the trends of assets (e.g. after a price refresh) and write them to the price cache"""
+    asset_infos = [asset_info for asset_info in asset_infos if asset_info is not None]
+    trends = compute_trends(asset_infos=asset_infos, current_time=current_time)
+    price_cache.set_trends({asset_info.api_id_name: trends[asset_info.pk] for asset_info in asset_infos})
+    return trends
+
+
+def backfill_missing_history(asset_infos, current_time: datetime = None) -> list:
+    """
+    Fetch the price history of all assets without price ticks for the longest trend window from CoinGecko and store it
+    as price ticks. Each asset is tried at most once per day, assets with enough history are never requested.
+    Never called in a request thread, see price_daemon and price_refresh.schedule_backfill().
+    :param asset_infos: Iterable of AssetInfo objects.
+    :param current_time: End of the history.
+    :return: List of AssetInfo objects with backfilled history.
+    """
+    current_time = current_time if current_time is not None else timezone.now()
+    asset_infos = {asset_info.pk: asset_info for asset_info in asset_infos
+                   if asset_info is not None and asset_info.api_id_name != 'euro'}
+    if not asset_infos:
+        return []
+
+    # assets are missing history if their first tick is after the start of the longest window (plus tolerance)
+    period, tolerance = LONGEST_WINDOW
+    required = int((current_time - period + tolerance).timestamp())
+    first_ticks = dict(PriceTick.objects.filter(asset_id__in=asset_infos.keys()).values('asset_id')
+                       .annotate(first=Min('ts')).values_list('asset_id', 'first'))
+    missing = [asset_info for asset_id, asset_info in asset_infos.items()
+               if asset_id not in first_ticks or first_ticks[asset_id] > required]
+
+    end = int(current_time.timestamp())
+    start = int((current_time - BACKFILL_PERIOD).timestamp())
+    backfilled = []
+    for asset_info in missing:
+        if not price_cache.acquire_backfill_attempt(api_id_name=asset_info.api_id_name):
+            continue
+        prices = crypto_data.get_price_range_coingecko(crypto_id=asset_info.api_id_name, start_timestamp=start,
+                                                       end_timestamp=end)
+        if not prices:
+            logger.error(f"Backfill error: no price history for AssetInfo {asset_info.fullname}")
+            continue
+        PriceTick.objects.bulk_create(
+            [PriceTick(asset=asset_info, ts=int(timestamp // 1000), price=float(price))
+             for timestamp, price in prices if price],
+            ignore_conflicts=True
+        )
+        backfilled.append(asset_info)
+    if backfilled:
+        dashboard_snapshot.apply_price_ticks(asset_infos=backfilled,
+                                             trends=update_trends(asset_infos=backfilled, current_time=current_time))
+    return backfilled
@@ -3,8 +3,10 @@
 from pathlib import Path
 
 # models import and django auth functions
-from django.db.models import Q
-from .models import PortfolioType, Portfolio, AssetInfo, AssetOwned, Comment, TransactionType, Transaction, TaxReport, ExchangeAPIs
+from django.db import connection, transaction as db_transaction
+from django.db.models import Q, Count, Min, Max
+from .models import PortfolioType, Portfolio, AssetInfo, AssetOwned, Comment, TransactionType, Transaction, TaxReport, ExchangeAPIs, \
+    PortfolioSnapshot
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
@@ -20,13 +22,15 @@ from rest_framework.views import APIView
 # dependencies serializers
 from .serializers import *
 # python and other dependencies
-from .utils import crypto_data
+from .utils import asset_resolver, circuit_breaker, conversion, crypto_data, dashboard_snapshot, etags, http_client, \
+    kraken_assets, pagination, price_refresh, rate_limiter, trends
 from datetime import datetime, timedelta
 import pandas as pd
-import pytz
 import io
+import math
 import hashlib
 from xhtml2pdf import pisa
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
 
 
 class LogoutAPI(APIView):
@@ -143,141 +147,28 @@ class DashboardAPIView(APIView):
     """API View for handling and displaying dashboard values."""
     authentication_classes = [TokenAuthentication]
 
-    def update_balances(self, asset: AssetInfo, user_portfolio: Portfolio):
-        """Update Portfolio balanace with new AssetInfo data"""
-        print("update balances")
-        # update portfolio balance and asset owned quantity
-        asset_owned = AssetOwned.objects.filter(asset=asset, portfolio=user_portfolio).first()
-        old_quantity_price = asset_owned.quantity_price
-        asset_owned.quantity_price = asset.current_price * asset_owned.quantity_owned
-        asset_owned.save()
-        user_portfolio.balance += asset_owned.quantity_price - old_quantity_price
-        user_portfolio.save()
-
-    def get_balances(self, portfolios):
-        """Calculate sum balance of all portfolios and extract each balance from one portfolio"""
-        sum_balance = 0.0
-        spot_balance = 0.0
-        staking_balance = 0.0
-        for data in portfolios:
-            sum_balance += float(data['balance'])
-            if PortfolioType.objects.get(id=data['portfolio_type']).type == 'Spot':
-                spot_balance += float(data['balance'])
-            if PortfolioType.objects.get(id=data['portfolio_type']).type == 'Staking':
-                staking_balance += float(data['balance'])
-        return sum_balance, spot_balance, staking_balance
-
-    # TODO: calculate trend for each asset
-    def get_assets_in_portfolios(self, user: User, asset_infos: AssetInfo):
-        """Returns lists containing the assets from all staking and spot portfolios"""
-        # get all owned Assets to a user
-        owned = AssetOwned.objects.filter(
-            portfolio__user=user,
-            asset__in=asset_infos
-        )
-
-        # combine owned assets and portfolio to display each portfolio and their assets
-        data = []
-        for portfolio in Portfolio.objects.filter(user=user):
-            currencies = []
-            for own in owned:
-                if own.portfolio == portfolio:
-                    if own.quantity_price < 0.01:
-                        own.delete()
-                        continue
-                    crypto_data.update_asset_info(asset_info=own.asset)
-                    self.update_balances(asset=own.asset, user_portfolio=portfolio)
-                    currency = {
-                        'acronym': own.asset.acronym.upper(),
-                        'img': own.asset.image,
-                        'amount': own.quantity_owned,
-                        'price': own.asset.current_price,
-                        'owned_value': own.quantity_price,
-                        'trend': '1.00%' # TODO: set real trend
-                    }
-                    currencies.append(currency)
-
-            # sort currencies in ascending order based on the acronyms
-            currencies.sort(key=lambda currency: currency['acronym'])
-
-            portfolio_data = {
-                'name': portfolio.name,
-                'type': portfolio.portfolio_type.type,
-                'currencies': currencies
-            }
-            data.append(portfolio_data)
-
-        data.sort(key=lambda portfolio: portfolio['name'])
-        return data
-
     def get_transactions_data(self, user: User):
-        """Get all transactions and extract necessary data"""
+        """Get count, first and last date with one aggregate query and the last five transactions"""
         transactions = Transaction.objects.filter(
             Q(user=user) |
             Q(asset__portfolio__user=user)
-        ).order_by('tx_date')
-        transactions_serializer = TransactionSerializer(transactions, many=True)
-        count_transactions = len(transactions_serializer.data)
-
-        first_transaction = transactions.first()
-        first_transaction_formatted = first_transaction.tx_date.strftime(
-            '%d.%m.%Y %H:%M') if first_transaction else "Keine Daten verfügbar"
-        last_transaction = transactions.last()
-        last_transaction_formatted = last_transaction.tx_date.strftime(
-            '%d.%m.%Y %H:%M') if last_transaction else "Keine Daten verfügbar"
+        )
+        stats = transactions.aggregate(count=Count('id'), first=Min('tx_date'), last=Max('tx_date'))
+        count_transactions = stats['count']
+        first_transaction_formatted = stats['first'].strftime(
+            '%d.%m.%Y %H:%M') if stats['first'] else "Keine Daten verfügbar"
+        last_transaction_formatted = stats['last'].strftime(
+            '%d.%m.%Y %H:%M') if stats['last'] else "Keine Daten verfügbar"
 
         # get last five transactions
-        last_five_transactions = Transaction.objects.filter(
-            Q(user=user) |
-            Q(asset__portfolio__user=user)
-        ).order_by('-tx_date')[:5]
-        last_five_transactions_serializer = TransactionSerializer(last_five_transactions, many=True)
-
-        transaction_assets = []
-        for tx in last_five_transactions_serializer.data:
-            asset_owned = AssetOwned.objects.get(id=tx['asset'])
-            tx_date_obj = datetime.fromisoformat(tx['tx_date'])
-            tx_date_obj_utc = tx_date_obj.astimezone(pytz.UTC)
-            tx_date_formatted = tx_date_obj_utc.strftime('%d.%m.%Y %H:%M')
-            tx_type = TransactionType.objects.get(id=tx['tx_type']).type
-
-            transaction_assets.append(
-                {
-                    'tx_date': tx_date_formatted,
-                    'tx_amount': tx['tx_amount'],
-                    'tx_value': tx['tx_value'],
-                    'tx_type': tx_type,
-                    'asset': asset_owned.asset.acronym.upper()
-                }
-            )
+        last_five_transactions = TransactionListSerializer.project(transactions).order_by('-tx_date')[:5]
+        transaction_assets = DashboardTransactionSerializer(last_five_transactions, many=True).data
         return count_transactions, first_transaction_formatted, last_transaction_formatted, transaction_assets
 
-    def get_chart_data(self, user: User, asset_infos: AssetInfo):
-        """Return all owned assets with acronym and their value in euro."""
-        # get all owned assets from all portfolios that belongs to a user
-        asset_owned = AssetOwned.objects.filter(portfolio__user=user, asset__in=asset_infos)
-
-        assets_sum = {}
-        for owned in asset_owned:
-            asset_acronym = owned.asset.acronym.upper()
-            if asset_acronym in assets_sum:
-                # add the value to the existing asset
-                assets_sum[asset_acronym] += round(owned.quantity_price, 3)
-            else:
-                # add new asset to the dictionary
-                assets_sum[asset_acronym] = round(owned.quantity_price, 3)
-
-        # create a list of dictionaries from the assets_sum dictionary
-        data = [{'asset': asset, 'EUR': value} for asset, value in assets_sum.items()]
-
-        # sort list ASC
-        sorted_data = sorted(data, key=lambda x: x['EUR'], reverse=True)
-
-        return sorted_data
-
     def get_tax_data(self, user: User):
         """get and return tax data for dashboard"""
-        tax_reports = TaxReport.objects.filter(user=user).order_by('-year', '-created_at')
+        # the pdf is not needed for the list
+        tax_reports = TaxReport.objects.filter(user=user).defer('report_pdf').order_by('-year', '-created_at')
         tax_data_list = []
         for report in tax_reports:
             time_period = str(report.year) if report.year else f"{report.start_date.strftime('%d.%m.%Y')} bis {report.end_date.strftime('%d.%m.%Y')}"
@@ -293,54 +184,70 @@ class DashboardAPIView(APIView):
 
         return tax_data_list
 
+    @etags.conditional(scope='dashboard', counters=(etags.DATA, etags.PRICES),
+                       is_current=dashboard_snapshot.has_snapshot)
     def get(self, request):
         """GET Route /api/dashboard for dashboard"""
         try:
             token = request.auth
-            token_obj = Token.objects.get(key=token)
+            token_obj = Token.objects.select_related('user').get(key=token)
             user = token_obj.user
             if user is not None:
-                # get owned assets
-                portfolios = Portfolio.objects.filter(user=user)
-                portfolio_serializer = PortfolioSerializer(portfolios, many=True)
-                asset_owned = AssetOwned.objects.filter(portfolio__in=portfolios)
-                asset_owned_serializer = AssetOwnedSerializer(asset_owned, many=True)
-                count_asset_owned = len(asset_owned_serializer.data)
+                # repeat loads are served from the snapshot with one cache read
+                snapshot, generation = dashboard_snapshot.get_snapshot(user_id=user.pk)
+                if snapshot is not None:
+                    return Response(data=dashboard_snapshot.render(snapshot=snapshot), status=status.HTTP_200_OK)
+
+                # get portfolios and owned assets (with their AssetInfo) with one query each
+                portfolios = list(Portfolio.objects.filter(user=user).select_related('portfolio_type'))
+                owned = list(AssetOwned.objects.filter(portfolio__user=user).select_related('asset'))
 
-                # get balances from portfolios
-                sum_balance, spot_balance, staking_balance = self.get_balances(portfolio_serializer.data)
+                # refresh prices of all owned assets with one batched upstream request or, in stale-while-revalidate
+                # mode, take the cached prices and refresh stale ones in background
+                price_refresh.ensure_prices(asset_infos=[own.asset for own in owned])
+
+                # 24h/7d trends from the stored price history (cached with the prices), assets without history are
+                # backfilled in background
+                asset_trends = trends.get_trends(asset_infos=[own.asset for own in owned])
+                price_refresh.schedule_backfill(asset_infos=[own.asset for own in owned
+                                                             if asset_trends[own.asset_id]['7d'] is None])
 
                 # get all transactions and extract necessary data
                 count_transactions, first_transaction_formatted, last_transaction_formatted, last_five_transactions = self.get_transactions_data(user=user)
 
-                # get all asset infos from database
-                asset_infos = AssetInfo.objects.all()
-
-                # get the user related balances (assets in spot and staking)
-                all_portfolios_data = self.get_assets_in_portfolios(user, asset_infos)
+                # balances, portfolio tables and chart data are computed from the lines with the current prices at
+                # read time and not saved (see maintain_portfolios), price ticks patch the lines of the snapshot
+                snapshot = {
+                    'portfolios': [{'id': portfolio.pk, 'name': portfolio.name, 'type': portfolio.portfolio_type.type}
+                                   for portfolio in portfolios],
+                    'lines': dashboard_snapshot.build_lines(owned=owned, trends=asset_trends),
+                    'count_transactions': count_transactions,
+                    'first_transaction': first_transaction_formatted,
+                    'last_transaction': last_transaction_formatted,
+                    'last_five_transactions': last_five_transactions,
+                    'tax_data': self.get_tax_data(user=user),
+                }
+                dashboard_snapshot.set_snapshot(user_id=user.pk, generation=generation, snapshot=snapshot)
+                context = dashboard_snapshot.render(snapshot=snapshot)
+                return Response(data=context, status=status.HTTP_200_OK)
+        except Token.DoesNotExist:
+            return Response(data={'detail': 'Ungültiges Token.'}, status=status.HTTP_400_BAD_REQUEST)
 
-                # get chart data
-                chart_data = self.get_chart_data(user, asset_infos)
 
-                # get tax data
-                tax_data = self.get_tax_data(user=user)
+class ProviderHealthAPIView(APIView):
+    """API View for displaying circuit breaker state and rate limit budget of external price providers."""
+    authentication_classes = [TokenAuthentication]
 
+    def get(self, request):
+        """GET Route /api/provider-health/"""
+        try:
+            token = request.auth
+            token_obj = Token.objects.get(key=token)
+            user = token_obj.user
+            if user is not None:
                 context = {
-                    # variables for stat cards
-                    'sum_balance': sum_balance,
-                    'spot_balance': spot_balance,
-                    'staking_balance': staking_balance,
-                    'first_transaction': first_transaction_formatted,
-                    'last_transaction': last_transaction_formatted,
-                    'transactions': {'count': count_transactions, 'with_coins': count_asset_owned},
-                    # variables for balance tables
-                    'portfolios_data': all_portfolios_data,
-                    # variable for last transactions list
-                    'last_five_transactions': last_five_transactions,
-                    # variable for bar chart
-                    'chart_data': chart_data,
-                    # variable for tax_data
-                    'tax_data': tax_data
+                    'health': circuit_breaker.provider_health(providers=http_client.HOST_PROVIDERS.values()),
+                    'rate_limits': rate_limiter.status()
                 }
                 return Response(data=context, status=status.HTTP_200_OK)
         except Token.DoesNotExist:
@@ -371,7 +278,7 @@ class AssetOwnedAPIView(APIView):
 
                 # update asset infos
                 if not quantity_price:
-                    crypto_data.update_asset_info(asset_info=asset_info_obj)
+                    price_refresh.ensure_prices(asset_infos=[asset_info_obj])
                     # self.update_asset_info(asset_info=asset_info_obj)
 
                 asset_owned = AssetOwned.objects.filter(portfolio=portfolio, asset=asset_info_obj).first()
@@ -391,7 +298,7 @@ class AssetOwnedAPIView(APIView):
                     asset_owned.save()
                     old_quantity_price = asset_owned.quantity_price
                     asset_owned.quantity_price = new_data['current_price'] * asset_owned.quantity_owned
-                    asset_owned.save()
+                    asset_owned.save_valuation()
                     portfolio.balance += asset_owned.quantity_price - old_quantity_price
                     portfolio.save()
 
@@ -437,6 +344,7 @@ class PortfolioAPIView(APIView):
             transformed_data.append(context)
         return transformed_data
 
+    @etags.conditional(scope='portfolio', counters=(etags.DATA,))
     def get(self, request):
         """GET Route /api/portfolio/"""
         try:
@@ -501,6 +409,53 @@ class PortfolioAPIView(APIView):
     #         return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+class PortfolioHistoryAPIView(APIView):
+    """API View for displaying the daily values of a portfolio from its snapshots (see snapshot_portfolios)."""
+    authentication_classes = [TokenAuthentication]
+    # range shortcuts of the history chart
+    ranges = {'7d': timedelta(days=7), '30d': timedelta(days=30), '90d': timedelta(days=90), '1y': timedelta(days=365)}
+
+    def get_day_range(self, params):
+        """Return the first and last day from the query parameters 'range' or 'from'/'to' (YYYY-MM-DD), None if unset.
+        Raises ValueError on invalid values."""
+        start_day = datetime.strptime(params['from'], '%Y-%m-%d').date() if params.get('from') else None
+        end_day = datetime.strptime(params['to'], '%Y-%m-%d').date() if params.get('to') else None
+        if params.get('range') and params['range'] != 'all':
+            start_day = (end_day or timezone.now().date()) - self.ranges[params['range']]
+        return start_day, end_day
+
+    def get(self, request, pk):
+        """GET Route /api/portfolio/<pk>/history/?range=1y or ?from=2026-01-01&to=2026-06-30"""
+        try:
+            token = request.auth
+            token_obj = Token.objects.select_related('user').get(key=token)
+            user = token_obj.user
+            if user is not None:
+                try:
+                    start_day, end_day = self.get_day_range(params=request.query_params)
+                except (ValueError, KeyError):
+                    return Response(data={'detail': 'Ungültiger Zeitraum, erwartet range=7d|30d|90d|1y|all oder '
+                                                    'from/to im Format JJJJ-MM-TT.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+                # one range scan over the (portfolio, day) index, the breakdown is only loaded if requested
+                snapshots = PortfolioSnapshot.objects.filter(portfolio_id=pk, user=user)
+                if start_day is not None:
+                    snapshots = snapshots.filter(day__gte=start_day)
+                if end_day is not None:
+                    snapshots = snapshots.filter(day__lte=end_day)
+                with_breakdown = request.query_params.get('breakdown') in ('1', 'true')
+                fields = ['day', 'value', 'breakdown'] if with_breakdown else ['day', 'value']
+                history = [{**snapshot, 'day': snapshot['day'].strftime('%d.%m.%Y')}
+                           for snapshot in snapshots.order_by('day').values(*fields)]
+
+                if not history and not Portfolio.objects.filter(pk=pk, user=user).exists():
+                    return Response(data={'detail': 'Portfolio nicht gefunden.'}, status=status.HTTP_404_NOT_FOUND)
+                return Response(data={'portfolio': pk, 'history': history}, status=status.HTTP_200_OK)
+        except Token.DoesNotExist:
+            return Response(data={'detail': 'Ungültiges Token.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class TransactionTypeAPIView(APIView):
     """API View for handling CRUD operations on TransactionType model."""
     authentication_classes = [TokenAuthentication]
@@ -547,53 +502,58 @@ class TransactionAPIView(APIView):
     """API View for handling CRUD operations on Transaction model."""
     authentication_classes = [TokenAuthentication]
 
-    def get_transactions_data(self, user):
-        """Get and return all user transactions, extract and format necessary data"""
-        transactions = Transaction.objects.filter(
-            Q(user=user) |
-            Q(asset__portfolio__user=user)
-        ).order_by('-tx_date')
-        transactions_serializer = TransactionSerializer(transactions, many=True)
-
-        txs = []
-        for tx in transactions_serializer.data:
-            # get data from foreign keys and format date
-            asset_owned = AssetOwned.objects.get(id=tx['asset'])
-            tx_type = TransactionType.objects.get(id=tx['tx_type'])
-            tx_date_obj = datetime.fromisoformat(tx['tx_date'])
-            tx_date_obj_utc = tx_date_obj.astimezone(pytz.UTC)
-            tx_date_formatted = tx_date_obj_utc.strftime('%d.%m.%Y %H:%M')
-
-            # combine data into dict
-            txs.append(
-                {
-                    'tx_id': tx['id'],
-                    'tx_type': tx_type.type,
-                    'asset': asset_owned.asset.acronym.upper(),
-                    'tx_amount': str(round(tx['tx_amount'], 3)).replace('.', ','),
-                    'tx_value': str(round(tx['tx_value'], 3)).replace('.', ','),
-                    'tx_fee': str(round(tx['tx_fee'], 3)).replace('.', ','),
-                    'tx_date': tx_date_formatted,
-                    'tx_hash': tx['tx_hash'],
-                    'tx_status': 'In Bearbeitung' if tx['status'] == 0 else 'Abgeschlossen',
-                    'tx_sender_address': tx['tx_sender_address'],
-                    'tx_recipient_address': tx['tx_recipient_address'],
-                    'tx_comment': '' if not tx['tx_comment'] else Comment.objects.get(id=tx['tx_comment']).text,
-                }
-            )
-        return txs
-
+    def get_filters(self, params) -> Q:
+        """Return the filters of the transaction list from the query parameters type (name), asset (acronym),
+        portfolio (id), from/to (YYYY-MM-DD, inclusive) and status (0/1). Raises ValueError on invalid values."""
+        filters = Q()
+        if params.get('type'):
+            filters &= Q(tx_type__type=params['type'])
+        if params.get('asset'):
+            filters &= Q(asset__asset__acronym__iexact=params['asset'])
+        if params.get('portfolio'):
+            filters &= Q(asset__portfolio_id=int(params['portfolio']))
+        if params.get('from'):
+            filters &= Q(tx_date__gte=datetime.strptime(params['from'], '%Y-%m-%d'))
+        if params.get('to'):
+            filters &= Q(tx_date__lt=datetime.strptime(params['to'], '%Y-%m-%d') + timedelta(days=1))
+        if params.get('status'):
+            if params['status'] not in ('0', '1', 'false', 'true'):
+                raise ValueError(f"Invalid status {params['status']}")
+            filters &= Q(status=params['status'] in ('1', 'true'))
+        return filters
+
+    def get_transactions_data(self, user, params):
+        """Get one page of the user transactions (newest first) with the filters of the query parameters, each page is
+        loaded with one query. Returns the formatted transactions and the cursor of the next page."""
+        # transactions are always created with the owner of the portfolio as user, filtering by user alone lets the
+        # (user, tx_date, id) index serve the page
+        transactions = TransactionListSerializer.project(
+            Transaction.objects.filter(self.get_filters(params), user=user))
+        page, next_cursor = pagination.paginate_keyset(queryset=transactions, cursor=params.get('cursor'),
+                                                       page_size=pagination.get_page_size(params.get('limit')),
+                                                       date_field='tx_date')
+        txs = TransactionListSerializer(page, many=True).data
+        return txs, next_cursor
+
+    @etags.conditional(scope='transaction', counters=(etags.DATA,))
     def get(self, request):
-        """GET Route /api/transaction for transactions"""
+        """GET Route /api/transaction for transactions, paginated with ?cursor=<next_cursor>&limit=50 and filtered with
+        ?type=Kaufen&asset=BTC&portfolio=1&from=2026-01-01&to=2026-12-31&status=1"""
         try:
             token = request.auth
-            token_obj = Token.objects.get(key=token)
+            token_obj = Token.objects.select_related('user').get(key=token)
             user = token_obj.user
             if user is not None:
-                tx_data = self.get_transactions_data(user)
+                try:
+                    tx_data, next_cursor = self.get_transactions_data(user, params=request.query_params)
+                except ValueError:
+                    return Response(data={'detail': 'Ungültige Filter- oder Seitenangabe.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
                 context = {
                     # variables for transactions list
-                    'transactions': tx_data
+                    'transactions': tx_data,
+                    # cursor of the next page, None on the last page
+                    'next_cursor': next_cursor
                 }
                 return Response(data=context, status=status.HTTP_200_OK)
         except Token.DoesNotExist:
@@ -620,6 +580,8 @@ class TransactionAPIView(APIView):
 
     # TODO: get current currency price if tx_price is given?
     # TODO: set transaction status true if price is available, otherwise false and queuing
+    @rate_limiter.acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    @dashboard_snapshot.deferred_invalidation()
     def post(self, request, *args, **kargs):
         """POST Route /api/transaction/ for creating new transactions"""
         try:
@@ -650,7 +612,7 @@ class TransactionAPIView(APIView):
 
                 # update asset infos
                 # self.update_asset_info(asset_info=asset_info)
-                crypto_data.update_asset_info(asset_info=asset_info)
+                price_refresh.ensure_prices(asset_infos=[asset_info])
 
                 # check if asset owned exists in portfolio, if not create owned asset in given portfolio
                 asset_in_portfolio = AssetOwned.objects.filter(portfolio__user=user,
@@ -716,7 +678,7 @@ class TransactionAPIView(APIView):
                             return Response(data={'message': 'Ziel-Kryptowährung wird nicht unterstützt.'},
                                             status=status.HTTP_400_BAD_REQUEST)
                         # self.update_asset_info(asset_info=target_asset_info)
-                        crypto_data.update_asset_info(asset_info=target_asset_info)
+                        price_refresh.ensure_prices(asset_infos=[target_asset_info])
 
                         current_price_old_asset = asset_info.current_price
                         old_asset_owned = AssetOwned.objects.create(
@@ -729,9 +691,9 @@ class TransactionAPIView(APIView):
                         portfolio.save()
 
                         current_price_target_asset = target_asset_info.current_price
-                        target_asset_amount = crypto_data.convert_crypto_amount(base_crypto=asset_info.api_id_name,
-                                                                                target_crypto=target_asset_info.acronym,
-                                                                                amount=tx_amount)
+                        target_asset_amount = conversion.convert_amount(base_asset=asset_info,
+                                                                        target_asset=target_asset_info,
+                                                                        amount=tx_amount)
 
                         # if not isinstance(target_asset_amount, float) and target_asset_amount.startswith("Fehler"):
                         if not isinstance(target_asset_amount, float) and target_asset_amount is None:
@@ -765,7 +727,7 @@ class TransactionAPIView(APIView):
                             target_asset_owned.save()
                             old_quantity_price = target_asset_owned.quantity_price
                             target_asset_owned.quantity_price = target_asset_info.current_price * target_asset_owned.quantity_owned
-                            target_asset_owned.save()
+                            target_asset_owned.save_valuation()
                             portfolio.balance += target_asset_owned.quantity_price - old_quantity_price
                             portfolio.save()
 
@@ -793,6 +755,8 @@ class TransactionAPIView(APIView):
                             tx_value=datetime_price * tx_amount,
                             tx_fee=0.0 if not tx_fee else tx_fee,
                             tx_date=tx_date,
+                            target_asset=target_asset_info,
+                            target_amount=target_asset_amount,
                         )
                     else:
                         return Response(data={'message': 'Kein gültigen Transaktionstyp angegeben.'},
@@ -813,7 +777,7 @@ class TransactionAPIView(APIView):
                         asset_in_portfolio.save()
                         old_quantity_price = asset_in_portfolio.quantity_price
                         asset_in_portfolio.quantity_price = current_price * asset_in_portfolio.quantity_owned
-                        asset_in_portfolio.save()
+                        asset_in_portfolio.save_valuation()
                         portfolio.balance += asset_in_portfolio.quantity_price - old_quantity_price
                         portfolio.save()
 
@@ -855,7 +819,7 @@ class TransactionAPIView(APIView):
                             return Response(data={'message': 'Ziel-Kryptowährung wird nicht unterstützt.'},
                                             status=status.HTTP_400_BAD_REQUEST)
                         # self.update_asset_info(asset_info=target_asset_info)
-                        crypto_data.update_asset_info(asset_info=target_asset_info)
+                        price_refresh.ensure_prices(asset_infos=[target_asset_info])
 
                         current_price_old_asset = asset_info.current_price
                         current_price_target_asset = target_asset_info.current_price
@@ -865,14 +829,14 @@ class TransactionAPIView(APIView):
                         asset_in_portfolio.save()
                         old_quantity_price = asset_in_portfolio.quantity_price
                         asset_in_portfolio.quantity_price = current_price_old_asset * asset_in_portfolio.quantity_owned
-                        asset_in_portfolio.save()
+                        asset_in_portfolio.save_valuation()
                         portfolio.balance += asset_in_portfolio.quantity_price - old_quantity_price
                         portfolio.save()
 
                         # update target asset
-                        target_asset_amount = crypto_data.convert_crypto_amount(base_crypto=asset_info.api_id_name,
-                                                                                target_crypto=target_asset_info.acronym,
-                                                                                amount=tx_amount)
+                        target_asset_amount = conversion.convert_amount(base_asset=asset_info,
+                                                                        target_asset=target_asset_info,
+                                                                        amount=tx_amount)
                         # if not isinstance(target_asset_amount, float) and target_asset_amount.startswith("Fehler"):
                         if not isinstance(target_asset_amount, float) and target_asset_amount is None:
                             # conversion unsuccessful due to api error, calculate with given price data
@@ -906,7 +870,7 @@ class TransactionAPIView(APIView):
                             target_asset_owned.save()
                             old_quantity_price = target_asset_owned.quantity_price
                             target_asset_owned.quantity_price = target_asset_info.current_price * target_asset_owned.quantity_owned
-                            target_asset_owned.save()
+                            target_asset_owned.save_valuation()
                             portfolio.balance += target_asset_owned.quantity_price - old_quantity_price
                             portfolio.save()
 
@@ -935,6 +899,8 @@ class TransactionAPIView(APIView):
                             tx_value=datetime_price * tx_amount,
                             tx_fee=0.0 if not tx_fee else tx_fee,
                             tx_date=tx_date,
+                            target_asset=target_asset_info,
+                            target_amount=target_asset_amount,
                         )
                     else:
                         return Response(data={'message': 'Kein gültigen Transaktionstyp angegeben.'},
@@ -945,6 +911,278 @@ class TransactionAPIView(APIView):
             return Response(data={'detail': 'Ungültiges Token.'}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TransactionBulkAPIView(APIView):
+    """API View for creating many transactions with one request, e.g. pasted manual entries or scripted history."""
+    authentication_classes = [TokenAuthentication]
+
+    # transactions per request at most
+    max_items = 500
+    # transaction types changing the quantity of one asset, outgoing types are stored with negative amount
+    transfer_types = ["Reward", "Kaufen", "Verkaufen", "Gesendet", "Einzahlung", "Auszahlung"]
+    outgoing_types = ["Verkaufen", "Gesendet", "Auszahlung"]
+    # transaction type converting the asset into the target asset
+    trade_type = "Handel"
+
+    @staticmethod
+    def parse_id(value):
+        """Return an id of the request as int, None if missing or invalid"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def parse_number(value, default=None):
+        """Return a finite, non-negative number of the request as float, default if empty. Raises ValueError on
+        invalid values (NaN, infinite or negative)."""
+        if value is None or value == '':
+            return default
+        try:
+            number = float(value)
+        except TypeError as e:
+            raise ValueError(f"Invalid number {value}") from e
+        if not math.isfinite(number) or number < 0:
+            raise ValueError(f"Invalid number {value}")
+        return number
+
+    def parse_item(self, item, asset_infos: dict, portfolios: dict, tx_types: dict) -> dict:
+        """Validate one transaction of the request (fields of POST /api/transaction/) without queries. Returns the
+        parsed values, raises ValueError with the message for the user."""
+        if not isinstance(item, dict):
+            raise ValueError('Ungültiger Eintrag.')
+        asset_info = asset_infos.get(self.parse_id(item.get('assetId')))
+        if asset_info is None:
+            raise ValueError('Kryptowährung wird nicht unterstützt.')
+        portfolio = portfolios.get(self.parse_id(item.get('portfolio')))
+        if portfolio is None:
+            raise ValueError('Portfolio nicht gefunden.')
+        tx_type = tx_types.get(self.parse_id(item.get('transactionType')))
+        if tx_type is None or tx_type.type not in self.transfer_types + [self.trade_type]:
+            raise ValueError('Kein gültigen Transaktionstyp angegeben.')
+        target_asset_info = None
+        if tx_type.type == self.trade_type:
+            target_asset_info = asset_infos.get(self.parse_id(item.get('targetAssetId')))
+            if target_asset_info is None:
+                raise ValueError('Ziel-Kryptowährung wird nicht unterstützt.')
+        try:
+            tx_date = datetime.strptime(item.get('transactionDate'), '%Y-%m-%dT%H:%M')
+        except (TypeError, ValueError):
+            raise ValueError('Ungültiges Transaktionsdatum.')
+        try:
+            tx_amount = self.parse_number(item.get('amount'))
+            tx_price = self.parse_number(item.get('price'))
+            tx_fee = self.parse_number(item.get('transactionFee'), default=0.0)
+        except ValueError:
+            raise ValueError('Ungültige Menge, Preis oder Gebühr.')
+        if tx_amount is None or tx_amount <= 0:
+            raise ValueError('Ungültige Menge, Preis oder Gebühr.')
+
+        return {
+            'asset_info': asset_info,
+            'target_asset_info': target_asset_info,
+            'portfolio': portfolio,
+            'tx_type': tx_type,
+            'tx_date': tx_date,
+            'tx_amount': tx_amount,
+            'tx_price': tx_price,
+            'tx_fee': tx_fee,
+            'tx_hash': item.get('transactionHashId'),
+            'tx_sender_address': item.get('senderAddress'),
+            'tx_recipient_address': item.get('recipientAddress'),
+            'tx_comment': item.get('comment'),
+        }
+
+    def validate_items(self, user: User, items: list) -> tuple:
+        """Validate all transactions in one pass, assets, portfolios and types are loaded with one query each.
+        Returns the dict of parsed transactions by index and the list of errors."""
+        asset_ids, portfolio_ids, tx_type_ids = set(), set(), set()
+        for item in items:
+            if isinstance(item, dict):
+                asset_ids.update({self.parse_id(item.get('assetId')), self.parse_id(item.get('targetAssetId'))})
+                portfolio_ids.add(self.parse_id(item.get('portfolio')))
+                tx_type_ids.add(self.parse_id(item.get('transactionType')))
+        asset_infos = AssetInfo.objects.in_bulk(asset_ids - {None})
+        portfolios = Portfolio.objects.filter(user=user).in_bulk(portfolio_ids - {None})
+        tx_types = TransactionType.objects.in_bulk(tx_type_ids - {None})
+
+        parsed, errors = {}, []
+        for index, item in enumerate(items):
+            try:
+                parsed[index] = self.parse_item(item, asset_infos=asset_infos, portfolios=portfolios,
+                                                tx_types=tx_types)
+            except ValueError as e:
+                errors.append({'index': index, 'message': str(e)})
+        return parsed, errors
+
+    def resolve_prices(self, parsed: dict, errors: list) -> None:
+        """Set current prices, historical prices and trade amounts of the parsed transactions. Current prices are
+        refreshed once for all assets, historical prices are prefetched with one range request per asset. Transactions
+        without a price are moved to the errors."""
+        asset_infos = {}
+        tx_dates_by_asset = {}
+        for tx in parsed.values():
+            for asset_info in (tx['asset_info'], tx['target_asset_info']):
+                if asset_info is not None:
+                    asset_infos[asset_info.pk] = asset_info
+            tx_dates_by_asset.setdefault(tx['asset_info'].api_id_name, set()).add(
+                tx['tx_date'].strftime('%Y-%m-%dT%H:%M'))
+        price_refresh.ensure_prices(asset_infos=list(asset_infos.values()))
+        historical_prices = crypto_data.prefetch_historical_prices(tx_dates_by_asset=tx_dates_by_asset)
+
+        for index, tx in list(parsed.items()):
+            asset_info, target_asset_info = tx['asset_info'], tx['target_asset_info']
+            if target_asset_info is not None:
+                target_amount = conversion.convert_amount(base_asset=asset_info, target_asset=target_asset_info,
+                                                          amount=tx['tx_amount'])
+                if target_amount is None:
+                    # conversion unsuccessful due to api error, calculate with given price data
+                    if tx['tx_price'] is None or not target_asset_info.current_price:
+                        errors.append({'index': index, 'message': 'Preis für die Umrechnung konnte online nicht '
+                                                                  'ermittelt werden, bitte eingeben.'})
+                        del parsed[index]
+                        continue
+                    target_amount = (tx['tx_price'] / target_asset_info.current_price) * tx['tx_amount']
+                tx['target_amount'] = target_amount
+
+            # price on tx_date, if unknown take given tx_price
+            datetime_price = 1.0 if asset_info.api_id_name == "euro" else \
+                historical_prices.get((asset_info.api_id_name, tx['tx_date'].strftime('%Y-%m-%dT%H:%M')))
+            if datetime_price is None:
+                if tx['tx_price'] is None:
+                    errors.append({'index': index, 'message': 'Preis beim Handel konnte online nicht ermittelt '
+                                                              'werden, bitte eingeben.'})
+                    del parsed[index]
+                    continue
+                datetime_price = tx['tx_price']
+            tx['datetime_price'] = datetime_price
+
+    @staticmethod
+    def create_comments(texts: list) -> list:
+        """Create comments with one insert if the database returns the ids of bulk inserts, otherwise one by one"""
+        comments = [Comment(text=text) for text in texts]
+        if connection.features.can_return_rows_from_bulk_insert:
+            return Comment.objects.bulk_create(comments)
+        for comment in comments:
+            comment.save()
+        return comments
+
+    def save_items(self, user: User, parsed: dict) -> None:
+        """Apply all quantity changes to the owned assets and portfolio balances and create the transactions with bulk
+        writes. Must run inside transaction.atomic()."""
+        current_time = timezone.now()
+        changes = {}  # (portfolio id, asset info id) -> quantity change
+        for tx in parsed.values():
+            key = (tx['portfolio'].pk, tx['asset_info'].pk)
+            if tx['tx_type'].type == self.trade_type:
+                changes[key] = changes.get(key, 0.0) - tx['tx_amount']
+                target_key = (tx['portfolio'].pk, tx['target_asset_info'].pk)
+                changes[target_key] = changes.get(target_key, 0.0) + tx['target_amount']
+            else:
+                if tx['tx_type'].type in self.outgoing_types:
+                    tx['tx_amount'] = -tx['tx_amount']
+                changes[key] = changes.get(key, 0.0) + tx['tx_amount']
+
+        # the first owned asset of a portfolio is used like in POST /api/transaction/, rows are locked until commit.
+        # Portfolios are read again with the lock, balance changes made since the validation are kept
+        asset_infos = {}
+        for tx in parsed.values():
+            asset_infos[tx['asset_info'].pk] = tx['asset_info']
+            if tx['target_asset_info'] is not None:
+                asset_infos[tx['target_asset_info'].pk] = tx['target_asset_info']
+        portfolios = {portfolio.pk: portfolio for portfolio in Portfolio.objects.select_for_update().filter(
+            pk__in={tx['portfolio'].pk for tx in parsed.values()}).order_by('id')}
+        owned = {}
+        for asset_owned in AssetOwned.objects.select_for_update().filter(
+                portfolio_id__in=portfolios.keys(), asset_id__in=asset_infos.keys()).order_by('id'):
+            owned.setdefault((asset_owned.portfolio_id, asset_owned.asset_id), asset_owned)
+
+        balance_changes = {}
+        updated, created = [], []
+        for (portfolio_id, asset_info_id), quantity in changes.items():
+            current_price = asset_infos[asset_info_id].current_price or 0.0
+            asset_owned = owned.get((portfolio_id, asset_info_id))
+            if asset_owned is None:
+                asset_owned = AssetOwned(portfolio=portfolios[portfolio_id], asset=asset_infos[asset_info_id],
+                                         quantity_owned=quantity, quantity_price=current_price * quantity)
+                created.append(asset_owned)
+                old_quantity_price = 0.0
+            else:
+                asset_owned.quantity_owned += quantity
+                old_quantity_price = asset_owned.quantity_price
+                asset_owned.quantity_price = current_price * asset_owned.quantity_owned
+                asset_owned.updated_at = current_time
+                updated.append(asset_owned)
+            balance_changes[portfolio_id] = balance_changes.get(portfolio_id, 0.0) + \
+                asset_owned.quantity_price - old_quantity_price
+
+        # bulk writes send no signals, history rows of the quantity changes are written explicitly
+        for asset_owned in bulk_create_with_history(created, AssetOwned):
+            owned[(asset_owned.portfolio_id, asset_owned.asset_id)] = asset_owned
+        if updated:
+            bulk_update_with_history(updated, AssetOwned, ['quantity_owned', 'quantity_price', 'updated_at'])
+        for portfolio_id, balance_change in balance_changes.items():
+            portfolios[portfolio_id].balance += balance_change
+            portfolios[portfolio_id].updated_at = current_time
+        Portfolio.objects.bulk_update(list(portfolios.values()), ['balance', 'updated_at'])
+
+        with_comment = [tx for tx in parsed.values() if tx['tx_comment']]
+        for tx, comment in zip(with_comment, self.create_comments([tx['tx_comment'] for tx in with_comment])):
+            tx['comment'] = comment
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=user,
+                asset=owned[(tx['portfolio'].pk, tx['asset_info'].pk)],
+                tx_type=tx['tx_type'],
+                tx_comment=tx.get('comment'),
+                tx_hash=tx['tx_hash'],
+                tx_sender_address=tx['tx_sender_address'],
+                tx_recipient_address=tx['tx_recipient_address'],
+                tx_amount=tx['tx_amount'],
+                tx_value=tx['datetime_price'] * abs(tx['tx_amount']),
+                tx_fee=tx['tx_fee'] or 0.0,
+                tx_date=tx['tx_date'],
+                target_asset=tx['target_asset_info'],
+                target_amount=tx.get('target_amount'),
+            ) for tx in parsed.values()
+        ])
+
+    @rate_limiter.acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    def post(self, request, *args, **kargs):
+        """POST Route /api/transaction/bulk/ for creating a list of transactions (fields of POST /api/transaction/).
+        Invalid transactions are reported by their index, the valid ones are created in one database transaction."""
+        try:
+            token = request.auth
+            token_obj = Token.objects.select_related('user').get(key=token)
+            user = token_obj.user
+            if user is not None:
+                items = request.data
+                if not isinstance(items, list) or not items:
+                    return Response(data={'message': 'Liste von Transaktionen erwartet.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                if len(items) > self.max_items:
+                    return Response(data={'message': f'Höchstens {self.max_items} Transaktionen pro Anfrage.'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+
+                parsed, errors = self.validate_items(user, items)
+                if parsed:
+                    self.resolve_prices(parsed, errors)
+                if parsed:
+                    with db_transaction.atomic():
+                        self.save_items(user, parsed)
+                    dashboard_snapshot.invalidate_data(user_ids=[user.pk])
+
+                errors.sort(key=lambda error: error['index'])
+                context = {
+                    'message': f'{len(parsed)} von {len(items)} Transaktionen erstellt.',
+                    'created': sorted(parsed.keys()),
+                    'errors': errors,
+                }
+                return Response(data=context,
+                                status=status.HTTP_201_CREATED if parsed else status.HTTP_400_BAD_REQUEST)
+        except Token.DoesNotExist:
+            return Response(data={'detail': 'Ungültiges Token.'}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class TransactionDetailAPIView(APIView):
     """Retrieve, update or delete a transaction instance."""
     def get_object(self, pk):
@@ -976,8 +1214,8 @@ class KrakenFileImportAPIView(APIView):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.coin_mapping = crypto_data.map_kraken_coins()
         self.type_mapping = crypto_data.map_kraken_tx_types()
+        self.historical_prices = {}
 
     def create_asset_update_portfolio(self, asset_owned: AssetOwned, asset_info: AssetInfo, portfolio: Portfolio,
                                       balance: float, quantity_price: float, amount: float, tx_exists: bool = False):
@@ -996,12 +1234,31 @@ class KrakenFileImportAPIView(APIView):
             asset_owned.save()
             old_quantity_price = asset_owned.quantity_price
             asset_owned.quantity_price = asset_info.current_price * asset_owned.quantity_owned
-            asset_owned.save()
+            asset_owned.save_valuation()
             portfolio.balance += asset_owned.quantity_price - old_quantity_price
             portfolio.save()
 
         return asset_owned
 
+    def collect_tx_dates_by_asset(self, dataframe: pd.DataFrame, asset_infos: dict, ledgers: bool, trades: bool) -> dict:
+        """Return transaction dates of all rows grouped by CoinGecko id for prefetching historical prices"""
+        columns = []
+        if ledgers:
+            columns.append(('asset', 'time_ledgers'))
+        if trades:
+            columns.append(('base', 'time_trades'))
+
+        tx_dates_by_asset = {}
+        for acronym_column, date_column in columns:
+            rows = dataframe[[acronym_column, date_column]].dropna()
+            for acronym, tx_date in zip(rows[acronym_column], rows[date_column]):
+                asset_info = asset_infos.get(acronym)
+                if asset_info is None and acronym == 'USD':
+                    asset_info = asset_infos.get('USDT')
+                if asset_info is not None and acronym != 'EUR':
+                    tx_dates_by_asset.setdefault(asset_info.api_id_name, set()).add(tx_date)
+        return tx_dates_by_asset
+
     def create_tx(self, asset_owned: AssetOwned, asset_info: AssetInfo, portfolio: Portfolio,  user: User, element, amount: float, tx_type: str):
         tx_fee = element['fee_ledgers']
         tx_date = element['time_ledgers']
@@ -1015,9 +1272,12 @@ class KrakenFileImportAPIView(APIView):
 
         datetime_price = element['amount'] # TODO: correct standard value?
         if asset != 'EUR':
-            # get price on tx_date with coingecko, if error try cryotocompare api otherwise 0.0 and TODO: update later
-            datetime_price = crypto_data.get_historical_price_at_time_coingecko(crypto_id=asset_info.api_id_name,
-                                                                                tx_date=tx_date) if asset_info.api_id_name != "euro" else 1.0
+            # take prefetched price, otherwise get price on tx_date with coingecko, if error try cryotocompare api
+            # otherwise 0.0 and TODO: update later
+            datetime_price = self.historical_prices.get((asset_info.api_id_name, tx_date))
+            if datetime_price is None:
+                datetime_price = crypto_data.get_historical_price_at_time_coingecko(crypto_id=asset_info.api_id_name,
+                                                                                    tx_date=tx_date) if asset_info.api_id_name != "euro" else 1.0
             # if not isinstance(datetime_price, float) and datetime_price.startswith("Fehler"):
             if not isinstance(datetime_price, float) and datetime_price is None:
                 datetime_price = crypto_data.get_historical_price_at_time(tx_date=tx_date,
@@ -1059,11 +1319,13 @@ class KrakenFileImportAPIView(APIView):
             return row
 
         dataframe = dataframe.apply(lambda row: assign_base_quote(row, pair_separated), axis=1)
-        dataframe['base'] = dataframe['base'].map(self.coin_mapping).fillna(dataframe['base'])
-        dataframe['quote'] = dataframe['quote'].map(self.coin_mapping).fillna(dataframe['quote'])
+        dataframe['base'] = kraken_assets.normalizer.normalize(dataframe['base'])
+        dataframe['quote'] = kraken_assets.normalizer.normalize(dataframe['quote'])
 
         return dataframe
 
+    @rate_limiter.acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    @dashboard_snapshot.deferred_invalidation()
     def post(self, request):
         """POST Route /api/file-import-kraken/ for creating new transactions and updating portfolios from csv files"""
         csv_file = request.FILES['csvFile']
@@ -1123,7 +1385,7 @@ class KrakenFileImportAPIView(APIView):
                     # format dataframe columns of ledgers.csv
                     df_ledgers['time'] = pd.to_datetime(df_ledgers['time']).dt.strftime('%Y-%m-%dT%H:%M')
                     df_ledgers = df_ledgers.drop(columns=['aclass'])
-                    df_ledgers['asset'] = df_ledgers['asset'].map(self.coin_mapping).fillna(df_ledgers['asset'])
+                    df_ledgers['asset'] = kraken_assets.normalizer.normalize(df_ledgers['asset'])
                     df_ledgers['type'] = df_ledgers['type'].map(self.type_mapping).fillna(df_ledgers['type'])
 
                     # dataframe contains columns where 'txid' and 'balance' are not NaN and additionally 'subtype' is not NaN
@@ -1162,6 +1424,19 @@ class KrakenFileImportAPIView(APIView):
                                                               balance=0.0,
                                                               portfolio_type=portfolio_type_spot)
 
+                # refresh prices of all assets in the import with one batched upstream request
+                acronyms = set(full_merged_df['asset'].dropna()) if count_rows_ledgers > 0 else set()
+                if count_rows > 0:
+                    acronyms |= set(full_merged_df['base'].dropna())
+                asset_infos = asset_resolver.resolver.resolve_many(acronyms=acronyms | {'USDT'})
+                price_refresh.ensure_prices(asset_infos=asset_infos.values())
+
+                # resolve historical prices of all rows with one range request per asset
+                self.historical_prices = crypto_data.prefetch_historical_prices(
+                    tx_dates_by_asset=self.collect_tx_dates_by_asset(dataframe=full_merged_df, asset_infos=asset_infos,
+                                                                     ledgers=count_rows_ledgers > 0,
+                                                                     trades=count_rows > 0))
+
                 not_found = []
                 for index, element in full_merged_df.iterrows():
                     print(index)
@@ -1169,15 +1444,15 @@ class KrakenFileImportAPIView(APIView):
                     if tx_exists:
                         continue
 
-                    asset_info = AssetInfo.objects.filter(acronym=element["asset"]).first()
-                    asset_info_trades = AssetInfo.objects.filter(acronym=element["base"]).first() if count_rows > 0 else None
+                    asset_info = asset_infos.get(element["asset"])
+                    asset_info_trades = asset_infos.get(element["base"]) if count_rows > 0 else None
 
                     if count_rows_ledgers > 0:
                         if element['asset'] == 'USD' and asset_info is None:
-                            asset_info = AssetInfo.objects.filter(acronym='USDT').first()
+                            asset_info = asset_infos['USDT']
                     if count_rows > 0:
                         if element['base'] == 'USD' and asset_info_trades is None:
-                            asset_info_trades = AssetInfo.objects.filter(acronym='USDT').first()
+                            asset_info_trades = asset_infos['USDT']
 
                     if asset_info is None and asset_info_trades is None:
                         # print(f"{tx_asset_acronym} nicht gefunden")
@@ -1198,12 +1473,7 @@ class KrakenFileImportAPIView(APIView):
                         # quantity_price = amount * asset_info.current_price if asset_info is not None else amount * asset_info_trades.current_price if asset_info_trades is not None else 0.0
 
                         if asset_info is not None and asset_info_trades is None:
-                            crypto_data.update_asset_info(asset_info=asset_info)
-                            # self.update_asset_info(asset_info=asset_info)
                             quantity_price = amount * asset_info.current_price
-                        if asset_info_trades is not None and asset_info is None:
-                            crypto_data.update_asset_info(asset_info=asset_info_trades)
-                            # self.update_asset_info(asset_info=asset_info_trades)
 
                         if element['type_ledgers'] == "Reward":
                             asset_owned = AssetOwned.objects.filter(asset=asset_info,
@@ -1502,6 +1772,10 @@ class KilnFileImportAPIView(APIView):
     """API View for handling csv file data import from ledger provider Kiln for ETH staking."""
     authentication_classes = [TokenAuthentication]
 
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.historical_prices = {}
+
     def get_or_create_portfolio(self, user: User):
         """Check if user has staking portfolio with name "Ledger (Kiln) otherwise create one and return it."""
         try:
@@ -1535,9 +1809,12 @@ class KilnFileImportAPIView(APIView):
         return dataframe
 
     def create_tx(self, asset_info: AssetInfo, asset_owned: AssetOwned, user: User, portfolio: Portfolio, element: pd.Series):
-        """Get price on Date with coingecko, if error try cryotocompare api otherwise 0.0 and create transaction."""
-        datetime_price = crypto_data.get_historical_price_at_time_coingecko(crypto_id=asset_info.api_id_name,
-                                                                            tx_date=element['Date'])
+        """Take prefetched price or get price on Date with coingecko, if error try cryotocompare api otherwise 0.0 and
+        create transaction."""
+        datetime_price = self.historical_prices.get((asset_info.api_id_name, element['Date']))
+        if datetime_price is None:
+            datetime_price = crypto_data.get_historical_price_at_time_coingecko(crypto_id=asset_info.api_id_name,
+                                                                                tx_date=element['Date'])
         if not isinstance(datetime_price, float) and datetime_price is None:
             datetime_price = crypto_data.get_historical_price_at_time(tx_date=element['Date'],
                                                                       crypto_symbol=asset_info.acronym)
@@ -1560,6 +1837,8 @@ class KilnFileImportAPIView(APIView):
             status=False if datetime_price == 0.0 else True
         )
 
+    @rate_limiter.acquire_timeout(rate_limiter.DEFAULT_ACQUIRE_TIMEOUT)
+    @dashboard_snapshot.deferred_invalidation()
     def post(self, request):
         """POST Route /api/file-import-kiln/ for creating new transactions and updating portfolios from csv file"""
         csv_file = request.FILES['csvFile']
@@ -1588,9 +1867,12 @@ class KilnFileImportAPIView(APIView):
                 portfolio = self.get_or_create_portfolio(user=user)
 
                 asset_owned = None
-                asset_info = AssetInfo.objects.filter(acronym="ETH", fullname="Ethereum").first()
+                asset_info = asset_resolver.resolver.resolve(acronym="ETH")
                 if asset_info is not None:
-                    crypto_data.update_asset_info(asset_info=asset_info)
+                    price_refresh.ensure_prices(asset_infos=[asset_info])
+                    # resolve historical prices of all rows with one range request
+                    self.historical_prices = crypto_data.prefetch_historical_prices(
+                        tx_dates_by_asset={asset_info.api_id_name: df['Date']})
                     asset_owned = AssetOwned.objects.filter(asset=asset_info, portfolio=portfolio).first()
                     if asset_owned is None:
                         asset_owned = AssetOwned.objects.create(
@@ -1,15 +1,17 @@
-import { useQuery } from 'react-query';
+import { useInfiniteQuery, useQuery } from 'react-query';
 import { useStateContext } from '../contexts/ContextProvider';
 
 export const getTransactions = () => {
     const { token, setNotification } = useStateContext();
     const apiUrl = `${import.meta.env.VITE_API_BASE_URL}/api`;
 
-    const fetchTransactions = async () => {
+    // one page per request, the next page starts after the cursor of the previous one
+    const fetchTransactions = async ({ pageParam = null }) => {
         if (!token) return null;
 
         try {
-            const response = await fetch(`${apiUrl}/transaction/`, {
+            const params = pageParam ? `?cursor=${encodeURIComponent(pageParam)}` : '';
+            const response = await fetch(`${apiUrl}/transaction/${params}`, {
                 method: 'GET',
                 headers: {
                     'Authorization': `Token ${token}`,
@@ -26,17 +28,23 @@ export const getTransactions = () => {
         }
     };
 
-    const { data: transactionData, error, isLoading, isError } = useQuery(
+    const { data, error, isLoading, isError, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery(
         ['getTransactions', token],
         fetchTransactions,
         {
             enabled: !!token, // Führt die Abfrage nur aus, wenn ein Token vorhanden ist
+            getNextPageParam: (lastPage) => lastPage?.next_cursor ?? undefined,
             staleTime: 1000 * 60 * 60, // Die Daten bleiben für 60 Minuten frisch
             cacheTime: 1000 * 60 * 60, // Cache-Zeit von 60 Minuten
         }
     );
 
-    return { transactionData, isLoading, isError, error };
+    // all loaded pages as one list
+    const transactionData = data ? {
+        transactions: data.pages.flatMap((page) => page?.transactions ?? [])
+    } : undefined;
+
+    return { transactionData, isLoading, isError, error, fetchNextPage, hasNextPage, isFetchingNextPage };
 };
 
 export const getTransactionTypes = () => {
@@ -205,7 +205,7 @@ export default function Transaction() {
     const apiUrl = `${import.meta.env.VITE_API_BASE_URL}/api`;
     const navigate = useNavigate();
     const { token, setNotification } = useStateContext();
-    const { transactionData, error, isLoading, isError } = getTransactions();
+    const { transactionData, error, isLoading, isError, fetchNextPage, hasNextPage, isFetchingNextPage } = getTransactions();
     const [showModal, setShowModal] = useState(false);
     const [selectedTxId, setSelectedTxId] = useState(null);
 
@@ -298,6 +298,14 @@ export default function Transaction() {
                             </div>
                         </div>
                         <List data={tx_data} onDelete={openModal}/>
+                        {hasNextPage && (
+                            <div className="text-center mt-2">
+                                <button className="btn btn-outline-secondary btn-sm" onClick={() => fetchNextPage()}
+                                        disabled={isFetchingNextPage}>
+                                    {isFetchingNextPage ? 'Lädt...' : 'Mehr laden'}
+                                </button>
+                            </div>
+                        )}
                         <ConfirmationModal
                             show={showModal}
                             onClose={closeModal}